@@ -0,0 +1,5 @@
+import os
+
+# 벤치마크는 네트워크 없이 가짜 임베딩으로 실행되므로, Settings가 요구하는 키를 더미 값으로 채운다
+os.environ.setdefault("OPENAI_API_KEY", "offline-benchmark")
+os.environ.setdefault("TAVILY_API_KEY", "offline-benchmark")
@@ -0,0 +1,127 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.utils import make_reflection, percentiles, seed_snapshot_db
+from common.reflection_manager import ReflectionManager
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+class SlowFakeEmbedding(DeterministicFakeEmbedding):
+    """임베딩 API의 네트워크 지연을 흉내 내는 가짜 임베딩."""
+
+    latency: float = 0.05
+
+    def embed_query(self, text: str) -> list[float]:
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await asyncio.sleep(self.latency)
+        return super().embed_query(text)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self.latency)
+        return super().embed_documents(texts)
+
+
+async def session(
+    manager: ReflectionManager, worker: int, iterations: int, samples: list[float]
+) -> None:
+    # 에이전트 세션 하나: 관련 리플렉션을 검색하고 새 리플렉션을 저장하는 루프
+    for i in range(iterations):
+        start = time.perf_counter()
+        await manager.aget_relevant_reflections(f"세션 {worker} 태스크 {i}")
+        await manager.asave_reflection(make_reflection(worker * iterations + i))
+        samples.append(time.perf_counter() - start)
+
+
+async def run_async(manager: ReflectionManager, sessions: int, iterations: int) -> list[float]:
+    samples: list[float] = []
+    await asyncio.gather(
+        *(session(manager, w, iterations, samples) for w in range(sessions))
+    )
+    return samples
+
+
+def run_sync(manager: ReflectionManager, sessions: int, iterations: int) -> list[float]:
+    # 동기 API로는 한 스레드에서 세션을 차례로 처리할 수밖에 없다
+    samples = []
+    for w in range(sessions):
+        for i in range(iterations):
+            start = time.perf_counter()
+            manager.get_relevant_reflections(f"세션 {w} 태스크 {i}")
+            manager.save_reflection(make_reflection(w * iterations + i))
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def run(mode: str, size: int, dim: int, sessions: int, iterations: int, latency: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "reflection_db.json")
+        seed_snapshot_db(file_path, size, dim)
+        manager = ReflectionManager(
+            file_path=file_path, embeddings=SlowFakeEmbedding(size=dim, latency=latency)
+        )
+        start = time.perf_counter()
+        if mode == "async":
+            samples = asyncio.run(run_async(manager, sessions, iterations))
+        else:
+            samples = run_sync(manager, sessions, iterations)
+        elapsed = time.perf_counter() - start
+        manager.close()
+
+        # 동시 코루틴이 쓴 결과가 메모리·인덱스·디스크 모두에서 일치하는지 확인한다
+        expected = size + sessions * iterations
+        consistent = (
+            len(manager.reflections) == expected
+            and manager.index.ntotal == expected
+            and sum(r is not None for r in manager.row_ids) == expected
+        )
+        reloaded = ReflectionManager(
+            file_path=file_path, embeddings=DeterministicFakeEmbedding(size=dim)
+        )
+        consistent = consistent and len(reloaded.reflections) == expected
+        reloaded.close()
+
+    return {
+        "mode": mode,
+        "loops_per_s": sessions * iterations / elapsed,
+        "elapsed_s": elapsed,
+        "consistent": consistent,
+        **percentiles(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="하나의 이벤트 루프에서 동시 리플렉션 저장/검색 루프의 처리량을 측정합니다"
+    )
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="임베딩 호출 1회의 모의 지연(초)"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':>6} {'loops/s':>8} {'elapsed_s':>9} {'p50_ms':>9} {'p99_ms':>9} {'consistent':>10}"
+    )
+    for mode in ("sync", "async"):
+        r = run(mode, args.size, args.dim, args.sessions, args.iterations, args.latency)
+        print(
+            f"{r['mode']:>6} {r['loops_per_s']:>8.1f} {r['elapsed_s']:>9.2f}"
+            f" {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {str(r['consistent']):>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import argparse
+import logging
+import os
+import re
+import tempfile
+import time
+
+from benchmarks.cascaded_judge import make_workload
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.runnables import RunnableLambda
+
+LESSON = "검색어를 더 구체적으로 정하고, 결과가 태스크의 모든 항목을 다루는지 확인한 뒤 답변해야 한다. "
+
+
+def estimate_tokens(text: str) -> int:
+    # 오프라인이라 토크나이저를 받을 수 없으므로 UTF-8 4바이트를 토큰 하나로 추정한다
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+class FakeLLM(GenericFakeChatModel):
+    """첫 토큰 지연 + 출력 토큰 수에 비례하는 생성 시간을 흉내 내고 토큰 수를 세는 가짜 LLM."""
+
+    ttft: float = 0.5
+    tokens_per_second: float = 100.0
+    labels: dict = {}
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    def with_structured_output(self, schema, **kwargs):
+        from common.reflection_manager import Reflection, ReflectionBatch, ReflectionJudgment
+
+        def reflect(index: int) -> Reflection:
+            record = self.labels[index]
+            return Reflection(
+                id="",
+                task=record["task"],
+                reflection=f"[{index}] {record['kind']} 결과에서 얻은 교훈: {LESSON * 2}",
+                judgment=ReflectionJudgment(
+                    needs_retry=record["needs_retry"], confidence=0.9, reasons=[record["kind"]]
+                ),
+            )
+
+        def respond(prompt):
+            text = prompt.to_string()
+            indices = [int(i) for i in re.findall(r"<task>\[(\d+)\]", text)] or [
+                int(re.search(r"\[(\d+)\]", text).group(1))
+            ]
+            if schema is ReflectionBatch:
+                output = ReflectionBatch(reflections=[reflect(i) for i in indices])
+            else:
+                output = reflect(indices[0])
+            tokens = estimate_tokens(output.model_dump_json())
+            time.sleep(self.ttft + tokens / self.tokens_per_second)
+            self.calls += 1
+            self.input_tokens += estimate_tokens(text)
+            self.output_tokens += tokens
+            return output
+
+        return RunnableLambda(respond)
+
+
+def run(mode: str, workload: list[dict], args) -> dict:
+    from benchmarks.async_concurrency import SlowFakeEmbedding
+    from common.reflection_manager import ReflectionManager, TaskReflector
+
+    class CountingEmbedding(SlowFakeEmbedding):
+        calls: int = 0
+
+        def embed_query(self, text: str) -> list[float]:
+            self.calls += 1
+            return super().embed_query(text)
+
+        def embed_documents(self, texts: list[str]) -> list[list[float]]:
+            self.calls += 1
+            return super().embed_documents(texts)
+
+    llm = FakeLLM(
+        messages=iter([]),
+        ttft=args.ttft,
+        tokens_per_second=args.tokens_per_second,
+        labels=dict(enumerate(workload)),
+    )
+    embeddings = CountingEmbedding(size=256, latency=args.embed_latency)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = ReflectionManager(
+            file_path=os.path.join(tmp_dir, "reflection_db.json"), embeddings=embeddings
+        )
+        writes = 0
+        write_log_records = manager.store._write_log_records
+
+        def counting_write(records):
+            nonlocal writes
+            writes += 1
+            write_log_records(records)
+
+        manager.store._write_log_records = counting_write
+        reflector = TaskReflector(llm=llm, reflection_manager=manager, write_behind=False)
+        tasks = [record["task"] for record in workload]
+        results = [record["result"] for record in workload]
+        start = time.perf_counter()
+        if mode == "per-task":
+            reflections = [reflector.run(task, result) for task, result in zip(tasks, results)]
+        else:
+            reflections = reflector.run_batch(tasks, results)
+        elapsed = time.perf_counter() - start
+        agree = sum(
+            r.judgment.needs_retry == record["needs_retry"]
+            for r, record in zip(reflections, workload)
+        )
+        stored = len(manager.reflections)
+        manager.close()
+    return {
+        "wall_ms": elapsed * 1000,
+        "llm_calls": llm.calls,
+        "input_tokens": llm.input_tokens,
+        "output_tokens": llm.output_tokens,
+        "embed_calls": embeddings.calls,
+        "log_writes": writes,
+        "agreement": agree / len(workload),
+        "stored": stored,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="TaskReflector.run을 태스크마다 호출할 때와 run_batch로 한 번에 리플렉션할 때를 비교합니다"
+    )
+    parser.add_argument("--tasks", type=int, nargs="+", default=[3, 5, 10])
+    parser.add_argument("--ttft", type=float, default=0.5, help="LLM 첫 토큰까지의 지연(초)")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="LLM 출력 속도")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="임베딩 요청 1회의 지연(초)")
+    args = parser.parse_args()
+
+    os.environ.update(REFLECTION_CAPACITY="0", REFLECTION_MERGE_DISTANCE="0", REFLECTION_JUDGE="smart")
+    logging.disable(logging.INFO)
+    print(
+        f"첫 토큰 {args.ttft * 1000:.0f}ms, 출력 {args.tokens_per_second:.0f} tok/s,"
+        f" 임베딩 {args.embed_latency * 1000:.0f}ms (토큰 수는 UTF-8 4바이트당 1토큰으로 추정)"
+    )
+    print(
+        f"{'tasks':>5} {'mode':>8} {'wall_ms':>8} {'llm':>4} {'in_tok':>7} {'out_tok':>7}"
+        f" {'embed':>5} {'writes':>6} {'agree':>6} {'stored':>6}"
+    )
+    for count in args.tasks:
+        workload = make_workload(count, seed=count)
+        for mode in ("per-task", "batch"):
+            r = run(mode, workload, args)
+            print(
+                f"{count:>5} {mode:>8} {r['wall_ms']:>8.0f} {r['llm_calls']:>4} {r['input_tokens']:>7}"
+                f" {r['output_tokens']:>7} {r['embed_calls']:>5} {r['log_writes']:>6}"
+                f" {r['agreement']:>6.2f} {r['stored']:>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import argparse
+import os
+import re
+import tempfile
+import time
+import zlib
+
+import numpy as np
+from benchmarks.utils import percentiles
+from common.reflection_manager import Reflection, ReflectionJudgment, ReflectionManager
+from langchain_core.embeddings import Embeddings
+
+
+class LessonEmbedding(Embeddings):
+    """"lesson-{j}-{v}"로 시작하는 텍스트를 교훈 j의 중심 근처 벡터로 임베딩한다.
+
+    같은 교훈의 변형끼리는 L2² 거리가 병합 임계값보다 가깝고, 다른 교훈과는 멀다.
+    """
+
+    def __init__(self, dim: int, noise: float = 0.01):
+        self.dim = dim
+        self.noise = noise
+
+    def embed_query(self, text: str) -> list[float]:
+        lesson, variant = re.match(r"lesson-(\d+)-(\w+)", text).groups()
+        vector = np.random.default_rng(int(lesson)).standard_normal(self.dim)
+        rng = np.random.default_rng([int(lesson), zlib.crc32(variant.encode())])
+        vector += self.noise * rng.standard_normal(self.dim)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed_query(text) for text in texts]
+
+
+def lesson_stream(inserts: int, recurring: int, repeat_ratio: float, seed: int = 0):
+    # 실행의 repeat_ratio는 자주 반복되는 태스크(지프 분포)에서, 나머지는 한 번만 나오는 태스크에서 온다
+    rng = np.random.default_rng(seed)
+    for i in range(inserts):
+        if rng.random() < repeat_ratio:
+            yield int(min(rng.zipf(1.3), recurring)) - 1, i
+        else:
+            yield recurring + i, i
+
+
+def make_lesson(lesson: int, variant: int) -> Reflection:
+    return Reflection(
+        id="",
+        task=f"태스크 유형 {lesson}",
+        reflection=f"lesson-{lesson}-{variant}: 태스크 유형 {lesson}에서는 재료의 분량과 단위를 구체적으로 명시해야 한다.",
+        judgment=ReflectionJudgment(
+            needs_retry=variant % 5 == 0, confidence=(variant % 10) / 10, reasons=[]
+        ),
+    )
+
+
+def format_reflections(reflections: list[Reflection]) -> str:
+    # self_reflection.main.format_reflections와 같은 형식
+    return "\n\n".join(
+        f"<ref_{i}><task>{r.task}</task><reflection>{r.reflection}</reflection></ref_{i}>"
+        for i, r in enumerate(reflections)
+    )
+
+
+def run(mode: str, args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = ReflectionManager(
+            file_path=os.path.join(tmp_dir, "reflection_db.json"),
+            embeddings=LessonEmbedding(args.dim),
+        )
+        # 5만 번의 fsync가 측정을 지배하지 않도록 OS에 맡긴다
+        manager.store.fsync = "never"
+        if mode == "unbounded":
+            manager.merge_distance, manager.capacity = 0.0, 0
+        else:
+            manager.merge_distance = args.merge_distance
+            manager.capacity = args.capacity
+            manager.eviction_policy = args.policy
+
+        start = time.perf_counter()
+        for lesson, variant in lesson_stream(args.inserts, args.recurring, args.repeat_ratio):
+            manager.save_reflection(make_lesson(lesson, variant))
+        insert_s = time.perf_counter() - start
+
+        # 자주 반복되는 태스크 유형에 대한 검색: 프롬프트 길이와 그 안의 서로 다른 교훈 수
+        rng = np.random.default_rng(1)
+        queries = [
+            f"lesson-{int(min(rng.zipf(1.3), args.recurring)) - 1}-q{q}"
+            for q in range(args.queries)
+        ]
+        samples, chars, distinct = [], [], []
+        for query in queries:
+            begin = time.perf_counter()
+            results = manager.get_relevant_reflections(query, k=3)
+            samples.append(time.perf_counter() - begin)
+            chars.append(len(format_reflections(results)))
+            distinct.append(len({r.task for r in results}))
+        manager.close()
+
+    return {
+        "mode": mode,
+        "reflections": len(manager.reflections),
+        "index_size": manager.index.ntotal,
+        "insert_s": insert_s,
+        **percentiles(samples),
+        "prompt_chars": sum(chars) / len(chars),
+        "distinct_lessons": sum(distinct) / len(distinct),
+        # 중복 교훈이 차지한 만큼 서로 다른 교훈 하나를 프롬프트에 넣는 비용이 커진다
+        "chars_per_lesson": sum(chars) / sum(distinct),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="중복 병합·용량 제한 유무에 따른 인덱스 크기, 검색 지연, 프롬프트 길이를 비교합니다"
+    )
+    parser.add_argument("--inserts", type=int, default=50_000)
+    parser.add_argument("--recurring", type=int, default=2_000, help="반복되는 태스크 유형 수")
+    parser.add_argument("--repeat-ratio", type=float, default=0.8)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--merge-distance", type=float, default=0.1)
+    parser.add_argument("--capacity", type=int, default=5_000)
+    parser.add_argument("--policy", choices=["lru", "age", "confidence"], default="lru")
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':>9} {'stored':>7} {'index':>7} {'insert_s':>8} {'p50_ms':>7} {'p99_ms':>7}"
+        f" {'prompt_chars':>12} {'distinct@3':>10} {'chars/lesson':>12}"
+    )
+    for mode in ("unbounded", "bounded"):
+        r = run(mode, args)
+        print(
+            f"{r['mode']:>9} {r['reflections']:>7} {r['index_size']:>7} {r['insert_s']:>8.1f}"
+            f" {r['p50_ms']:>7.3f} {r['p99_ms']:>7.3f} {r['prompt_chars']:>12.1f}"
+            f" {r['distinct_lessons']:>10.2f} {r['chars_per_lesson']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from benchmarks.lexical_search import make_corpus
+from common.local_embeddings import HashedNGramEmbeddings
+
+
+class RateLimitError(Exception):
+    """임베딩 API의 HTTP 429 응답을 흉내 낸다."""
+
+    status_code = 429
+
+
+class RemoteLikeEmbeddings(HashedNGramEmbeddings):
+    """요청마다 네트워크 지연이 있고 초당 요청 수가 제한된 임베딩 API를 흉내 내는 로컬 임베딩."""
+
+    def __init__(self, dim: int, latency: float, requests_per_second: float = 0.0):
+        super().__init__(dim=dim)
+        self.latency = latency
+        self.requests_per_second = requests_per_second
+        self._window: list[float] = []
+        self._lock = threading.Lock()
+
+    def embed_matrix(self, texts: list[str]):
+        if self.requests_per_second:
+            with self._lock:
+                # 최근 1초 동안의 요청 수가 한도를 넘으면 429로 거절한다
+                now = time.monotonic()
+                self._window = [t for t in self._window if now - t < 1.0]
+                if len(self._window) >= self.requests_per_second:
+                    raise RateLimitError("rate limit exceeded")
+                self._window.append(now)
+        time.sleep(self.latency)
+        return super().embed_matrix(texts)
+
+
+def write_corpus(path: str, size: int, vocabulary: int) -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        for i, (task, lesson) in enumerate(make_corpus(size, vocabulary)):
+            record = {
+                "task": task,
+                "reflection": lesson,
+                "judgment": {"needs_retry": i % 5 == 0, "confidence": 0.5, "reasons": []},
+                "pattern": "self_reflection",
+            }
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="JSONL 대량 가져오기와 save_reflection 반복의 처리량을 비교합니다"
+    )
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--baseline", type=int, default=500, help="save_reflection으로 저장할 개수")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--latency", type=float, default=0.05, help="임베딩 요청 1회의 지연(초)")
+    parser.add_argument("--rps", type=float, default=20, help="rate limit 실험의 초당 요청 한도")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--backend", default="hnsw", choices=["flat", "hnsw", "ivf_flat"])
+    args = parser.parse_args()
+
+    os.environ.update(
+        REFLECTION_INDEX_BACKEND=args.backend,
+        REFLECTION_CAPACITY="0",
+        REFLECTION_MERGE_DISTANCE="0",
+    )
+    from common.reflection_import import import_reflections, read_jsonl
+    from common.reflection_manager import ReflectionManager, StoredReflection
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = os.path.join(tmp_dir, "corpus.jsonl")
+        write_corpus(source, args.size, args.vocabulary)
+        print(
+            f"리플렉션 {args.size}개 JSONL, {args.dim}차원 로컬 임베딩, 요청당 지연"
+            f" {args.latency * 1000:.0f}ms, 배치 {args.batch_size}, 동시 요청 {args.concurrency}, {args.backend}"
+        )
+        print(
+            f"{'method':>22} {'rows':>7} {'total_s':>8} {'rows/s':>9} {'calls':>6} {'429s':>5}"
+            f" {'embed_s':>8} {'write_s':>8} {'index_s':>8}"
+        )
+
+        # 기존 방식: 한 건씩 임베딩하고 로그에 기록한다
+        file_path = os.path.join(tmp_dir, "baseline", "reflection_db.json")
+        manager = ReflectionManager(
+            file_path=file_path, embeddings=RemoteLikeEmbeddings(args.dim, args.latency)
+        )
+        start = time.perf_counter()
+        for i, record in enumerate(read_jsonl(source)):
+            if i == args.baseline:
+                break
+            manager.save_reflection(StoredReflection(id="", **record), record["pattern"])
+        elapsed = time.perf_counter() - start
+        manager.close()
+        print(
+            f"{'save_reflection':>22} {args.baseline:>7} {elapsed:>8.1f} {args.baseline / elapsed:>9.0f}"
+            f" {args.baseline:>6} {0:>5} {'-':>8} {'-':>8} {'-':>8}"
+        )
+
+        for name, rps in (("import_reflections", 0.0), (f"import ({args.rps:g} req/s)", args.rps)):
+            file_path = os.path.join(tmp_dir, name.split()[0], "reflection_db.json")
+            embeddings = RemoteLikeEmbeddings(args.dim, args.latency, rps)
+            start = time.perf_counter()
+            stats = import_reflections(
+                file_path,
+                read_jsonl(source),
+                embeddings=embeddings,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+            )
+            elapsed = time.perf_counter() - start
+            # 가져온 DB가 체크포인트로 열리고 검색되는지 확인한다
+            manager = ReflectionManager(file_path=file_path, embeddings=embeddings)
+            assert len(manager.reflections) == args.size
+            assert manager.get_relevant_reflections("카레", k=3)
+            manager.store.close()
+            print(
+                f"{name:>22} {stats.imported:>7} {elapsed:>8.1f} {stats.imported / elapsed:>9.0f}"
+                f" {stats.embed_calls:>6} {stats.throttled:>5} {stats.embed_s:>8.1f}"
+                f" {stats.write_s:>8.1f} {stats.index_s:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import argparse
+import logging
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+from benchmarks.utils import percentiles
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.runnables import RunnableLambda
+
+# (종류, 비율, 고성능 모델의 판정(needs_retry)). partial은 휴리스틱으로 가리기 어려운 애매한 결과다
+WORKLOAD_MIX = [
+    ("complete", 0.55, False),
+    ("partial", 0.2, True),
+    ("off_topic", 0.1, True),
+    ("empty", 0.05, True),
+    ("refusal", 0.05, True),
+    ("tool_error", 0.05, True),
+]
+FILLER = "조리 과정에서 재료 손질과 불 조절, 양념의 비율을 단계별로 정리했다. "
+
+
+def make_workload(count: int, seed: int = 0) -> list[dict]:
+    """ReflectiveAgent가 실제로 만드는 (태스크, ReAct 결과) 쌍을 종류별 비율로 흉내 낸 기록."""
+    rng = np.random.default_rng(seed)
+    kinds = rng.choice(len(WORKLOAD_MIX), count, p=[mix[1] for mix in WORKLOAD_MIX])
+    workload = []
+    for i, kind in enumerate(kinds):
+        name, _, needs_retry = WORKLOAD_MIX[kind]
+        task = f"[{i}] 카레라이스 재료와 조리 순서, 향신료 배합 조사"
+        if name == "complete":
+            result = f"카레라이스 재료: 감자, 당근, 양파. 조리 순서와 향신료 배합은 다음과 같다. {FILLER * 30}"
+        elif name == "partial":
+            result = f"카레라이스 재료는 감자와 당근이다. {FILLER * 4}"
+        elif name == "off_topic":
+            result = f"파스타 소스를 만드는 방법을 정리했다. {FILLER * 20}"
+        elif name == "empty":
+            result = "결과 없음"
+        elif name == "refusal":
+            result = f"죄송하지만 요청하신 정보를 찾을 수 없습니다. {FILLER}"
+        else:
+            result = f"Error: TavilySearchResults rate limit exceeded. {FILLER}"
+        workload.append({"task": task, "result": result, "kind": name, "needs_retry": needs_retry})
+    return workload
+
+
+class FakeLLM(GenericFakeChatModel):
+    """구조화 출력을 고정 지연 뒤에 기록된 정답 판정으로 돌려주는 가짜 LLM."""
+
+    latency: float = 1.0
+    labels: dict = {}
+    # 빠른 모델처럼 애매한 결과에 낮은 자신감을 주는지
+    fast: bool = False
+    calls: int = 0
+
+    def with_structured_output(self, schema, **kwargs):
+        from common.reflection_manager import Reflection, ReflectionJudgment
+
+        def respond(prompt):
+            time.sleep(self.latency)
+            self.calls += 1
+            index = int(re.search(r"\[(\d+)\]", prompt.to_string()).group(1))
+            record = self.labels[index]
+            # 빠른 모델은 주제를 벗어난 결과는 가려내지만, 부분적인 결과는 절반 정도만 자신 있게 판정한다
+            confident = not self.fast or record["kind"] != "partial" or index % 2 == 0
+            judgment = ReflectionJudgment(
+                needs_retry=record["needs_retry"],
+                confidence=0.9 if confident else 0.6,
+                reasons=[record["kind"]],
+            )
+            if schema is ReflectionJudgment:
+                return judgment
+            return Reflection(
+                id="",
+                task=record["task"],
+                reflection=f"{record['kind']} 결과에서 얻은 교훈 {index}",
+                judgment=judgment,
+            )
+
+        return RunnableLambda(respond)
+
+
+def run(mode: str, workload: list[dict], smart_latency: float, fast_latency: float) -> dict:
+    from benchmarks.async_concurrency import SlowFakeEmbedding
+    from common.reflection_judge import CascadeJudge
+    from common.reflection_manager import ReflectionManager, TaskReflector
+
+    labels = dict(enumerate(workload))
+    smart = FakeLLM(messages=iter([]), latency=smart_latency, labels=labels)
+    fast = FakeLLM(messages=iter([]), latency=fast_latency, labels=labels, fast=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = ReflectionManager(
+            file_path=os.path.join(tmp_dir, "reflection_db.json"),
+            embeddings=SlowFakeEmbedding(size=256, latency=0.05),
+        )
+        judge = None
+        if mode == "heuristic":
+            judge = CascadeJudge()
+        elif mode == "cascade":
+            judge = CascadeJudge(fast)
+        reflector = TaskReflector(llm=smart, reflection_manager=manager, judge=judge)
+
+        samples, agree, smart_critical = [], 0, 0
+        for record in workload:
+            start = time.perf_counter()
+            reflection = reflector.run(record["task"], record["result"])
+            samples.append(time.perf_counter() - start)
+            # 교훈을 미루지 않은 경우에만 고성능 모델 호출이 임계 경로에 있다
+            smart_critical += bool(reflection.reflection)
+            agree += reflection.judgment.needs_retry == record["needs_retry"]
+        start = time.perf_counter()
+        reflector.flush()
+        flush_s = time.perf_counter() - start
+        stored = len(manager.reflections)
+        manager.close()
+    return {
+        **percentiles(samples),
+        "mean_ms": sum(samples) / len(samples) * 1000,
+        "smart_critical": smart_critical,
+        "smart_total": smart.calls,
+        "fast": fast.calls,
+        "stages": judge.stats if judge else {},
+        "agreement": agree / len(workload),
+        "flush_s": flush_s,
+        "stored": stored,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="TaskReflector의 재시도 판정을 고성능 모델 단독과 cascade(휴리스틱 → 빠른 모델 → 고성능 모델)로 비교합니다"
+    )
+    parser.add_argument("--tasks", type=int, default=100)
+    parser.add_argument("--smart-latency", type=float, default=0.8)
+    parser.add_argument("--fast-latency", type=float, default=0.15)
+    args = parser.parse_args()
+
+    os.environ.update(REFLECTION_CAPACITY="0", REFLECTION_MERGE_DISTANCE="0")
+    logging.disable(logging.INFO)
+    workload = make_workload(args.tasks)
+    print(
+        f"태스크 {args.tasks}개 (재시도 필요 {sum(r['needs_retry'] for r in workload)}개),"
+        f" 고성능 모델 {args.smart_latency * 1000:.0f}ms, 빠른 모델 {args.fast_latency * 1000:.0f}ms"
+    )
+    print(
+        f"{'mode':>9} {'mean_ms':>8} {'p50_ms':>8} {'p99_ms':>8} {'smart(crit)':>11} {'smart':>6}"
+        f" {'fast':>5} {'heur/fast/esc':>13} {'agree':>6} {'flush_s':>8} {'stored':>7}"
+    )
+    for mode in ("smart", "heuristic", "cascade"):
+        r = run(mode, workload, args.smart_latency, args.fast_latency)
+        stages = "/".join(str(r["stages"].get(k, "-")) for k in ("heuristic", "fast", "escalated"))
+        print(
+            f"{mode:>9} {r['mean_ms']:>8.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}"
+            f" {r['smart_critical']:>11} {r['smart_total']:>6} {r['fast']:>5} {stages:>13}"
+            f" {r['agreement']:>6.2f} {r['flush_s']:>8.1f} {r['stored']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
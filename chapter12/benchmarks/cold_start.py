@@ -0,0 +1,105 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+from benchmarks.utils import clustered_embeddings, make_reflection
+from common.reflection_store import EmbeddingMatrix, ReflectionStore
+
+
+def open_manager(file_path: str, dim: int, checkpoint: bool = False) -> dict:
+    # 설정은 환경 변수로 전달되며, 별도 프로세스라 측정 간에 페이지 캐시 외의 상태가 섞이지 않는다
+    from common.reflection_manager import ReflectionManager
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    start = time.perf_counter()
+    manager = ReflectionManager(file_path=file_path, embeddings=DeterministicFakeEmbedding(size=dim))
+    load_s = time.perf_counter() - start
+    checkpoint_s = None
+    if checkpoint:
+        start = time.perf_counter()
+        manager.checkpoint_index()
+        checkpoint_s = time.perf_counter() - start
+    # 첫 검색까지 포함해 mmap으로 연 인덱스의 지연 로딩 비용도 드러나게 한다
+    start = time.perf_counter()
+    manager._search([np.zeros(dim, "float32")], 3)
+    first_search_ms = (time.perf_counter() - start) * 1000
+    result = {
+        "load_s": load_s,
+        "checkpoint_s": checkpoint_s,
+        "first_search_ms": first_search_ms,
+        "ntotal": manager.index.ntotal,
+    }
+    manager.store.close()  # close()는 체크포인트를 다시 쓰므로 저장소만 닫는다
+    return result
+
+
+def run(file_path: str, dim: int, env: dict, checkpoint: bool = False) -> dict:
+    os.environ.update(env)
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(open_manager, (file_path, dim, checkpoint))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="인덱스 체크포인트 유무에 따른 리플렉션 매니저 콜드 스타트 시간을 측정합니다"
+    )
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--tail", type=int, default=1000, help="체크포인트 이후 로그에 추가할 행 수")
+    parser.add_argument(
+        "--backends", nargs="+", default=["hnsw", "ivf_flat"], choices=["hnsw", "ivf_flat", "ivf_pq"]
+    )
+    args = parser.parse_args()
+
+    vectors = clustered_embeddings(args.size + args.tail, args.dim)
+    reflections = [make_reflection(i) for i in range(args.size + args.tail)]
+
+    print(f"스냅샷 {args.size}행 + 체크포인트 이후 로그 {args.tail}행, {args.dim}차원")
+    print(
+        f"{'backend':>8} {'mode':>15} {'load_s':>8} {'first_ms':>9} {'ntotal':>8} {'checkpoint_s':>12}"
+    )
+    for backend in args.backends:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "reflection_db.json")
+            store = ReflectionStore(file_path, fsync="never")
+            store.compact(
+                [r.model_dump() for r in reflections[: args.size]],
+                EmbeddingMatrix(vectors[: args.size]),
+            )
+            env = dict(
+                REFLECTION_INDEX_BACKEND=backend,
+                REFLECTION_CAPACITY="0",
+                REFLECTION_LOG_COMPACT_THRESHOLD="0",
+                REFLECTION_INDEX_CHECKPOINT_MMAP="false",
+            )
+
+            rows = []
+            # 1) 체크포인트 없이 전체 재구축(IVF는 재학습 포함). 로드 후 체크포인트를 쓴다
+            rows.append(("rebuild", run(file_path, args.dim, env, checkpoint=True)))
+            # 2) 체크포인트 이후에 추가된 리플렉션
+            for reflection, vector in zip(reflections[args.size :], vectors[args.size :]):
+                store.append(reflection, vector.tolist())
+            store.close()
+            rows.append(("checkpoint", run(file_path, args.dim, env)))
+            rows.append(
+                ("checkpoint+mmap", run(file_path, args.dim, {**env, "REFLECTION_INDEX_CHECKPOINT_MMAP": "true"}))
+            )
+            # 3) 비교용: 같은 데이터를 체크포인트 없이 재구축
+            for path in glob.glob(os.path.join(tmp_dir, "*.index*")):
+                os.remove(path)
+            rows.append(("rebuild+tail", run(file_path, args.dim, env)))
+
+            for mode, r in rows:
+                checkpoint = f"{r['checkpoint_s']:>12.2f}" if r["checkpoint_s"] is not None else f"{'-':>12}"
+                print(
+                    f"{backend:>8} {mode:>15} {r['load_s']:>8.2f} {r['first_search_ms']:>9.2f}"
+                    f" {r['ntotal']:>8} {checkpoint}"
+                )
+
+
+if __name__ == "__main__":
+    main()
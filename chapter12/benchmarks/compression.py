@@ -0,0 +1,116 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+from benchmarks.utils import (
+    clustered_embeddings,
+    current_rss_mb,
+    make_reflection,
+    percentiles,
+)
+from common.reflection_store import EmbeddingMatrix, ReflectionStore
+
+# (압축 방식, 스냅샷 자료형)
+MODES = [
+    ("none", "float32"),
+    ("fp16", "float16"),
+    ("int8", "float16"),
+    ("pq", "float16"),
+]
+
+
+def measure(file_path: str, dim: int, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    # 설정은 환경 변수로 전달되며, 별도 프로세스라 RSS가 측정 간에 섞이지 않는다
+    from common.reflection_manager import ReflectionManager
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    rss_before = current_rss_mb()
+    manager = ReflectionManager(
+        file_path=file_path, embeddings=DeterministicFakeEmbedding(size=dim)
+    )
+    rss_mb = current_rss_mb() - rss_before
+    # 승격 전의 정확한 인덱스는 벡터를 따로 두지 않고 embedding_matrix를 스캔한다
+    index = manager.index.index
+    index_bytes = faiss.serialize_index(index).nbytes if index is not None else 0
+
+    samples, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        results = manager._search([query], k)[0]
+        samples.append(time.perf_counter() - start)
+        hits += len(set(expected) & {manager.rows[r.id] for r in results})
+    n = len(manager.reflections)
+    manager.close()
+    return {
+        "index_bytes": index_bytes / n,
+        "rss_bytes": rss_mb * 2**20 / n,
+        "recall": hits / truth.size,
+        **percentiles(samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="임베딩 압축 방식별 리플렉션당 메모리·디스크 사용량과 재현율을 측정합니다"
+    )
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--backend", default="flat", choices=["flat", "hnsw", "ivf_flat"])
+    parser.add_argument("--rerank-factors", type=int, nargs="+", default=[0, 4])
+    parser.add_argument(
+        "--modes", nargs="+", default=[c for c, _ in MODES], choices=[c for c, _ in MODES]
+    )
+    args = parser.parse_args()
+
+    vectors = clustered_embeddings(args.size, args.dim)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, args.size, args.queries)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape, dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+    reflections = [make_reflection(i).model_dump() for i in range(args.size)]
+
+    print(
+        f"{'mode':>5} {'snapshot':>8} {'rerank':>6} {'index_B':>8} {'rss_B':>8}"
+        f" {'disk_B':>7} {'recall':>6} {'p50_ms':>7} {'p99_ms':>7}"
+    )
+    for compression, dtype in MODES:
+        if compression not in args.modes:
+            continue
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "reflection_db.json")
+            store = ReflectionStore(file_path, dtype=dtype)
+            store.compact(reflections, EmbeddingMatrix(vectors))
+            disk_bytes = os.path.getsize(store._embeddings_path(store.generation))
+
+            for factor in args.rerank_factors:
+                if compression == "none" and factor:
+                    continue
+                os.environ.update(
+                    REFLECTION_INDEX_BACKEND=args.backend,
+                    REFLECTION_EMBEDDING_COMPRESSION=compression,
+                    REFLECTION_RERANK_FACTOR=str(factor),
+                    REFLECTION_SNAPSHOT_DTYPE=dtype,
+                    REFLECTION_CAPACITY="0",
+                )
+                with multiprocessing.get_context("spawn").Pool(1) as pool:
+                    r = pool.apply(
+                        measure, (file_path, args.dim, queries, truth, args.k)
+                    )
+                print(
+                    f"{compression:>5} {dtype:>8} {factor:>6} {r['index_bytes']:>8.0f}"
+                    f" {r['rss_bytes']:>8.0f} {disk_bytes / args.size:>7.0f}"
+                    f" {r['recall']:>6.3f} {r['p50_ms']:>7.3f} {r['p99_ms']:>7.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import time
+
+from benchmarks.utils import make_reflection
+from common.local_embeddings import HashedNGramEmbeddings
+
+
+def throughput(embed, texts: list[str], batch_size: int, min_seconds: float) -> float:
+    # 최소 min_seconds 동안 배치를 반복해 초당 임베딩 수를 구한다
+    embed(texts[:batch_size])  # 프로세스 풀 기동 등 첫 호출 비용 제외
+    done, i = 0, 0
+    start = time.perf_counter()
+    while True:
+        offset = (i * batch_size) % (len(texts) - batch_size + 1)
+        embed(texts[offset : offset + batch_size])
+        done += batch_size
+        i += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            return done / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 n-gram 해싱 임베딩의 배치 크기별 처리량을 측정합니다")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument(
+        "--batch-sizes", nargs="+", type=int, default=[1, 4, 16, 64, 256, 1024]
+    )
+    parser.add_argument(
+        "--workers", nargs="+", type=int, default=sorted({1, os.cpu_count() or 1}),
+        help="비교할 프로세스 수 (1이면 현재 프로세스에서만 계산)",
+    )
+    parser.add_argument("--seconds", type=float, default=2.0, help="설정마다 측정할 최소 시간")
+    args = parser.parse_args()
+
+    # 실제 리플렉션 저장·검색과 같은 형태의 텍스트 (태스크 + 교훈)
+    texts = []
+    for i in range(max(args.batch_sizes) * 4):
+        reflection = make_reflection(i)
+        texts.append(f"{reflection.task}\n{reflection.reflection}")
+
+    print(
+        f"{args.dim}차원, 텍스트 평균 {sum(map(len, texts)) / len(texts):.0f}자,"
+        f" CPU {os.cpu_count()}개 (초당 임베딩 수)"
+    )
+    # documents: langchain 인터페이스(embed_documents, list[list[float]] 반환)
+    # matrix: embed_matrix(float32 행렬 반환, list 변환 비용 없음)
+    models = [HashedNGramEmbeddings(dim=args.dim, workers=w) for w in args.workers]
+    print(
+        f"{'batch':>6} {'documents':>10}"
+        + "".join(f" {f'matrix/w={w}':>12}" for w in args.workers)
+    )
+    for batch_size in args.batch_sizes:
+        row = [throughput(models[0].embed_documents, texts, batch_size, args.seconds)]
+        row += [throughput(model.embed_matrix, texts, batch_size, args.seconds) for model in models]
+        print(f"{batch_size:>6} {row[0]:>10.0f}" + "".join(f" {value:>12.0f}" for value in row[1:]))
+    for model in models:
+        model.close()
+
+
+if __name__ == "__main__":
+    main()
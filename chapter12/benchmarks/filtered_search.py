@@ -0,0 +1,113 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from benchmarks.utils import clustered_embeddings, make_reflection, percentiles
+from common.reflection_filter import ReflectionFilter
+from common.reflection_manager import ReflectionManager, StoredReflection
+from common.reflection_store import EmbeddingMatrix, ReflectionStore
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+# (이름, 필터) — make_reflection의 판정 분포와 pattern-{i % 100}에서의 선택도를 함께 표시한다
+FILTERS = [
+    ("confidence>=0.5 (50%)", ReflectionFilter(min_confidence=0.5)),
+    ("needs_retry (20%)", ReflectionFilter(needs_retry=True)),
+    ("confidence>=0.9 (10%)", ReflectionFilter(min_confidence=0.9)),
+    ("pattern (1%)", ReflectionFilter(patterns=["pattern-7"])),
+]
+
+
+def seed(file_path: str, vectors: np.ndarray) -> None:
+    reflections = [
+        StoredReflection(
+            **make_reflection(i).model_dump(), pattern=f"pattern-{i % 100}"
+        ).model_dump()
+        for i in range(len(vectors))
+    ]
+    ReflectionStore(file_path).compact(reflections, EmbeddingMatrix(vectors))
+
+
+def over_fetch(
+    manager: ReflectionManager, query: np.ndarray, k: int, filter: ReflectionFilter, factor: int
+) -> list[StoredReflection]:
+    # 변경 전 방식: k * factor개를 가져와 파이썬에서 조건을 검사한다
+    _, I = manager.index.search(query[None, :], k * factor)
+    results = []
+    for i in I[0]:
+        if i < 0:
+            continue
+        r = manager.reflections[manager.row_ids[i]]
+        if (
+            (filter.needs_retry is None or r.judgment.needs_retry == filter.needs_retry)
+            and (filter.min_confidence is None or r.judgment.confidence >= filter.min_confidence)
+            and (filter.patterns is None or r.pattern in filter.patterns)
+        ):
+            results.append(r)
+            if len(results) == k:
+                break
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="인덱스 내부 필터(IDSelector)와 over-fetch 후 필터링의 지연·재현율을 비교합니다"
+    )
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--factor", type=int, default=10, help="over-fetch 배수")
+    args = parser.parse_args()
+
+    vectors = clustered_embeddings(args.size, args.dim)
+    # 저장된 리플렉션과 비슷한 주제의 쿼리: 임의의 저장 벡터에 잡음을 더한다
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, args.size, args.queries)]
+    queries = queries + 0.1 * rng.standard_normal(queries.shape, dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "reflection_db.json")
+        seed(file_path, vectors)
+        manager = ReflectionManager(
+            file_path=file_path, embeddings=DeterministicFakeEmbedding(size=args.dim)
+        )
+
+        print(
+            f"{'filter':>22} {'method':>10} {'p50_ms':>8} {'p99_ms':>8} {'filled':>7} {'recall':>7}"
+        )
+        for name, filter in FILTERS:
+            # 정답: 조건을 만족하는 벡터만 대상으로 한 정확한 최근접 이웃
+            mask = manager.columns.mask(filter)
+            candidates = np.flatnonzero(mask)
+            exact = [
+                set(
+                    candidates[
+                        np.argsort(((vectors[candidates] - q) ** 2).sum(axis=1))[: args.k]
+                    ]
+                )
+                for q in queries
+            ]
+            for method in ("selector", "over-fetch"):
+                samples, filled, hits = [], 0, 0
+                for q, truth in zip(queries, exact):
+                    start = time.perf_counter()
+                    if method == "selector":
+                        results = manager._search([q], args.k, filter)[0]
+                    else:
+                        results = over_fetch(manager, q, args.k, filter, args.factor)
+                    samples.append(time.perf_counter() - start)
+                    filled += len(results)
+                    hits += len(truth & {manager.rows[r.id] for r in results})
+                stats = percentiles(samples)
+                total = args.k * len(queries)
+                print(
+                    f"{name:>22} {method:>10} {stats['p50_ms']:>8.3f} {stats['p99_ms']:>8.3f}"
+                    f" {filled / total:>7.2f} {hits / total:>7.2f}"
+                )
+        manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+# 같은 요청을 여러 표현으로 입력한 쿼리 묶음. 재료·지역만 다른 이웃 의도(카레/하이라이스, 서울/부산 등)를
+# 함께 넣어 유사도 임계값이 낮을 때 다른 의도의 목표를 잘못 재사용하는지 확인한다
+INTENTS = [
+    [
+        "카레라이스 만드는 법",
+        "카레라이스 만드는 방법 알려줘",
+        "집에서 카레라이스 만드는 법",
+        "카레라이스는 어떻게 만들어?",
+        "카레라이스 레시피 알려줘",
+    ],
+    [
+        "하이라이스 만드는 법",
+        "하이라이스 만드는 방법 알려줘",
+        "집에서 하이라이스 만드는 법",
+        "하이라이스 레시피 알려줘",
+    ],
+    [
+        "서울 2박 3일 여행 일정 추천",
+        "서울 2박3일 여행 코스 짜줘",
+        "2박 3일 서울 여행 계획 추천해줘",
+        "서울 여행 2박 3일 일정표 만들어줘",
+    ],
+    [
+        "부산 2박 3일 여행 일정 추천",
+        "부산 2박3일 여행 코스 짜줘",
+        "2박 3일 부산 여행 계획 추천해줘",
+    ],
+    [
+        "파이썬 비동기 프로그래밍 입문",
+        "파이썬 asyncio로 비동기 프로그래밍 배우기",
+        "파이썬 비동기 프로그래밍 기초 알려줘",
+    ],
+    [
+        "전기차와 하이브리드차 비교",
+        "전기차랑 하이브리드차 중 뭐가 나아?",
+        "전기차 하이브리드차 장단점 비교해줘",
+    ],
+    [
+        "초보자를 위한 주식 투자 방법",
+        "주식 투자 처음 시작하는 방법",
+        "주식 초보가 투자 시작하는 법 알려줘",
+    ],
+    [
+        "재택근무 생산성 높이는 법",
+        "재택근무할 때 생산성을 높이는 방법",
+        "재택근무 집중력 올리는 팁",
+    ],
+    [
+        "강아지 분리불안 해결 방법",
+        "강아지 분리불안 고치는 법",
+        "반려견 분리불안 어떻게 해결해?",
+    ],
+    [
+        "마라톤 풀코스 훈련 계획",
+        "풀코스 마라톤 준비 훈련 계획 짜줘",
+        "마라톤 풀코스 완주를 위한 훈련 일정",
+    ],
+    [
+        "전세와 월세 장단점 비교",
+        "전세랑 월세 중 어떤 게 유리해?",
+        "전세 월세 장단점 비교해줘",
+    ],
+    [
+        "불면증 개선하는 생활 습관",
+        "불면증 고치는 생활 습관 알려줘",
+        "잠이 안 올 때 개선할 생활 습관",
+    ],
+]
+
+
+def make_query_log(size: int, seed: int = 0) -> list[tuple[int, str]]:
+    # 자주 들어오는 요청과 드문 요청이 섞이도록 의도를 Zipf 분포로 고르고, 표현은 균등하게 고른다
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(INTENTS))]
+    log = []
+    for _ in range(size):
+        intent = rng.choices(range(len(INTENTS)), weights=weights)[0]
+        log.append((intent, rng.choice(INTENTS[intent])))
+    return log
+
+
+def replay(log: list[tuple[int, str]], min_similarity: float, tmp_dir: str, args) -> dict:
+    from benchmarks.llm_cache import SchemaFakeChatModel, _counter
+    from common.goal_cache import SemanticGoalCache
+    from common.goal_setting import GoalSetter
+    from common.local_embeddings import HashedNGramEmbeddings
+
+    for key in _counter:
+        _counter[key] = 0
+    cache = SemanticGoalCache(
+        os.path.join(tmp_dir, f"goal_cache_{min_similarity}.sqlite3"),
+        embeddings=HashedNGramEmbeddings(dim=768, ngram_range=(2, 4)),
+        model="local-768-2-4",
+        min_similarity=min_similarity,
+    )
+    llm = SchemaFakeChatModel(ttft=args.ttft, tokens_per_second=args.tokens_per_second)
+    setter = GoalSetter(llm=llm, cache=cache)
+    # 캐시에 추가된 목표 정의가 어느 의도의 것인지 기록해 두고, 적중한 정의의 의도와 비교한다
+    intent_of: dict[str, int] = {}
+    hit_ms, miss_ms, false_hits = [], [], 0
+    start = time.perf_counter()
+    for intent, query in log:
+        calls = _counter["calls"]
+        t0 = time.perf_counter()
+        definition = setter.run(query).model_dump_json()
+        elapsed = time.perf_counter() - t0
+        if _counter["calls"] > calls:
+            miss_ms.append(elapsed * 1000)
+            intent_of[definition] = intent
+        else:
+            hit_ms.append(elapsed * 1000)
+            false_hits += intent_of[definition] != intent
+    wall = time.perf_counter() - start
+    stats = cache.stats()
+    cache.close()
+    return {
+        "wall_s": wall,
+        "llm_calls": _counter["calls"],
+        "hit_rate": stats["hit_rate"],
+        "exact_hits": stats["exact_hits"],
+        "false_hits": false_hits,
+        "hit_ms": statistics.median(hit_ms) if hit_ms else 0.0,
+        "miss_ms": statistics.mean(miss_ms) if miss_ms else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="바꿔 말한 쿼리가 섞인 요청 로그를 재생해 목표 설정 의미 기반 캐시의 적중률과 절약된 지연을 측정합니다"
+    )
+    parser.add_argument("--queries", type=int, default=60, help="재생할 요청 수")
+    parser.add_argument(
+        "--min-similarity", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.8, 0.9],
+        help="비교할 코사인 유사도 임계값",
+    )
+    parser.add_argument("--ttft", type=float, default=0.4, help="LLM 첫 토큰까지의 지연(초)")
+    parser.add_argument("--tokens-per-second", type=float, default=300.0, help="LLM 출력 속도")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    log = make_query_log(args.queries, seed=args.seed)
+    distinct = len({query for _, query in log})
+    print(
+        f"요청 {len(log)}개 (서로 다른 표현 {distinct}개, 의도 {len({i for i, _ in log})}개),"
+        f" 로컬 n-gram 임베딩, 가짜 LLM: 첫 토큰 {args.ttft * 1000:.0f}ms + 출력 {args.tokens_per_second:.0f} tok/s"
+    )
+    print(
+        f"{'min_sim':>7} {'hit_rate':>8} {'exact':>5} {'false':>5} {'llm':>4} {'wall_s':>7}"
+        f" {'no_cache_s':>10} {'saved_s':>7} {'hit_ms':>7} {'miss_ms':>7}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for min_similarity in args.min_similarity:
+            r = replay(log, min_similarity, tmp_dir, args)
+            # 캐시가 없으면 모든 요청이 적중하지 않은 요청과 같은 시간이 걸린다
+            no_cache = r["miss_ms"] * len(log) / 1000
+            print(
+                f"{min_similarity:>7.2f} {r['hit_rate']:>8.2f} {r['exact_hits']:>5} {r['false_hits']:>5}"
+                f" {r['llm_calls']:>4} {r['wall_s']:>7.1f} {no_cache:>10.1f} {no_cache - r['wall_s']:>7.1f}"
+                f" {r['hit_ms']:>7.2f} {r['miss_ms']:>7.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import argparse
+import logging
+import os
+import statistics
+import time
+
+# ResponseOptimizer가 응답 정의에 넣도록 지시받는 항목
+SECTIONS = ["목표 분석", "응답 사양", "AI 에이전트에 대한 지침", "응답 예시", "평가 기준"]
+
+
+def cosine(a: list[float], b: list[float]) -> float:
+    import numpy as np
+
+    a, b = np.asarray(a), np.asarray(b)
+    return float(a @ b / (np.linalg.norm(a) * np.linalg.norm(b)))
+
+
+def run_mode(setter, query: str) -> dict:
+    from langchain_core.callbacks import get_usage_metadata_callback
+
+    with get_usage_metadata_callback() as callback:
+        start = time.perf_counter()
+        definition = setter.run(query)
+        elapsed = time.perf_counter() - start
+    usage = list(callback.usage_metadata.values())
+    return {
+        "definition": definition,
+        "latency_s": elapsed,
+        "input_tokens": sum(u["input_tokens"] for u in usage),
+        "output_tokens": sum(u["output_tokens"] for u in usage),
+        "sections": sum(s in definition.response_definition for s in SECTIONS) / len(SECTIONS),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="고정된 쿼리 집합에서 목표 설정의 staged(LLM 호출 3회)와 fused(1회) 출력을 비교하고 지연·토큰 사용량을 측정합니다"
+    )
+    parser.add_argument(
+        "--model", default="fake",
+        help="fake(오프라인 가짜 모델) 또는 OpenAI 모델 이름 (OPENAI_API_KEY 필요)",
+    )
+    parser.add_argument("--queries", type=int, default=0, help="사용할 쿼리 수 (0이면 전체)")
+    parser.add_argument("--ttft", type=float, default=0.4, help="가짜 모델의 첫 토큰까지의 지연(초)")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="가짜 모델의 출력 속도")
+    args = parser.parse_args()
+
+    if args.model == "fake":
+        # 가짜 모델의 출력끼리는 의미가 없으므로 유사도도 오프라인 임베딩으로만 계산한다
+        os.environ["EMBEDDING_PROVIDER"] = "local"
+    os.environ["LLM_CACHE_PATH"] = ""
+    logging.disable(logging.INFO)
+
+    from benchmarks.goal_cache import INTENTS
+    from benchmarks.llm_cache import SchemaFakeChatModel
+    from common.goal_setting import GoalSetter
+    from common.reflection_manager import create_embeddings
+    from langchain_openai import ChatOpenAI
+
+    if args.model == "fake":
+        # fused의 응답 정의를 staged의 ResponseOptimizer 자유 형식 응답과 같은 길이로 만든다
+        llm = SchemaFakeChatModel(
+            ttft=args.ttft,
+            tokens_per_second=args.tokens_per_second,
+            long_fields=("response_definition",),
+        )
+        print(
+            f"가짜 모델: 첫 토큰 {args.ttft * 1000:.0f}ms + 출력 {args.tokens_per_second:.0f} tok/s"
+            " (토큰은 UTF-8 4바이트당 1토큰으로 추정, 출력 유사도는 의미 없음)"
+        )
+    else:
+        llm = ChatOpenAI(model=args.model, temperature=0.0)
+        print(f"모델: {args.model}")
+    embeddings = create_embeddings()
+    queries = [phrasings[0] for phrasings in INTENTS]
+    if args.queries:
+        queries = queries[: args.queries]
+
+    setters = {mode: GoalSetter(llm=llm, mode=mode) for mode in ("staged", "fused")}
+    results = {mode: [] for mode in setters}
+    goal_similarity, response_similarity = [], []
+    print(
+        f"{'#':>2} {'staged_s':>8} {'fused_s':>7} {'staged_tok':>10} {'fused_tok':>9}"
+        f" {'sim_goal':>8} {'sim_resp':>8}  query"
+    )
+    for i, query in enumerate(queries):
+        staged = run_mode(setters["staged"], query)
+        fused = run_mode(setters["fused"], query)
+        results["staged"].append(staged)
+        results["fused"].append(fused)
+        vectors = embeddings.embed_documents(
+            [
+                staged["definition"].optimized_goal.text,
+                fused["definition"].optimized_goal.text,
+                staged["definition"].response_definition,
+                fused["definition"].response_definition,
+            ]
+        )
+        goal_similarity.append(cosine(vectors[0], vectors[1]))
+        response_similarity.append(cosine(vectors[2], vectors[3]))
+        print(
+            f"{i:>2} {staged['latency_s']:>8.2f} {fused['latency_s']:>7.2f}"
+            f" {staged['input_tokens'] + staged['output_tokens']:>10}"
+            f" {fused['input_tokens'] + fused['output_tokens']:>9}"
+            f" {goal_similarity[-1]:>8.2f} {response_similarity[-1]:>8.2f}  {query}"
+        )
+
+    print()
+    print(
+        f"{'mode':>6} {'calls':>5} {'p50_s':>6} {'mean_s':>6} {'in_tok':>7} {'out_tok':>7} {'sections':>8}"
+    )
+    for mode, runs in results.items():
+        print(
+            f"{mode:>6} {3 if mode == 'staged' else 1:>5}"
+            f" {statistics.median(r['latency_s'] for r in runs):>6.2f}"
+            f" {statistics.mean(r['latency_s'] for r in runs):>6.2f}"
+            f" {statistics.mean(r['input_tokens'] for r in runs):>7.0f}"
+            f" {statistics.mean(r['output_tokens'] for r in runs):>7.0f}"
+            f" {statistics.mean(r['sections'] for r in runs):>8.2f}"
+        )
+    print(
+        f"staged 대비 fused 출력 유사도 (코사인): 최적화된 목표 평균 {statistics.mean(goal_similarity):.2f}"
+        f" (최소 {min(goal_similarity):.2f}), 응답 정의 평균 {statistics.mean(response_similarity):.2f}"
+        f" (최소 {min(response_similarity):.2f})"
+    )
+
+
+if __name__ == "__main__":
+    main()
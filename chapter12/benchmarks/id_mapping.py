@@ -0,0 +1,66 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+from benchmarks.utils import percentiles, seed_snapshot_db
+from common.reflection_manager import ReflectionManager
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def legacy_mapping(manager: ReflectionManager, I: np.ndarray) -> list:
+    # 변경 전 방식: 검색마다 전체 ID 목록을 만들고 faiss 행 순서와 dict 순서가 같다고 가정한다
+    reflection_ids = list(manager.reflections.keys())
+    return [manager.reflections[reflection_ids[i]] for i in I[0] if i < len(reflection_ids)]
+
+
+def id_mapping(manager: ReflectionManager, I: np.ndarray) -> list:
+    return [
+        manager.reflections[manager.row_ids[i]]
+        for i in I[0]
+        if i >= 0 and manager.row_ids[i] is not None
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="검색 결과를 리플렉션으로 변환하는 ID 매핑 오버헤드를 측정합니다"
+    )
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "reflection_db.json")
+        seed_snapshot_db(file_path, args.size, args.dim)
+        manager = ReflectionManager(
+            file_path=file_path, embeddings=DeterministicFakeEmbedding(size=args.dim)
+        )
+        queries = np.random.default_rng(1).standard_normal(
+            (args.queries, args.dim), dtype=np.float32
+        )
+        results = {"search": [], "legacy_mapping": [], "id_mapping": []}
+        for query in queries:
+            start = time.perf_counter()
+            _, I = manager.index.search(query[None, :], args.k)
+            results["search"].append(time.perf_counter() - start)
+            for name, mapping in (
+                ("legacy_mapping", legacy_mapping),
+                ("id_mapping", id_mapping),
+            ):
+                start = time.perf_counter()
+                mapping(manager, I)
+                results[name].append(time.perf_counter() - start)
+
+    print(f"size={args.size} dim={args.dim} backend={manager.index.backend}")
+    print(f"{'step':>15} {'p50_ms':>9} {'p99_ms':>9}")
+    for name, samples in results.items():
+        stats = percentiles(samples)
+        print(f"{name:>15} {stats['p50_ms']:>9.4f} {stats['p99_ms']:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
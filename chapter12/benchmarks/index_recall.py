@@ -0,0 +1,90 @@
+import argparse
+import time
+
+import faiss
+import numpy as np
+from benchmarks.utils import clustered_embeddings, percentiles
+from common.reflection_index import ReflectionIndex
+
+# 백엔드별로 검색 시점에 조정하는 파라미터와 그 후보 값
+SWEEPS = {
+    "flat": (None, [None]),
+    "hnsw": ("efSearch", [16, 32, 64, 128, 256]),
+    "ivf_flat": ("nprobe", [1, 4, 16, 64]),
+    "ivf_pq": ("nprobe", [1, 4, 16, 64]),
+}
+
+
+def set_search_param(index: ReflectionIndex, name: str, value: int) -> None:
+    if name == "efSearch":
+        index.hnsw_ef_search = value
+        index.inner.hnsw.efSearch = value
+    elif name == "nprobe":
+        index.inner.nprobe = min(value, index.inner.nlist)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(
+        np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="리플렉션 인덱스 백엔드별 recall@k와 검색 지연 시간을 flat 기준과 비교합니다"
+    )
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument(
+        "--backends", nargs="+", default=list(SWEEPS), choices=list(SWEEPS)
+    )
+    args = parser.parse_args()
+
+    data = clustered_embeddings(args.size + args.queries, args.dim)
+    vectors, queries = data[: args.size], data[args.size :]
+    exact = faiss.IndexFlatL2(args.dim)
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    print(
+        f"{'backend':>9} {'param':>12} {'build_s':>8} {'recall@' + str(args.k):>9} "
+        f"{'p50_ms':>8} {'p99_ms':>8}"
+    )
+    for backend in args.backends:
+        index = ReflectionIndex(
+            backend=backend,
+            promotion_threshold=0,
+            hnsw_m=args.hnsw_m,
+            pq_m=args.pq_m,
+        )
+        start = time.perf_counter()
+        index.add(vectors, np.arange(len(vectors)))
+        build_s = time.perf_counter() - start
+
+        param_name, values = SWEEPS[backend]
+        for value in values:
+            if param_name:
+                set_search_param(index, param_name, value)
+            samples, found = [], []
+            # 에이전트는 한 번에 쿼리 하나씩 검색하므로 단건 검색 지연을 잰다
+            for query in queries:
+                start = time.perf_counter()
+                _, I = index.search(query[None, :], args.k)
+                samples.append(time.perf_counter() - start)
+                found.append(I[0])
+            stats = percentiles(samples)
+            label = f"{param_name}={value}" if param_name else "-"
+            print(
+                f"{backend:>9} {label:>12} {build_s:>8.2f} "
+                f"{recall_at_k(np.array(found), truth):>9.3f} "
+                f"{stats['p50_ms']:>8.3f} {stats['p99_ms']:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
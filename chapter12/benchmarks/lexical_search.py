@@ -0,0 +1,112 @@
+import argparse
+import os
+import tempfile
+import time
+import uuid
+
+import numpy as np
+from benchmarks.utils import percentiles
+from common.local_embeddings import HashedNGramEmbeddings
+from common.reflection_store import EmbeddingMatrix, ReflectionStore
+
+
+def make_corpus(n: int, vocabulary: int, seed: int = 0) -> list[tuple[str, str]]:
+    # 한글 음절 2~4개짜리 가짜 단어를 Zipf 분포로 뽑아 (태스크, 교훈) 텍스트를 만든다
+    rng = np.random.default_rng(seed)
+    words = [
+        "".join(chr(0xAC00 + c) for c in rng.integers(0, 11172, rng.integers(2, 5)))
+        for _ in range(vocabulary)
+    ]
+    weights = 1 / np.arange(1, vocabulary + 1)
+    weights /= weights.sum()
+    corpus = []
+    for _ in range(n):
+        task = rng.choice(vocabulary, rng.integers(6, 11), p=weights)
+        # 교훈은 태스크의 단어 일부를 다시 언급한다
+        lesson = np.concatenate(
+            [task[: len(task) // 2], rng.choice(vocabulary, rng.integers(15, 26), p=weights)]
+        )
+        corpus.append((" ".join(words[i] for i in task), " ".join(words[i] for i in lesson)))
+    return corpus
+
+
+def make_queries(corpus: list[tuple[str, str]], count: int, seed: int = 1) -> tuple[list[str], np.ndarray]:
+    # 저장된 태스크에서 단어 몇 개를 빼고 섞은 질의. 원래 행을 정답으로 삼는다
+    rng = np.random.default_rng(seed)
+    rows = rng.integers(0, len(corpus), count)
+    queries = []
+    for row in rows:
+        words = corpus[row][0].split()
+        keep = rng.permutation(len(words))[: max(2, len(words) - 2)]
+        queries.append(" ".join(words[i] for i in keep))
+    return queries, rows
+
+
+def measure(manager, queries: list[str], answers: np.ndarray, k: int, mode: str) -> dict:
+    samples, hits = [], 0
+    for query, answer in zip(queries, answers):
+        start = time.perf_counter()
+        results = manager.get_relevant_reflections(query, k, mode=mode)
+        samples.append(time.perf_counter() - start)
+        hits += any(manager.rows.get(r.id) == answer for r in results)
+    return {**percentiles(samples), "hit_rate": hits / len(queries)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="BM25(lexical)·hybrid 리플렉션 검색과 임베딩 검색의 지연과 적중률을 비교합니다"
+    )
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--backend", default="hnsw", choices=["flat", "hnsw", "ivf_flat"])
+    args = parser.parse_args()
+
+    os.environ.update(
+        REFLECTION_INDEX_BACKEND=args.backend,
+        REFLECTION_CAPACITY="0",
+        REFLECTION_MERGE_DISTANCE="0",
+        REFLECTION_LOG_COMPACT_THRESHOLD="0",
+    )
+    from common.reflection_manager import ReflectionJudgment, ReflectionManager, StoredReflection
+
+    embeddings = HashedNGramEmbeddings(dim=args.dim)
+    corpus = make_corpus(args.size, args.vocabulary)
+    queries, answers = make_queries(corpus, args.queries)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "reflection_db.json")
+        # save_reflection과 같이 교훈(reflection) 텍스트를 임베딩해 스냅샷으로 저장한다
+        items = [
+            StoredReflection(
+                id=str(uuid.uuid4()),
+                task=task,
+                reflection=lesson,
+                judgment=ReflectionJudgment(needs_retry=False, confidence=0.5, reasons=[]),
+            ).model_dump()
+            for task, lesson in corpus
+        ]
+        vectors = embeddings.embed_matrix([lesson for _, lesson in corpus])
+        ReflectionStore(file_path).compact(items, EmbeddingMatrix(vectors))
+        manager = ReflectionManager(file_path=file_path, embeddings=embeddings)
+
+        start = time.perf_counter()
+        manager.get_relevant_reflections(queries[0], args.k, mode="lexical")
+        build_s = time.perf_counter() - start
+        print(
+            f"리플렉션 {args.size}개, {args.dim}차원 로컬 임베딩, {args.backend},"
+            f" BM25 역색인 구축 {build_s:.2f}s (단어 {len(manager.lexical.terms)}개)"
+        )
+        print(f"{'mode':>8} {'p50_ms':>8} {'p99_ms':>8} {'max_ms':>8} {'hit@k':>6}")
+        for mode in ("vector", "lexical", "hybrid"):
+            r = measure(manager, queries, answers, args.k, mode)
+            print(
+                f"{mode:>8} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f} {r['max_ms']:>8.3f}"
+                f" {r['hit_rate']:>6.2f}"
+            )
+        manager.store.close()
+
+
+if __name__ == "__main__":
+    main()
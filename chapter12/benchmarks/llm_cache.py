@@ -0,0 +1,298 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import warnings
+from typing import Any, Optional
+
+from benchmarks.batch_reflection import estimate_tokens
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+TASK = "카레라이스 만드는 법"
+# run_and_report.sh처럼 동시에 실행해 같은 목표 설정 체인을 공유하는 진입점
+PARALLEL = [
+    "passive_goal_creator",
+    "prompt_optimizer",
+    "response_optimizer",
+    "single_path_plan_generation",
+    "multi_path_plan_generation",
+]
+
+_counter = {"calls": 0, "input_tokens": 0, "output_tokens": 0}
+_counter_lock = threading.Lock()
+
+
+def long_text(seed: str) -> str:
+    # 구조화 출력이 아닌 자유 형식 응답(ResponseOptimizer 등)의 길이
+    return f"응답 {seed}\n" + "정리된 내용 " * 150
+
+
+def fake_value(
+    schema: dict, defs: dict, name: str, seed: str, long_fields: tuple[str, ...] = ()
+) -> Any:
+    """JSON 스키마를 만족하는 값을 seed에 따라 결정적으로 만든다.
+
+    long_fields에 있는 이름의 문자열 필드는 자유 형식 응답만큼 길게 채운다.
+    """
+    if "$ref" in schema:
+        return fake_value(defs[schema["$ref"].split("/")[-1]], defs, name, seed, long_fields)
+    for key in ("anyOf", "allOf"):
+        if key in schema:
+            options = [s for s in schema[key] if s.get("type") != "null"]
+            return fake_value(options[0], defs, name, seed, long_fields)
+    kind = schema.get("type")
+    if kind == "object":
+        return {
+            key: fake_value(value, defs, key, seed, long_fields)
+            for key, value in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        count = max(schema.get("minItems", 1), min(3, schema.get("maxItems", 3)))
+        return [
+            fake_value(schema["items"], defs, name, f"{seed}-{i}", long_fields)
+            for i in range(count)
+        ]
+    if kind == "integer":
+        return 1
+    if kind == "number":
+        return 0.9
+    if kind == "boolean":
+        return False
+    if name in long_fields:
+        return long_text(seed)
+    return f"{name} {seed} " + "세부 내용 " * 20
+
+
+class SchemaFakeChatModel(BaseChatModel):
+    """도구 스키마로 구조화 출력을 만들고, 첫 토큰 지연 + 출력 토큰 수에 비례해 기다리는 가짜 모델."""
+
+    model: str = "fake-smart"
+    ttft: float = 0.4
+    tokens_per_second: float = 80.0
+    max_tokens: Optional[int] = None
+    # 자유 형식 응답만큼 길게 채울 구조화 출력 필드 이름
+    long_fields: tuple[str, ...] = ()
+
+    @property
+    def _llm_type(self) -> str:
+        return "schema-fake"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": self.model, "max_tokens": self.max_tokens}
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        return self.bind(
+            tools=[convert_to_openai_tool(tool) for tool in tools],
+            tool_choice=tool_choice,
+            **kwargs,
+        )
+
+    def with_structured_output(self, schema, *, include_raw: bool = False, **kwargs):
+        # ChatOpenAI 전용 인자(strict 등)는 무시한다
+        return super().with_structured_output(schema, include_raw=include_raw)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        seed = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        tools = kwargs.get("tools")
+        if tools and kwargs.get("tool_choice"):
+            function = tools[0]["function"]
+            parameters = function["parameters"]
+            args = fake_value(
+                parameters, parameters.get("$defs", {}), function["name"], seed, self.long_fields
+            )
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": function["name"], "args": args, "id": f"call_{seed}"}],
+            )
+            output = str(args)
+        elif self.max_tokens == 1:
+            message = AIMessage(content="1")
+            output = "1"
+        else:
+            output = long_text(seed)
+            message = AIMessage(content=output)
+        tokens = estimate_tokens(output)
+        # 바인딩된 도구 스키마도 입력 토큰에 포함된다
+        input_tokens = estimate_tokens(prompt + json.dumps(tools or [], ensure_ascii=False))
+        # 실제 모델처럼 사용량을 남겨 UsageMetadataCallbackHandler로 집계할 수 있게 한다
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": tokens,
+            "total_tokens": input_tokens + tokens,
+        }
+        message.response_metadata = {"model_name": self.model}
+        time.sleep(self.ttft + tokens / self.tokens_per_second)
+        with _counter_lock:
+            _counter["calls"] += 1
+            _counter["input_tokens"] += input_tokens
+            _counter["output_tokens"] += tokens
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def run_entry_point(name: str, tmp_dir: str) -> None:
+    # 각 진입점의 main과 같은 컴포넌트 조합을 가짜 모델로 실행한다
+    llm = SchemaFakeChatModel()
+    if name == "passive_goal_creator":
+        from passive_goal_creator.main import PassiveGoalCreator
+
+        PassiveGoalCreator(llm=llm).run(query=TASK)
+    elif name == "prompt_optimizer":
+        from passive_goal_creator.main import PassiveGoalCreator
+        from prompt_optimizer.main import PromptOptimizer
+
+        goal = PassiveGoalCreator(llm=llm).run(query=TASK)
+        PromptOptimizer(llm=llm).run(query=goal.text)
+    elif name == "response_optimizer":
+        from passive_goal_creator.main import PassiveGoalCreator
+        from prompt_optimizer.main import PromptOptimizer
+        from response_optimizer.main import ResponseOptimizer
+
+        goal = PassiveGoalCreator(llm=llm).run(query=TASK)
+        optimized_goal = PromptOptimizer(llm=llm).run(query=goal.text)
+        ResponseOptimizer(llm=llm).run(query=optimized_goal.text)
+    elif name == "single_path_plan_generation":
+        from single_path_plan_generation.main import SinglePathPlanGeneration
+
+        SinglePathPlanGeneration(llm=llm).run(TASK)
+    elif name == "multi_path_plan_generation":
+        from multi_path_plan_generation.main import MultiPathPlanGeneration
+
+        MultiPathPlanGeneration(llm=llm).run(query=TASK)
+    elif name == "role_based_cooperation":
+        from role_based_cooperation.main import RoleBasedCooperation
+
+        RoleBasedCooperation(llm=llm).run(query=TASK)
+    elif name in ("self_reflection", "cross_reflection"):
+        from common.reflection_manager import ReflectionManager, TaskReflector
+        from self_reflection.main import ReflectiveAgent
+
+        # 실행마다 빈 리플렉션 DB를 쓴다. 앞선 실행의 리플렉션이 남아 있으면 검색 결과가 프롬프트에
+        # 들어가 내용이 달라지므로 캐시에 적중하지 않는다
+        manager = ReflectionManager(
+            file_path=os.path.join(tempfile.mkdtemp(dir=tmp_dir), f"{name}_db.json")
+        )
+        # cross_reflection은 다른 모델(main에서는 Anthropic)이 성찰한다
+        reflector_llm = llm if name == "self_reflection" else SchemaFakeChatModel(model="fake-other")
+        reflector = TaskReflector(llm=reflector_llm, reflection_manager=manager, pattern=name)
+        ReflectiveAgent(llm=llm, reflection_manager=manager, task_reflector=reflector).run(TASK)
+        manager.close()
+    else:
+        raise ValueError(f"알 수 없는 진입점입니다: {name}")
+
+
+def measure(name: str, tmp_dir: str, start_at: float = 0.0) -> dict:
+    # 별도 프로세스에서 실행된다. start_at이 있으면 다른 프로세스와 동시에 시작한다
+    logging.disable(logging.INFO)
+    # 진입점 모듈을 임포트할 때 나오는 LangChain 지원 중단 경고는 표를 가리므로 끈다
+    warnings.simplefilter("ignore")
+    from common.llm_cache import install_llm_cache
+
+    cache = install_llm_cache()
+    if start_at:
+        time.sleep(max(0.0, start_at - time.time()))
+    start = time.perf_counter()
+    # OptionPresenter 등이 출력하는 내용은 표를 가리므로 버린다
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_entry_point(name, tmp_dir)
+    elapsed = time.perf_counter() - start
+    stats = cache.stats() if cache is not None else {}
+    return {
+        "name": name,
+        "wall_s": elapsed,
+        **_counter,
+        "hits": stats.get("hits", 0),
+        "coalesced": stats.get("coalesced", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="LLM 응답 캐시가 비었을 때(cold)와 채워졌을 때(warm) 진입점별 실행 시간을 비교합니다"
+    )
+    parser.add_argument(
+        "--entry-points",
+        nargs="+",
+        default=[
+            "passive_goal_creator",
+            "prompt_optimizer",
+            "response_optimizer",
+            "single_path_plan_generation",
+            "multi_path_plan_generation",
+            "role_based_cooperation",
+            "self_reflection",
+            "cross_reflection",
+        ],
+    )
+    args = parser.parse_args()
+
+    os.environ.update(
+        TAVILY_API_KEY=os.environ.get("TAVILY_API_KEY", "x"),
+        EMBEDDING_PROVIDER="local",
+        REFLECTION_SERVER_ENABLED="false",
+        # 가짜 모델은 잘못된 응답을 내지 않으므로 재시도 컴포넌트도 포함해 모든 호출의 재생을 측정한다
+        LLM_CACHE_BYPASS="[]",
+    )
+    context = multiprocessing.get_context("spawn")
+    fake = SchemaFakeChatModel()
+    print(
+        f"가짜 모델: 첫 토큰 {fake.ttft * 1000:.0f}ms + 출력 {fake.tokens_per_second:.0f} tok/s"
+        " (토큰은 UTF-8 4바이트당 1토큰으로 추정)"
+    )
+    print(
+        f"{'entry point':>28} {'cold_s':>7} {'calls':>5} {'out_tok':>7}"
+        f" {'warm_s':>7} {'calls':>5} {'hits':>5} {'speedup':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name in args.entry_points:
+            work_dir = os.path.join(tmp_dir, name)
+            os.makedirs(work_dir)
+            os.environ["LLM_CACHE_PATH"] = os.path.join(work_dir, "llm_cache.sqlite3")
+            runs = []
+            for _ in ("cold", "warm"):
+                with context.Pool(1) as pool:
+                    runs.append(pool.apply(measure, (name, work_dir)))
+            cold, warm = runs
+            print(
+                f"{name:>28} {cold['wall_s']:>7.2f} {cold['calls']:>5} {cold['output_tokens']:>7}"
+                f" {warm['wall_s']:>7.2f} {warm['calls']:>5} {warm['hits']:>5}"
+                f" {cold['wall_s'] / warm['wall_s']:>7.1f}x"
+            )
+
+        # run_and_report.sh처럼 여러 진입점을 동시에 실행한다. 빈 캐시에서 같은 프롬프트를 동시에
+        # 보내므로, 요청 합치기(coalescing)가 없으면 캐시가 있어도 각 프로세스가 모두 LLM을 부른다
+        print()
+        print(f"동시 실행 (빈 캐시): {', '.join(PARALLEL)}")
+        print(f"{'coalescing':>12} {'wall_s':>7} {'calls':>5} {'coalesced':>9}")
+        for coalescing in (False, True):
+            work_dir = os.path.join(tmp_dir, f"parallel-{coalescing}")
+            os.makedirs(work_dir)
+            os.environ.update(
+                LLM_CACHE_PATH=os.path.join(work_dir, "llm_cache.sqlite3"),
+                LLM_CACHE_INFLIGHT_TIMEOUT="120" if coalescing else "0",
+            )
+            start_at = time.time() + 5.0
+            with context.Pool(len(PARALLEL)) as pool:
+                results = pool.starmap(
+                    measure, [(name, work_dir, start_at) for name in PARALLEL]
+                )
+            print(
+                f"{'on' if coalescing else 'off':>12} {max(r['wall_s'] for r in results):>7.2f}"
+                f" {sum(r['calls'] for r in results):>5} {sum(r['coalesced'] for r in results):>9}"
+            )
+        os.environ.pop("LLM_CACHE_INFLIGHT_TIMEOUT")
+
+
+if __name__ == "__main__":
+    main()
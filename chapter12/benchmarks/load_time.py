@@ -0,0 +1,92 @@
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+from benchmarks.utils import current_rss_mb, seed_json_db, seed_snapshot_db
+from common.reflection_manager import Reflection, ReflectionManager
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def load_legacy(file_path: str) -> faiss.Index:
+    # 변경 전 load_reflections: JSON 전체를 파싱하고 리스트를 거쳐 faiss에 추가한다
+    reflections, embeddings_dict = {}, {}
+    with open(file_path, "r") as file:
+        for item in json.load(file):
+            reflection = Reflection(**item["reflection"])
+            reflections[reflection.id] = reflection
+            embeddings_dict[reflection.id] = item["embedding"]
+    embeddings = list(embeddings_dict.values())
+    index = faiss.IndexFlatL2(len(embeddings[0]))
+    index.add(np.array(embeddings).astype("float32"))
+    return index
+
+
+def load_snapshot(file_path: str, dim: int) -> ReflectionManager:
+    return ReflectionManager(
+        file_path=file_path, embeddings=DeterministicFakeEmbedding(size=dim)
+    )
+
+
+def measure(mode: str, file_path: str, dim: int) -> tuple[float, float]:
+    # 별도 프로세스에서 실행되어 RSS가 측정 간에 섞이지 않는다
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    if mode == "legacy":
+        loaded = load_legacy(file_path)
+    else:
+        loaded = load_snapshot(file_path, dim)
+    seconds = time.perf_counter() - start
+    # 로드된 객체가 살아 있는 동안 RSS를 잰다
+    rss_mb = current_rss_mb() - rss_before
+    del loaded
+    return seconds, rss_mb
+
+
+def run(mode: str, size: int, dim: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "reflection_db.json")
+        if mode == "legacy":
+            seed_json_db(file_path, size, dim)
+        else:
+            seed_snapshot_db(file_path, size, dim)
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            seconds, rss_mb = pool.apply(measure, (mode, file_path, dim))
+    return {"size": size, "mode": mode, "load_s": seconds, "rss_delta_mb": rss_mb}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="리플렉션 DB 크기에 따른 ReflectionManager 기동 시간을 측정합니다"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument(
+        "--legacy-max-size",
+        type=int,
+        default=100_000,
+        help="JSON 형식(변경 전)을 함께 측정할 최대 DB 크기",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.append(run("snapshot", size, args.dim))
+        if size <= args.legacy_max_size:
+            results.append(run("legacy", size, args.dim))
+
+    print(f"{'size':>9} {'mode':>9} {'load_s':>9} {'rss_mb':>9}")
+    for r in results:
+        print(
+            f"{r['size']:>9} {r['mode']:>9} {r['load_s']:>9.3f} {r['rss_delta_mb']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
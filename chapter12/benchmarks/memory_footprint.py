@@ -0,0 +1,108 @@
+import argparse
+import gc
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+
+import faiss
+import numpy as np
+from benchmarks.utils import current_rss_mb, make_reflection, random_embeddings
+from common.reflection_store import EmbeddingMatrix, ReflectionStore
+
+
+def load_materialized(file_path: str) -> tuple:
+    # 변경 전 표현: 리플렉션마다 pydantic 객체와 list[float] 임베딩을 두고 faiss에 한 벌 더 복사한다
+    from common.reflection_manager import StoredReflection
+
+    items, matrix = ReflectionStore(file_path).load()
+    reflections, embeddings_dict = {}, {}
+    for row, item in enumerate(items):
+        reflection = StoredReflection(**item)
+        reflections[reflection.id] = reflection
+        embeddings_dict[reflection.id] = matrix.row(row).tolist()
+    index = faiss.IndexFlatL2(matrix.dim)
+    index.add(np.array(list(embeddings_dict.values()), dtype="float32"))
+    return reflections, embeddings_dict, index
+
+
+def load_columnar(file_path: str, dim: int):
+    from common.reflection_manager import ReflectionManager
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    return ReflectionManager(file_path=file_path, embeddings=DeterministicFakeEmbedding(size=dim))
+
+
+def measure(mode: str, file_path: str, dim: int, n: int) -> dict:
+    # 별도 프로세스에서 실행되어 측정 간에 메모리가 섞이지 않는다
+    gc.collect()
+    rss_before = current_rss_mb()
+    tracemalloc.start()
+    loaded = load_materialized(file_path) if mode == "materialized" else load_columnar(file_path, dim)
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # tracemalloc은 faiss(C++)의 할당과 mmap된 스냅샷 행렬을 보지 못하므로 따로 더한다
+    index = loaded[2] if mode == "materialized" else loaded.index.index
+    native_bytes = faiss.serialize_index(index).nbytes if index is not None else 0
+    if mode == "columnar":
+        matrix = loaded.embedding_matrix
+        native_bytes += sum(chunk.nbytes for chunk in matrix.chunks() if chunk is matrix.base)
+    rss_mb = current_rss_mb() - rss_before
+
+    search_ms = None
+    if mode == "columnar":
+        # 검색 결과로 반환되는 k개만 객체로 만들어진다
+        queries = random_embeddings(100, dim, seed=1)
+        start = time.perf_counter()
+        for query in queries:
+            loaded._search([query], 3)
+        search_ms = (time.perf_counter() - start) / len(queries) * 1000
+        loaded.close()
+    return {
+        "python_bytes": traced / n,
+        "native_bytes": native_bytes / n,
+        "rss_bytes": rss_mb * 2**20 / n,
+        "search_ms": search_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="리플렉션 저장 표현(객체 기반 vs 열 배열)별 메모리 사용량을 tracemalloc으로 측정합니다"
+    )
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--backend", default="flat", choices=["flat", "hnsw", "ivf_flat", "ivf_pq"])
+    parser.add_argument(
+        "--modes", nargs="+", default=["materialized", "columnar"], choices=["materialized", "columnar"]
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "reflection_db.json")
+        vectors = EmbeddingMatrix(random_embeddings(args.size, args.dim))
+        ReflectionStore(file_path).compact(
+            [make_reflection(i).model_dump() for i in range(args.size)], vectors
+        )
+        del vectors
+        os.environ.update(REFLECTION_CAPACITY="0", REFLECTION_INDEX_BACKEND=args.backend)
+
+        print(f"리플렉션 {args.size}개, {args.dim}차원 (리플렉션당 바이트)")
+        print(
+            f"{'mode':>12} {'python_B':>9} {'native_B':>8} {'total_B':>8} {'rss_B':>8}"
+            f" {'search_ms':>9}"
+        )
+        for mode in args.modes:
+            with multiprocessing.get_context("spawn").Pool(1) as pool:
+                r = pool.apply(measure, (mode, file_path, args.dim, args.size))
+            search = f"{r['search_ms']:>9.3f}" if r["search_ms"] is not None else f"{'-':>9}"
+            print(
+                f"{mode:>12} {r['python_bytes']:>9.0f} {r['native_bytes']:>8.0f}"
+                f" {r['python_bytes'] + r['native_bytes']:>8.0f} {r['rss_bytes']:>8.0f}"
+                f" {search}"
+            )
+
+
+if __name__ == "__main__":
+    main()
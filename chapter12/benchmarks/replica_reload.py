@@ -0,0 +1,140 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+from benchmarks.utils import clustered_embeddings, make_reflection, percentiles
+from common.reflection_store import EmbeddingMatrix, ReflectionStore
+
+
+def writer(file_path: str, dim: int, interval: float, duration: float, batch: int, queue) -> None:
+    # 쓰기 프로세스: interval마다 리플렉션 batch개를 저장하고 새 스냅샷을 공개한다
+    from common.reflection_manager import ReflectionManager
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    manager = ReflectionManager(file_path=file_path, embeddings=DeterministicFakeEmbedding(size=dim))
+    queue.put("ready")
+    published = []
+    start = time.time()
+    i = 0
+    while time.time() - start < duration:
+        tick = time.time()
+        for _ in range(batch):
+            manager.save_reflection(make_reflection(10_000_000 + i))
+            i += 1
+        generation = manager.publish_snapshot()
+        published.append((generation, time.time(), time.time() - tick))
+        time.sleep(max(0.0, interval - (time.time() - tick)))
+    manager.store.close()
+    queue.put(published)
+
+
+def read_loop(replica, queries: np.ndarray, k: int, duration: float) -> tuple[list[float], list]:
+    samples, swaps = [], []
+    generation = replica.generation
+    end = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        replica._search([queries[i % len(queries)]], k)
+        samples.append(time.perf_counter() - start)
+        i += 1
+        if replica.generation != generation:
+            generation = replica.generation
+            swaps.append((generation, time.time()))
+    return samples, swaps
+
+
+def report(phase: str, samples: list[float], swaps: list) -> None:
+    stats = percentiles(samples)
+    print(
+        f"{phase:>14} {len(samples):>8} {stats['p50_ms']:>8.3f} {stats['p99_ms']:>8.3f}"
+        f" {stats['max_ms']:>8.3f} {len(swaps):>6}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="쓰기 프로세스가 스냅샷을 주기적으로 공개하는 동안 읽기 복제본의 검색 지연을 측정합니다"
+    )
+    parser.add_argument("--size", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--interval", type=float, default=1.0, help="스냅샷 공개 주기(초)")
+    parser.add_argument("--batch", type=int, default=10, help="공개마다 새로 저장할 리플렉션 수")
+    parser.add_argument("--poll", type=float, default=0.1, help="복제본의 manifest 확인 주기(초)")
+    parser.add_argument("--backend", default="hnsw", choices=["flat", "hnsw", "ivf_flat"])
+    args = parser.parse_args()
+
+    os.environ.update(
+        REFLECTION_INDEX_BACKEND=args.backend,
+        REFLECTION_CAPACITY="0",
+        REFLECTION_MERGE_DISTANCE="0",
+        REFLECTION_LOG_COMPACT_THRESHOLD="0",
+        REFLECTION_LOG_FSYNC="never",
+    )
+    from common.reflection_manager import ReflectionManager
+    from common.reflection_replica import ReflectionReplica
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    embeddings = DeterministicFakeEmbedding(size=args.dim)
+    vectors = clustered_embeddings(args.size, args.dim)
+    queries = vectors[np.random.default_rng(1).integers(0, args.size, 1000)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "reflection_db.json")
+        ReflectionStore(file_path).compact(
+            [make_reflection(i).model_dump() for i in range(args.size)], EmbeddingMatrix(vectors)
+        )
+        # 열 배열과 인덱스 체크포인트를 함께 담은 첫 세대를 공개한다
+        manager = ReflectionManager(file_path=file_path, embeddings=embeddings)
+        manager.publish_snapshot()
+        manager.store.close()
+        del manager
+
+        # 비교용으로 새 세대를 열지 않는 복제본도 둔다. 코어를 나눠 쓰는 쓰기 프로세스의 영향과
+        # 세대 교체 자체의 영향을 구분할 수 있다
+        frozen = ReflectionReplica(file_path=file_path, embeddings=embeddings, poll_interval=0)
+        print(f"리플렉션 {args.size}개, {args.dim}차원, {args.backend}, 공개 주기 {args.interval}s")
+        print(
+            f"{'phase':>14} {'queries':>8} {'p50_ms':>8} {'p99_ms':>8} {'max_ms':>8} {'swaps':>6}"
+        )
+        samples, _ = read_loop(frozen, queries, args.k, args.duration / 2)
+        report("idle", samples, [])
+
+        context = multiprocessing.get_context("spawn")
+        for phase in ("publish/frozen", "publish/reload"):
+            replica = frozen
+            if phase == "publish/reload":
+                replica = ReflectionReplica(
+                    file_path=file_path, embeddings=embeddings, poll_interval=args.poll
+                )
+            queue = context.Queue()
+            process = context.Process(
+                target=writer,
+                args=(file_path, args.dim, args.interval, args.duration, args.batch, queue),
+            )
+            process.start()
+            queue.get()  # 쓰기 프로세스가 매니저를 연 뒤부터 측정한다
+            samples, swaps = read_loop(replica, queries, args.k, args.duration)
+            published = queue.get()
+            process.join()
+            report(phase, samples, swaps)
+
+        published_at = {generation: at for generation, at, _ in published}
+        lags = [at - published_at[g] for g, at in swaps if g in published_at]
+        publish_s = [seconds for _, _, seconds in published]
+        print(
+            f"공개 {len(published)}회 (저장+공개 평균 {np.mean(publish_s):.3f}s),"
+            f" 복제본 교체 {len(swaps)}회, 공개→교체 지연 p50 {np.median(lags) * 1000:.0f}ms"
+            f" / max {max(lags) * 1000:.0f}ms, 최종 세대 {replica.generation}"
+            f" (리플렉션 {len(replica)}개)"
+        )
+        replica.close()
+        frozen.close()
+
+
+if __name__ == "__main__":
+    main()
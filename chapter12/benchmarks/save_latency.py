@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from benchmarks.utils import make_reflection, percentiles, seed_snapshot_db
+from common.reflection_manager import ReflectionManager
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def legacy_rewrite(manager: ReflectionManager) -> None:
+    # 변경 전 save_reflection의 영속화 방식: 매 저장마다 전체 DB를 indent=4로 다시 쓴다
+    with open(manager.file_path + ".legacy", "w", encoding="utf-8") as file:
+        json.dump(
+            [
+                {
+                    "reflection": reflection.model_dump(),
+                    "embedding": manager.embedding_matrix.row(i).tolist(),
+                }
+                for i, reflection in enumerate(manager.reflections.values())
+            ],
+            file,
+            ensure_ascii=False,
+            indent=4,
+        )
+
+
+def run(size: int, saves: int, dim: int, legacy: bool) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "reflection_db.json")
+        seed_snapshot_db(file_path, size, dim)
+        manager = ReflectionManager(
+            file_path=file_path, embeddings=DeterministicFakeEmbedding(size=dim)
+        )
+        samples = []
+        for i in range(saves):
+            reflection = make_reflection(size + i)
+            start = time.perf_counter()
+            manager.save_reflection(reflection)
+            if legacy:
+                legacy_rewrite(manager)
+            samples.append(time.perf_counter() - start)
+        manager.close()
+        return {"size": size, "mode": "legacy" if legacy else "log", **percentiles(samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="저장된 리플렉션 수에 따른 save_reflection 지연 시간을 측정합니다"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--saves", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument(
+        "--legacy-max-size",
+        type=int,
+        default=10_000,
+        help="전체 재기록 방식(변경 전)을 함께 측정할 최대 DB 크기",
+    )
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        results.append(run(size, args.saves, args.dim, legacy=False))
+        if size <= args.legacy_max_size:
+            results.append(run(size, max(1, args.saves // 10), args.dim, legacy=True))
+
+    print(f"{'size':>8} {'mode':>7} {'p50_ms':>9} {'p99_ms':>9} {'max_ms':>9}")
+    for r in results:
+        print(
+            f"{r['size']:>8} {r['mode']:>7} {r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['max_ms']:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
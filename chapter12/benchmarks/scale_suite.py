@@ -0,0 +1,221 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+
+import faiss
+import numpy as np
+from benchmarks.utils import (
+    current_rss_mb,
+    make_reflection,
+    percentiles,
+    random_embeddings,
+    seed_json_db,
+    seed_snapshot_db,
+)
+
+# legacy는 변경 전 구현(JSON 파일 전체 로드 + IndexFlatL2, 저장마다 파일 전체 재기록)이다.
+# 나머지는 현재 ReflectionManager의 reflection_index_backend 값이다
+BACKENDS = ["legacy", "flat", "hnsw", "ivf_flat", "ivf_pq"]
+
+
+def directory_mb(path: str) -> float:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    ) / 2**20
+
+
+def measure_legacy(file_path: str, dim: int, saves: int, queries: np.ndarray) -> dict:
+    from common.reflection_manager import Reflection
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    embeddings = DeterministicFakeEmbedding(size=dim)
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    # 변경 전 load_reflections: JSON 전체를 파싱해 리플렉션 객체를 만들고 IndexFlatL2에 넣는다
+    with open(file_path, "r", encoding="utf-8") as file:
+        items = json.load(file)
+    reflections = [Reflection(**item["reflection"]) for item in items]
+    index = faiss.IndexFlatL2(dim)
+    index.add(np.array([item["embedding"] for item in items], dtype="float32"))
+    load_s = time.perf_counter() - start
+    rss_mb = current_rss_mb() - rss_before
+
+    save_samples = []
+    for i in range(saves):
+        reflection = make_reflection(len(items) + i)
+        start = time.perf_counter()
+        # 변경 전 save_reflection: 임베딩하고 인덱스에 넣은 뒤 DB 전체를 indent=4로 다시 쓴다
+        embedding = embeddings.embed_query(reflection.reflection)
+        index.add(np.array([embedding], dtype="float32"))
+        reflections.append(reflection)
+        items.append({"reflection": reflection.model_dump(), "embedding": embedding})
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(items, file, ensure_ascii=False, indent=4)
+        save_samples.append(time.perf_counter() - start)
+
+    search_samples = []
+    for query in queries:
+        start = time.perf_counter()
+        _, rows = index.search(query[None, :], 3)
+        found = [reflections[row] for row in rows[0] if row >= 0]
+        search_samples.append(time.perf_counter() - start)
+    return {
+        "load_s": load_s,
+        "rss_mb": rss_mb,
+        "save": percentiles(save_samples),
+        "search": percentiles(search_samples),
+    }
+
+
+def measure_manager(file_path: str, dim: int, saves: int, queries: np.ndarray) -> dict:
+    from common.reflection_manager import ReflectionManager
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    manager = ReflectionManager(file_path=file_path, embeddings=DeterministicFakeEmbedding(size=dim))
+    load_s = time.perf_counter() - start
+    rss_mb = current_rss_mb() - rss_before
+
+    save_samples = []
+    for i in range(saves):
+        reflection = make_reflection(len(manager.rows) + i)
+        start = time.perf_counter()
+        manager.save_reflection(reflection)
+        save_samples.append(time.perf_counter() - start)
+
+    search_samples = []
+    for query in queries:
+        start = time.perf_counter()
+        manager._search([query.tolist()], 3)
+        search_samples.append(time.perf_counter() - start)
+    manager.close()
+    return {
+        "load_s": load_s,
+        "rss_mb": rss_mb,
+        "save": percentiles(save_samples),
+        "search": percentiles(search_samples),
+    }
+
+
+def measure(backend: str, file_path: str, dim: int, saves: int, queries_path: str) -> dict:
+    # 별도 프로세스에서 실행되어 RSS·페이지 캐시 외의 상태가 측정 간에 섞이지 않는다
+    queries = np.load(queries_path)
+    if backend == "legacy":
+        return measure_legacy(file_path, dim, saves, queries)
+    return measure_manager(file_path, dim, saves, queries)
+
+
+def run(backend: str, size: int, seed_dir: str, work_dir: str, queries_path: str, args) -> dict:
+    shutil.rmtree(work_dir, ignore_errors=True)
+    shutil.copytree(seed_dir, work_dir)
+    file_path = os.path.join(work_dir, "reflection_db.json")
+    # 변경 전 구현은 저장마다 파일 전체를 다시 쓰므로 큰 DB에서는 저장 횟수를 줄인다
+    saves = args.saves if backend != "legacy" else min(args.saves, max(3, 10_000 // size))
+    os.environ.update(
+        REFLECTION_INDEX_BACKEND=backend if backend != "legacy" else "flat",
+        REFLECTION_CAPACITY="0",
+    )
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        r = pool.apply(
+            measure,
+            (backend, file_path, args.dim, saves, queries_path),
+        )
+    return {
+        "backend": backend,
+        "size": size,
+        "load_s": r["load_s"],
+        "rss_mb": r["rss_mb"],
+        "saves": saves,
+        "save_p50_ms": r["save"]["p50_ms"],
+        "save_p99_ms": r["save"]["p99_ms"],
+        "search_p50_ms": r["search"]["p50_ms"],
+        "search_p99_ms": r["search"]["p99_ms"],
+        "file_mb": directory_mb(work_dir),
+    }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "faiss": faiss.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="리플렉션 수에 따른 로드 시간·저장/검색 지연·RSS·파일 크기를 백엔드별로 측정하고 JSON 리포트를 씁니다"
+    )
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--backends", nargs="+", default=["legacy", "flat", "hnsw"], choices=BACKENDS)
+    parser.add_argument("--saves", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--legacy-max-size",
+        type=int,
+        default=100_000,
+        help="변경 전 구현(legacy)을 측정할 최대 DB 크기",
+    )
+    parser.add_argument("--output", default="scale_report.json", help="JSON 리포트 경로")
+    args = parser.parse_args()
+
+    report = {"environment": environment(), "config": vars(args), "results": []}
+    print(f"{args.dim}차원 가짜 임베딩, 저장 {args.saves}회, 검색 {args.queries}회, CPU {os.cpu_count()}개")
+    print(
+        f"{'size':>9} {'backend':>8} {'load_s':>8} {'rss_mb':>8} {'save_p50':>9} {'save_p99':>9}"
+        f" {'search_p50':>10} {'search_p99':>10} {'file_mb':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        queries_path = os.path.join(tmp_dir, "queries.npy")
+        np.save(queries_path, random_embeddings(args.queries, args.dim, seed=1))
+        for size in args.sizes:
+            backends = [b for b in args.backends if b != "legacy" or size <= args.legacy_max_size]
+            seeds = {}
+            # 같은 크기의 DB는 형식별로 한 번만 만들고 측정마다 복사해 쓴다
+            if "legacy" in backends:
+                seeds["legacy"] = os.path.join(tmp_dir, "seed-json")
+                seed_json_db(os.path.join(seeds["legacy"], "reflection_db.json"), size, args.dim)
+            if any(b != "legacy" for b in backends):
+                seeds["snapshot"] = os.path.join(tmp_dir, "seed-snapshot")
+                seed_snapshot_db(os.path.join(seeds["snapshot"], "reflection_db.json"), size, args.dim)
+            for backend in backends:
+                seed_dir = seeds["legacy" if backend == "legacy" else "snapshot"]
+                r = run(backend, size, seed_dir, os.path.join(tmp_dir, "work"), queries_path, args)
+                report["results"].append(r)
+                print(
+                    f"{size:>9} {backend:>8} {r['load_s']:>8.2f} {r['rss_mb']:>8.1f}"
+                    f" {r['save_p50_ms']:>9.3f} {r['save_p99_ms']:>9.3f}"
+                    f" {r['search_p50_ms']:>10.3f} {r['search_p99_ms']:>10.3f} {r['file_mb']:>8.1f}"
+                )
+                # 측정할 때마다 리포트를 다시 써서 도중에 멈춰도 결과가 남게 한다
+                with open(args.output, "w", encoding="utf-8") as file:
+                    json.dump(report, file, ensure_ascii=False, indent=2)
+            for seed_dir in seeds.values():
+                shutil.rmtree(seed_dir)
+    print(f"리포트: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
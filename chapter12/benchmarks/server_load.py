@@ -0,0 +1,131 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.utils import make_reflection, percentiles, seed_snapshot_db
+from common.reflection_manager import ReflectionManager
+from common.reflection_server import (
+    ReflectionServer,
+    RemoteReflectionManager,
+    socket_path_for,
+)
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def serve(file_path: str, dim: int) -> None:
+    manager = ReflectionManager(
+        file_path=file_path, embeddings=DeterministicFakeEmbedding(size=dim)
+    )
+    server = ReflectionServer(socket_path_for(file_path), manager)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def agent(mode: str, file_path: str, dim: int, worker: int, tasks: int) -> dict:
+    # 에이전트 한 번의 실행을 흉내 낸다: 서브태스크 4개에 대한 검색 후 리플렉션 1개 저장
+    # 프로세스 기동(spawn, 임포트) 비용을 빼기 위해 워크로드 구간을 벽시계 시각으로 기록한다
+    began = time.time()
+    start = time.perf_counter()
+    if mode == "server":
+        manager = RemoteReflectionManager(socket_path_for(file_path))
+    else:
+        manager = ReflectionManager(
+            file_path=file_path, embeddings=DeterministicFakeEmbedding(size=dim)
+        )
+    startup = time.perf_counter() - start
+
+    searches, saves = [], []
+    for t in range(tasks):
+        queries = [f"에이전트 {worker} 태스크 {t} 서브태스크 {s}" for s in range(4)]
+        begin = time.perf_counter()
+        manager.get_relevant_reflections_batch(queries)
+        searches.append(time.perf_counter() - begin)
+        begin = time.perf_counter()
+        manager.save_reflection(make_reflection(worker * tasks + t))
+        saves.append(time.perf_counter() - begin)
+    manager.close()
+    return {
+        "began": began,
+        "ended": time.time(),
+        "startup": startup,
+        "searches": searches,
+        "saves": saves,
+    }
+
+
+def run(mode: str, size: int, dim: int, agents: int, tasks: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "reflection_db.json")
+        seed_snapshot_db(file_path, size, dim)
+        context = multiprocessing.get_context("spawn")
+
+        server = None
+        if mode == "server":
+            server = context.Process(target=serve, args=(file_path, dim))
+            server.start()
+            while not os.path.exists(socket_path_for(file_path)):
+                time.sleep(0.01)
+
+        with context.Pool(agents) as pool:
+            results = pool.starmap(
+                agent, [(mode, file_path, dim, w, tasks) for w in range(agents)]
+            )
+        elapsed = max(r["ended"] for r in results) - min(r["began"] for r in results)
+
+        if server is not None:
+            server.terminate()
+            server.join()
+
+        # 모든 에이전트가 끝난 뒤 디스크에서 다시 읽어 유실된 쓰기가 없는지 확인한다
+        reloaded = ReflectionManager(
+            file_path=file_path, embeddings=DeterministicFakeEmbedding(size=dim)
+        )
+        stored = len(reloaded.reflections)
+        reloaded.close()
+
+    startups = [r["startup"] for r in results]
+    return {
+        "mode": mode,
+        "agents": agents,
+        "tasks_per_s": agents * tasks / elapsed,
+        "startup_ms": sum(startups) / len(startups) * 1000,
+        "search": percentiles([s for r in results for s in r["searches"]]),
+        "save": percentiles([s for r in results for s in r["saves"]]),
+        "expected": size + agents * tasks,
+        "stored": stored,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="여러 에이전트 프로세스가 동시에 리플렉션 DB를 쓸 때의 처리량과 정합성을 측정합니다"
+    )
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--agents", type=int, default=16)
+    parser.add_argument("--tasks", type=int, default=20)
+    parser.add_argument(
+        "--modes", nargs="+", default=["server", "in-process"], choices=["server", "in-process"]
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'mode':>10} {'tasks/s':>8} {'startup_ms':>10} {'search_p50':>10} {'search_p99':>10}"
+        f" {'save_p50':>9} {'save_p99':>9} {'stored/expected':>16}"
+    )
+    for mode in args.modes:
+        r = run(mode, args.size, args.dim, args.agents, args.tasks)
+        print(
+            f"{r['mode']:>10} {r['tasks_per_s']:>8.1f} {r['startup_ms']:>10.1f}"
+            f" {r['search']['p50_ms']:>10.3f} {r['search']['p99_ms']:>10.3f}"
+            f" {r['save']['p50_ms']:>9.3f} {r['save']['p99_ms']:>9.3f}"
+            f" {r['stored']:>8}/{r['expected']:<7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
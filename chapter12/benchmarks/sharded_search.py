@@ -0,0 +1,140 @@
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+from benchmarks.utils import clustered_embeddings, make_reflection, percentiles
+from common.reflection_store import EmbeddingMatrix, ReflectionStore
+
+
+def write_store(file_path: str, template: dict, rows: np.ndarray, vectors: np.ndarray) -> None:
+    # 리플렉션 ID를 전역 행 번호로 두어 샤드 구성과 상관없이 정답과 비교한다
+    items = [{**template, "id": str(row)} for row in rows.tolist()]
+    ReflectionStore(file_path, fsync="never").compact(items, EmbeddingMatrix(vectors))
+
+
+def exact_top_k(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    best_d = np.full((len(queries), k), np.inf, dtype="float32")
+    best_i = np.zeros((len(queries), k), dtype="int64")
+    for start in range(0, len(vectors), 100_000):
+        block = vectors[start : start + 100_000]
+        d = (queries**2).sum(1)[:, None] - 2 * queries @ block.T + (block**2).sum(1)[None, :]
+        d = np.concatenate([best_d, d], axis=1)
+        i = np.concatenate([best_i, np.arange(start, start + len(block))[None, :].repeat(len(queries), 0)], axis=1)
+        order = np.argsort(d, axis=1)[:, :k]
+        best_d = np.take_along_axis(d, order, axis=1)
+        best_i = np.take_along_axis(i, order, axis=1)
+    return best_i
+
+
+def measure(layout: str, path: str, dim: int, k: int, queries_path: str) -> dict:
+    # 별도 프로세스에서 열어 측정 간에 메모리·인덱스가 섞이지 않는다
+    from common.reflection_manager import ReflectionManager
+    from common.reflection_shards import ShardedReflectionManager
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    embeddings = DeterministicFakeEmbedding(size=dim)
+    queries = np.load(queries_path)
+    start = time.perf_counter()
+    if layout == "monolithic":
+        manager = ReflectionManager(file_path=path, embeddings=embeddings)
+        search = {"all": lambda q: manager._search([q], k)[0]}
+    else:
+        manager = ShardedReflectionManager(path, embeddings=embeddings)
+        namespaces = manager.namespaces()
+        for namespace in namespaces:
+            manager.shard(namespace)  # 로드 시간에 포함되도록 모든 샤드를 미리 연다
+        search = {
+            "fan-out": lambda q: manager._fan_out([""], [q], k, None, None, "vector", None)[0],
+            "one shard": lambda q: manager._fan_out(
+                [""], [q], k, None, None, "vector", namespaces[:1]
+            )[0],
+        }
+    load_s = time.perf_counter() - start
+
+    results = {}
+    for name, fn in search.items():
+        samples, found = [], []
+        for query in queries:
+            start = time.perf_counter()
+            reflections = fn(query)
+            samples.append(time.perf_counter() - start)
+            found.append([int(r.id) for r in reflections])
+        results[name] = {**percentiles(samples), "found": found}
+    if layout == "monolithic":
+        manager.store.close()
+    else:
+        for shard in manager.shards.values():
+            shard.store.close()
+    return {"load_s": load_s, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="샤드 저장소의 팬아웃 검색과 단일 인덱스 검색의 지연·recall을 비교합니다"
+    )
+    parser.add_argument("--total", type=int, default=1_000_000)
+    parser.add_argument("--shards", type=int, default=32)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--backend", default="hnsw", choices=["flat", "hnsw", "ivf_flat"])
+    args = parser.parse_args()
+
+    os.environ.update(
+        REFLECTION_INDEX_BACKEND=args.backend,
+        REFLECTION_CAPACITY="0",
+        REFLECTION_LOG_COMPACT_THRESHOLD="0",
+        REFLECTION_INDEX_CHECKPOINT_ON_CLOSE="false",
+    )
+    vectors = clustered_embeddings(args.total, args.dim)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(0, args.total, args.queries)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape, dtype=np.float32)
+    truth = exact_top_k(vectors, queries, args.k)
+    template = make_reflection(0).model_dump()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        queries_path = os.path.join(tmp_dir, "queries.npy")
+        np.save(queries_path, queries)
+        mono_path = os.path.join(tmp_dir, "monolithic", "reflection_db.json")
+        write_store(mono_path, template, np.arange(args.total), vectors)
+        # 테넌트가 특정 주제에 몰리지 않도록 행을 돌아가며 샤드에 나눈다
+        shard_root = os.path.join(tmp_dir, "shards")
+        for shard in range(args.shards):
+            rows = np.arange(shard, args.total, args.shards)
+            write_store(
+                os.path.join(shard_root, f"shard-{shard:02d}", "reflection_db.json"),
+                template,
+                rows,
+                vectors[rows],
+            )
+        del vectors
+
+        print(
+            f"리플렉션 {args.total}개, {args.dim}차원, {args.backend},"
+            f" 샤드 {args.shards}개 (샤드당 {args.total // args.shards}개), CPU {os.cpu_count()}개"
+        )
+        print(
+            f"{'layout':>11} {'search':>10} {'load_s':>8} {'p50_ms':>8} {'p99_ms':>8} {'recall':>7}"
+        )
+        context = multiprocessing.get_context("spawn")
+        for layout, path in (("monolithic", mono_path), ("sharded", shard_root)):
+            with context.Pool(1) as pool:
+                r = pool.apply(measure, (layout, path, args.dim, args.k, queries_path))
+            for name, stats in r["results"].items():
+                recall = np.mean(
+                    [len(set(found) & set(t.tolist())) / args.k for found, t in zip(stats["found"], truth)]
+                )
+                # 한 샤드만 검색하면 나머지 샤드의 정답은 원래 보이지 않는다
+                recall_text = f"{recall:>7.3f}" if name != "one shard" else f"{'-':>7}"
+                print(
+                    f"{layout:>11} {name:>10} {r['load_s']:>8.1f} {stats['p50_ms']:>8.3f}"
+                    f" {stats['p99_ms']:>8.3f} {recall_text}"
+                )
+
+
+if __name__ == "__main__":
+    main()
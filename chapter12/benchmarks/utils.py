@@ -0,0 +1,98 @@
+import json
+import os
+import statistics
+import uuid
+
+import numpy as np
+from common.reflection_manager import Reflection, ReflectionJudgment
+from common.reflection_store import EmbeddingMatrix, ReflectionStore
+
+
+def make_reflection(i: int) -> Reflection:
+    return Reflection(
+        id=str(uuid.uuid4()),
+        task=f"벤치마크 태스크 {i}: 카레라이스 만드는 방법 조사",
+        reflection=f"리플렉션 {i}: 재료의 분량과 단위를 구체적으로 명시해야 한다.",
+        judgment=ReflectionJudgment(
+            needs_retry=i % 5 == 0,
+            confidence=(i % 10) / 10,
+            reasons=[f"이유 {i}"],
+        ),
+    )
+
+
+def random_embeddings(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.standard_normal((n, dim), dtype=np.float32)
+
+
+def seed_json_db(file_path: str, n: int, dim: int, chunk: int = 1000) -> None:
+    """기존 JSON 형식의 리플렉션 DB를 n개 레코드로 생성한다(스트리밍으로 기록)."""
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write("[")
+        for start in range(0, n, chunk):
+            vectors = random_embeddings(min(chunk, n - start), dim, seed=start)
+            for offset, vector in enumerate(vectors):
+                i = start + offset
+                if i:
+                    file.write(",")
+                json.dump(
+                    {
+                        "reflection": make_reflection(i).model_dump(),
+                        "embedding": vector.tolist(),
+                    },
+                    file,
+                    ensure_ascii=False,
+                )
+        file.write("]")
+
+
+def seed_snapshot_db(file_path: str, n: int, dim: int, chunk: int = 10_000) -> None:
+    """스냅샷 형식(.npy + .meta.jsonl)의 리플렉션 DB를 n개 레코드로 생성한다."""
+    embeddings = EmbeddingMatrix(
+        np.concatenate(
+            [
+                random_embeddings(min(chunk, n - start), dim, seed=start)
+                for start in range(0, n, chunk)
+            ]
+        )
+        if n
+        else None
+    )
+    ReflectionStore(file_path).compact(
+        [make_reflection(i).model_dump() for i in range(n)], embeddings
+    )
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+
+def current_rss_mb() -> float:
+    # 리눅스의 /proc에서 현재 RSS를 읽는다 (다른 OS에서는 최대 RSS로 대체)
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def clustered_embeddings(
+    n: int, dim: int, clusters: int = 256, spread: float = 0.3, seed: int = 0
+) -> np.ndarray:
+    """실제 임베딩처럼 주제별로 뭉친 분포의 단위 벡터를 만든다(ANN 평가용)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    vectors = centers[rng.integers(0, clusters, n)]
+    vectors += spread * rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
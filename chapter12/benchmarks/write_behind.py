@@ -0,0 +1,112 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from benchmarks.utils import make_reflection, percentiles, seed_snapshot_db
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.runnables import RunnableLambda
+
+
+class FakeReflectionLLM(GenericFakeChatModel):
+    """구조화 출력으로 고정 지연 뒤에 리플렉션을 돌려주는 가짜 LLM."""
+
+    latency: float = 0.2
+    count: int = 0
+
+    def with_structured_output(self, schema, **kwargs):
+        def reflect(_):
+            time.sleep(self.latency)
+            self.count += 1
+            reflection = make_reflection(self.count)
+            # 태스크마다 다른 교훈이 되도록 번호를 넣는다 (병합되지 않게)
+            reflection.reflection = f"{reflection.reflection} #{self.count}"
+            reflection.judgment.needs_retry = self.count % 4 == 0
+            return reflection
+
+        return RunnableLambda(reflect)
+
+
+def run(write_behind: bool, tasks: int, size: int, dim: int, llm_latency: float, embed_latency: float) -> dict:
+    # 설정이 환경 변수를 읽은 뒤에 임포트되도록 여기서 임포트한다
+    from benchmarks.async_concurrency import SlowFakeEmbedding
+    from common.reflection_manager import ReflectionManager, TaskReflector
+    from self_reflection.main import ReflectiveAgent, ReflectiveAgentState
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "reflection_db.json")
+        seed_snapshot_db(file_path, size, dim)
+        manager = ReflectionManager(
+            file_path=file_path, embeddings=SlowFakeEmbedding(size=dim, latency=embed_latency)
+        )
+        llm = FakeReflectionLLM(messages=iter([]), latency=llm_latency)
+        agent = ReflectiveAgent(
+            llm=llm,
+            reflection_manager=manager,
+            task_reflector=TaskReflector(
+                llm=llm, reflection_manager=manager, write_behind=write_behind
+            ),
+        )
+        task_names = [f"태스크 {i}" for i in range(tasks)]
+        state = ReflectiveAgentState(query="벤치마크", tasks=task_names, results=[""])
+        samples = []
+        start = time.perf_counter()
+        for i in range(tasks):
+            # 태스크 실행(LLM 호출 한 번)과 리플렉션, 재시도 판단까지를 태스크 하나로 잰다
+            task_start = time.perf_counter()
+            time.sleep(llm_latency)
+            state.current_task_index = i
+            update = agent._reflect_on_task(state)
+            state.reflection_ids = state.reflection_ids + update["reflection_ids"]
+            state.retry_count = update["retry_count"]
+            agent._should_retry_or_continue(state)
+            samples.append(time.perf_counter() - task_start)
+        elapsed = time.perf_counter() - start
+        flush_start = time.perf_counter()
+        manager.flush()
+        flush_s = time.perf_counter() - flush_start
+        # 백그라운드 저장이 모두 반영되었는지 확인한다
+        stored = sum(manager.rows.get(rid) is not None for rid in state.reflection_ids)
+        manager.close()
+        return {
+            **percentiles(samples),
+            "per_task_ms": elapsed / tasks * 1000,
+            "flush_ms": flush_s * 1000,
+            "stored": stored,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="TaskReflector의 동기 저장과 write-behind 저장에서 ReflectiveAgent의 태스크당 시간을 비교합니다"
+    )
+    parser.add_argument("--tasks", type=int, default=50)
+    parser.add_argument("--size", type=int, default=10_000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--embed-latency", type=float, default=0.15)
+    args = parser.parse_args()
+
+    os.environ.update(REFLECTION_CAPACITY="0", REFLECTION_LOG_FSYNC="always")
+    logging.disable(logging.INFO)
+    print(
+        f"태스크 {args.tasks}개, 기존 리플렉션 {args.size}개, {args.dim}차원,"
+        f" LLM 지연 {args.llm_latency * 1000:.0f}ms, 임베딩 지연 {args.embed_latency * 1000:.0f}ms"
+    )
+    print(
+        f"{'mode':>13} {'per_task_ms':>12} {'p50_ms':>8} {'p99_ms':>8} {'flush_ms':>9} {'stored':>7}"
+    )
+    for write_behind in (False, True):
+        r = run(
+            write_behind, args.tasks, args.size, args.dim, args.llm_latency, args.embed_latency
+        )
+        mode = "write-behind" if write_behind else "synchronous"
+        print(
+            f"{mode:>13} {r['per_task_ms']:>12.1f} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f}"
+            f" {r['flush_ms']:>9.1f} {r['stored']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+class CachedEmbeddings(Embeddings):
+    """임베딩 결과를 디스크(SQLite)에 캐시하는 Embeddings 래퍼.
+
+    키는 (모델명, 텍스트의 SHA-256)이므로 같은 텍스트는 실행과 프로세스를 넘어 재사용된다.
+    max_entries / max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 제거한다(LRU).
+    0은 해당 한도를 두지 않는다는 뜻이다.
+    """
+
+    def __init__(
+        self,
+        underlying: Embeddings,
+        model: str,
+        path: str,
+        max_entries: int = 100_000,
+        max_bytes: int = 0,
+    ):
+        self.underlying = underlying
+        self.model = model
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings(last_access)"
+        )
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [self._key(text) for text in texts]
+        cached = self._lookup(keys)
+        missing = list(dict.fromkeys(k for k in keys if k not in cached))
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            vectors = self.underlying.embed_documents([text_by_key[k] for k in missing])
+            fresh = dict(zip(missing, vectors))
+            self._insert(fresh)
+            cached.update(fresh)
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+        return [np.asarray(cached[k], dtype="float32").tolist() for k in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        cached = self._lookup([key])
+        if key in cached:
+            with self._lock:
+                self.hits += 1
+            return cached[key].tolist()
+        vector = self.underlying.embed_query(text)
+        self._insert({key: vector})
+        with self._lock:
+            self.misses += 1
+        # 캐시 적중 시와 같은 값이 되도록 float32로 맞춘다
+        return np.asarray(vector, dtype="float32").tolist()
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        # SQLite 조회·기록은 executor 스레드에서, 캐시 미스만 하위 모델의 비동기 API로 임베딩한다
+        loop = asyncio.get_running_loop()
+        keys = [self._key(text) for text in texts]
+        cached = await loop.run_in_executor(None, self._lookup, keys)
+        missing = list(dict.fromkeys(k for k in keys if k not in cached))
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            vectors = await self.underlying.aembed_documents(
+                [text_by_key[k] for k in missing]
+            )
+            fresh = dict(zip(missing, vectors))
+            await loop.run_in_executor(None, self._insert, fresh)
+            cached.update(fresh)
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(keys) - len(missing)
+        return [np.asarray(cached[k], dtype="float32").tolist() for k in keys]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        loop = asyncio.get_running_loop()
+        key = self._key(text)
+        cached = await loop.run_in_executor(None, self._lookup, [key])
+        if key in cached:
+            with self._lock:
+                self.hits += 1
+            return cached[key].tolist()
+        vector = await self.underlying.aembed_query(text)
+        await loop.run_in_executor(None, self._insert, {key: vector})
+        with self._lock:
+            self.misses += 1
+        # 캐시 적중 시와 같은 값이 되도록 float32로 맞춘다
+        return np.asarray(vector, dtype="float32").tolist()
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+            ).fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: list[str]) -> dict[str, np.ndarray]:
+        unique = list(dict.fromkeys(keys))
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            # SQLite의 바인드 변수 개수 제한을 넘지 않도록 나눠서 조회한다
+            for start in range(0, len(unique), 500):
+                batch = unique[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype="float32")
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def _insert(self, vectors: dict[str, list[float]]) -> None:
+        now = time.time()
+        rows = [
+            (key, np.asarray(vector, dtype="float32").tobytes(), now)
+            for key, vector in vectors.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                rows,
+            )
+            # 다른 프로세스와 파일을 공유할 수 있으므로 항목 수는 근사치로 관리하고 제거 후 다시 센다
+            self._entries += len(rows)
+            self._evict(len(rows[0][1]))
+            self._conn.commit()
+
+    def _evict(self, vector_bytes: int) -> None:
+        limit = self.max_entries
+        if self.max_bytes > 0:
+            # 한 캐시 안의 벡터는 모두 같은 모델·차원이므로 바이트 한도를 항목 수로 환산한다
+            by_size = self.max_bytes // max(1, vector_bytes)
+            limit = min(limit, by_size) if limit > 0 else by_size
+        if limit <= 0 or self._entries <= limit:
+            return
+        # 매 삽입마다 지우지 않도록 한도의 90%까지 한 번에 줄인다
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            " SELECT key FROM embeddings ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+            (int(limit * 0.9),),
+        )
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
@@ -0,0 +1,241 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+from common.reflection_index import ReflectionIndex
+from common.reflection_manager import create_embeddings
+from langchain_core.embeddings import Embeddings
+from settings import Settings
+
+settings = Settings()
+
+
+class SemanticGoalCache:
+    """쿼리 임베딩의 유사도로 목표 설정 결과를 재사용하는 의미 기반 캐시.
+
+    항목은 (쿼리, 정규화된 쿼리 임베딩, 값 문자열)로 SQLite에 저장되고, 임베딩은 메모리의
+    정확한(flat) faiss 인덱스로 검색한다. 가장 가까운 항목과의 코사인 유사도가
+    min_similarity 이상이면 적중이다. 쿼리 문자열이 그대로 같으면 임베딩 없이 바로 적중한다.
+    ttl초가 지난 항목은 쓰지 않으며, max_entries를 넘으면 가장 오래 사용되지 않은 항목부터
+    제거한다(LRU). 0은 해당 한도를 두지 않는다는 뜻이다.
+
+    model은 임베딩 모델의 이름이다. 다른 모델의 임베딩과는 유사도를 비교할 수 없으므로
+    같은 파일이라도 model이 같은 항목만 읽는다. lookup·add의 producer는 값을 만든 쪽(LLM
+    모델과 목표 설정 방식 등)을 나타내며, producer마다 인덱스를 따로 두어 같은 producer가
+    만든 값만 재사용한다. 다른 프로세스가 추가한 항목은 조회할 때마다 새로 추가된 행만 읽어
+    인덱스에 반영한다.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        embeddings: Embeddings,
+        model: str,
+        min_similarity: float = 0.95,
+        ttl: float = 0.0,
+        max_entries: int = 10_000,
+    ):
+        self.path = path
+        self.embeddings = embeddings
+        self.model = model
+        self.min_similarity = min_similarity
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        # 쿼리 문자열이 그대로 같아 임베딩 없이 적중한 횟수 (hits에도 포함)
+        self.exact_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 적중하지 않은 쿼리의 임베딩. 이어지는 add에서 다시 임베딩하지 않도록 보관한다
+        self._pending: dict[str, np.ndarray] = {}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 병렬로 실행되는 에이전트 프로세스들이 같은 파일을 쓰므로 잠금을 기다린다
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS goals ("
+            " id INTEGER PRIMARY KEY, model TEXT NOT NULL, query TEXT NOT NULL,"
+            " vector BLOB NOT NULL, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(goals)")]
+        if "producer" not in columns:
+            # producer가 없던 형식의 항목은 어느 LLM이 만들었는지 알 수 없으므로 ''로 두어 재사용하지 않는다
+            self._conn.execute("ALTER TABLE goals ADD COLUMN producer TEXT NOT NULL DEFAULT ''")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS goals_producer_query ON goals(model, producer, query)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS goals_last_access ON goals(last_access)")
+        self._conn.commit()
+        # producer → 그 producer가 만든 항목의 정확한(flat) 인덱스
+        self.indexes: dict[str, ReflectionIndex] = {}
+        self._last_id = 0
+        self._sync()
+
+    def lookup(self, query: str, producer: str = "") -> Optional[tuple[str, float]]:
+        """producer가 만든 항목 중에서 적중하면 (값, 코사인 유사도)를, 아니면 None을 반환한다."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, value, created_at FROM goals"
+                " WHERE model = ? AND producer = ? AND query = ? ORDER BY id DESC LIMIT 1",
+                (self.model, producer, query),
+            ).fetchone()
+            if row is not None and not self._expired(row[2]):
+                self._touch(row[0])
+                self.hits += 1
+                self.exact_hits += 1
+                return row[1], 1.0
+        vector = self._embed(query)
+        with self._lock:
+            self._sync()
+            index = self.indexes.get(producer)
+            while index is not None and index.ntotal:
+                D, I = index.search(vector[None, :], 1)
+                # 정규화된 벡터에서 L2² = 2 - 2·cos
+                similarity = 1.0 - float(D[0, 0]) / 2.0
+                if similarity < self.min_similarity:
+                    break
+                row = self._conn.execute(
+                    "SELECT value, created_at FROM goals WHERE id = ?", (int(I[0, 0]),)
+                ).fetchone()
+                if row is None or self._expired(row[1]):
+                    # 다른 프로세스가 제거했거나 만료된 항목이면 인덱스에서 빼고 다음 후보를 본다
+                    index.remove([int(I[0, 0])])
+                    continue
+                self._touch(int(I[0, 0]))
+                self.hits += 1
+                return row[0], similarity
+            self.misses += 1
+            self._pending[query] = vector
+            return None
+
+    def add(self, query: str, value: str, producer: str = "") -> None:
+        with self._lock:
+            vector = self._pending.pop(query, None)
+        if vector is None:
+            vector = self._embed(query)
+        now = time.time()
+        with self._lock:
+            self._sync()
+            cursor = self._conn.execute(
+                "INSERT INTO goals (model, producer, query, vector, value, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self.model, producer, query, vector.tobytes(), value, now, now),
+            )
+            self._index(producer).add(vector[None, :], np.array([cursor.lastrowid]))
+            self._last_id = max(self._last_id, cursor.lastrowid)
+            self._evict(now)
+            self._conn.commit()
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": self._entries(),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _embed(self, query: str) -> np.ndarray:
+        vector = np.asarray(self.embeddings.embed_query(query), dtype="float32")
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl > 0 and time.time() - created_at > self.ttl
+
+    def _touch(self, row_id: int) -> None:
+        self._conn.execute(
+            "UPDATE goals SET last_access = ? WHERE id = ?", (time.time(), row_id)
+        )
+        self._conn.commit()
+
+    def _index(self, producer: str) -> ReflectionIndex:
+        index = self.indexes.get(producer)
+        if index is None:
+            index = self.indexes[producer] = ReflectionIndex(backend="flat")
+        return index
+
+    def _entries(self) -> int:
+        return sum(index.ntotal for index in self.indexes.values())
+
+    def _sync(self) -> None:
+        # 이 프로세스가 마지막으로 읽은 뒤에 추가된 행만 producer별 인덱스에 넣는다
+        rows = self._conn.execute(
+            "SELECT id, producer, vector FROM goals WHERE model = ? AND id > ? ORDER BY id",
+            (self.model, self._last_id),
+        ).fetchall()
+        if not rows:
+            return
+        by_producer: dict[str, list[tuple]] = {}
+        for row in rows:
+            by_producer.setdefault(row[1], []).append(row)
+        for producer, group in by_producer.items():
+            ids = np.array([row[0] for row in group], dtype="int64")
+            vectors = np.vstack([np.frombuffer(row[2], dtype="float32") for row in group])
+            self._index(producer).add(vectors, ids)
+        self._last_id = int(rows[-1][0])
+
+    def _evict(self, now: float) -> None:
+        # 한도는 producer와 관계없이 같은 임베딩 모델의 전체 항목 수에 적용한다
+        removed: list[tuple[int, str]] = []
+        if self.ttl > 0:
+            removed += self._conn.execute(
+                "DELETE FROM goals WHERE model = ? AND created_at < ? RETURNING id, producer",
+                (self.model, now - self.ttl),
+            ).fetchall()
+        if self.max_entries > 0 and self._entries() - len(removed) > self.max_entries:
+            # 매 추가마다 지우지 않도록 한도의 90%까지 한 번에 줄인다
+            removed += self._conn.execute(
+                "DELETE FROM goals WHERE id IN ("
+                " SELECT id FROM goals WHERE model = ?"
+                " ORDER BY last_access DESC LIMIT -1 OFFSET ?) RETURNING id, producer",
+                (self.model, int(self.max_entries * 0.9)),
+            ).fetchall()
+        by_producer: dict[str, list[int]] = {}
+        for row_id, producer in removed:
+            by_producer.setdefault(producer, []).append(row_id)
+        for producer, ids in by_producer.items():
+            if producer in self.indexes:
+                self.indexes[producer].remove(ids)
+
+
+_goal_cache: Optional[SemanticGoalCache] = None
+
+
+def open_goal_cache() -> Optional[SemanticGoalCache]:
+    """설정(goal_cache_path)에 따라 목표 설정 단계의 의미 기반 캐시를 연다.
+
+    같은 프로세스에서는 한 번만 열어 공유한다. 경로가 비어 있으면 None을 반환한다.
+    """
+    global _goal_cache
+    if not settings.goal_cache_path:
+        return None
+    if _goal_cache is not None and _goal_cache.path == settings.goal_cache_path:
+        return _goal_cache
+    if settings.embedding_provider == "local":
+        model = (
+            f"local-{settings.local_embedding_dim}"
+            f"-{settings.local_embedding_ngram_min}-{settings.local_embedding_ngram_max}"
+        )
+    else:
+        model = settings.openai_embedding_model
+    _goal_cache = SemanticGoalCache(
+        settings.goal_cache_path,
+        embeddings=create_embeddings(),
+        model=model,
+        min_similarity=settings.goal_cache_min_similarity,
+        ttl=settings.goal_cache_ttl,
+        max_entries=settings.goal_cache_max_entries,
+    )
+    return _goal_cache
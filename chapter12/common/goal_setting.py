@@ -0,0 +1,120 @@
+import logging
+from typing import Literal, Optional
+
+from common.goal_cache import SemanticGoalCache
+from common.llm_cache import component_llm
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+from passive_goal_creator.main import Goal, PassiveGoalCreator
+from prompt_optimizer.main import OptimizedGoal, PromptOptimizer
+from pydantic import BaseModel, Field
+from response_optimizer.main import ResponseOptimizer
+from settings import Settings
+
+logger = logging.getLogger(__name__)
+
+settings = Settings()
+
+GoalSettingMode = Literal["staged", "fused"]
+
+
+class GoalDefinition(BaseModel):
+    goal: Goal = Field(..., description="사용자 입력에서 만든 기본 목표")
+    optimized_goal: OptimizedGoal = Field(..., description="SMART 원칙으로 최적화된 목표")
+    response_definition: str = Field(..., description="최종 응답의 형식과 구조에 대한 정의")
+
+
+class GoalSetter:
+    """계획형 에이전트의 목표 설정 단계.
+
+    mode가 staged이면 PassiveGoalCreator → PromptOptimizer → ResponseOptimizer를 차례로
+    실행하고(LLM 호출 3회), fused이면 세 단계의 지시를 합친 프롬프트로 GoalDefinition 전체를
+    한 번의 구조화 출력 호출로 만든다. mode를 지정하지 않으면 settings.goal_setting_mode를 쓴다.
+    cache가 있으면 먼저 의미가 비슷한 과거 쿼리의 결과를 찾아 재사용하고, 없을 때만
+    LLM을 호출한 뒤 그 결과를 캐시에 추가한다. 캐시 항목은 LLM 모델과 mode별로 나뉘므로
+    다른 모델이나 방식으로 만든 결과는 재사용하지 않는다.
+    """
+
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        cache: Optional[SemanticGoalCache] = None,
+        mode: Optional[GoalSettingMode] = None,
+    ):
+        self.llm = component_llm(llm, "GoalSetter")
+        self.passive_goal_creator = PassiveGoalCreator(llm=llm)
+        self.prompt_optimizer = PromptOptimizer(llm=llm)
+        self.response_optimizer = ResponseOptimizer(llm=llm)
+        self.cache = cache
+        self.mode: GoalSettingMode = mode or settings.goal_setting_mode
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+        # 캐시에서 이 GoalSetter가 만든 항목을 구분하는 키
+        self.cache_producer = f"{model}:{self.mode}"
+
+    def run(self, query: str) -> GoalDefinition:
+        if self.cache is not None:
+            cached = self.cache.lookup(query, self.cache_producer)
+            if cached is not None:
+                value, similarity = cached
+                logger.info(f"  목표 설정 캐시 적중 (유사도 {similarity:.3f})")
+                return GoalDefinition.model_validate_json(value)
+
+        if self.mode == "fused":
+            definition = self._run_fused(query)
+        else:
+            definition = self._run_staged(query)
+        if self.cache is not None:
+            self.cache.add(query, definition.model_dump_json(), self.cache_producer)
+        return definition
+
+    def _run_staged(self, query: str) -> GoalDefinition:
+        goal: Goal = self.passive_goal_creator.run(query=query)
+        optimized_goal: OptimizedGoal = self.prompt_optimizer.run(query=goal.text)
+        response_definition: str = self.response_optimizer.run(query=optimized_goal.text)
+        return GoalDefinition(
+            goal=goal,
+            optimized_goal=optimized_goal,
+            response_definition=response_definition,
+        )
+
+    def _run_fused(self, query: str) -> GoalDefinition:
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                (
+                    "system",
+                    "당신은 목표 설정 및 AI 에이전트 시스템의 응답 최적화 전문가입니다. 사용자 입력으로부터 목표, SMART 원칙으로 최적화된 목표, 에이전트의 응답 사양을 한 번에 수립해 주세요.",
+                ),
+                (
+                    "human",
+                    "다음 절차를 차례로 수행하고, 각 결과를 해당 항목에 기입해 주세요.\n"
+                    "당신이 실행할 수 있는 행동은 다음과 같은 행동뿐이며, 절대 이 외의 행동을 목표에 포함해서는 안 됩니다.\n"
+                    "   - 인터넷을 이용하여 목표 달성을 위한 조사를 수행합니다.\n"
+                    "   - 사용자를 위한 보고서를 생성합니다.\n\n"
+                    "1. goal (기본 목표):\n"
+                    "사용자 입력을 분석하여 명확하고 실행 가능한 목표를 생성해 주세요. 목표는 구체적이고 명확해야 하며, 실행 가능한 수준으로 상세화되어야 합니다.\n\n"
+                    "2. optimized_goal (최적화된 목표):\n"
+                    "1.의 목표를 SMART 원칙(Specific: 구체적, Measurable: 측정 가능, Achievable: 달성 가능, Relevant: 관련성이 높은, Time-bound: 기한이 있는)에 기반하여 최적화해 주세요.\n"
+                    "   - 부족한 요소나 개선점을 파악하고, SMART 원칙의 각 요소를 고려하면서 목표를 구체적이고 상세하게 기술해 주세요.\n"
+                    "   - 절대 추상적인 표현을 포함해서는 안 되며, 모든 단어가 실행 가능하고 구체적인지 확인해 주세요.\n"
+                    "   - metrics에는 목표의 달성도를 측정하는 방법을 구체적이고 상세하게 기술해 주세요.\n"
+                    "   - 원래 목표에서 기한이 지정되지 않은 경우에는 기한을 고려할 필요가 없습니다.\n\n"
+                    "3. response_definition (응답 최적화 프롬프트):\n"
+                    "2.의 목표에 대해 에이전트가 목표에 맞는 응답을 반환하기 위한 응답 사양을 수립해 주세요. 목표의 주요 요소와 의도를 분석하고, 톤, 구조, 내용의 초점 등을 고려해 주세요. "
+                    "AI 에이전트가 수행할 수 있는 것은 이미 조사된 결과를 정리하는 것뿐이며, 인터넷에 접근할 수 없습니다. 가능하다면 목표에 맞는 응답의 예시를 하나 이상 포함해 주세요.\n"
+                    "다음 구조로 작성해 주세요:\n\n"
+                    "목표 분석:\n"
+                    "[여기에 목표 분석 결과를 기입]\n\n"
+                    "응답 사양:\n"
+                    "[여기에 수립된 응답 사양을 기입]\n\n"
+                    "AI 에이전트에 대한 지침:\n"
+                    "[여기에 AI 에이전트에 대한 구체적인 지침을 기입]\n\n"
+                    "응답 예시:\n"
+                    "[여기에 응답 예시를 기입]\n\n"
+                    "평가 기준:\n"
+                    "[여기에 평가 기준을 기입]\n\n"
+                    "사용자 입력: {query}",
+                ),
+            ]
+        )
+        chain = prompt | self.llm.with_structured_output(GoalDefinition)
+        return chain.invoke({"query": query})
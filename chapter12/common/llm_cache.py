@@ -0,0 +1,362 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Optional, Sequence
+
+from langchain_core.caches import BaseCache
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+from settings import Settings
+
+settings = Settings()
+
+# 현재 LLM 호출이 lookup에서 잡은 (캐시, 키) 임대. _LeaseReleaser가 호출을 시작할 때 새 집합을 두고,
+# 호출이 실패하면 남은 임대를 푼다. 비동기 호출은 메시지마다 컨텍스트를 복사한 태스크에서 캐시를
+# 조회하므로 변수를 다시 설정하지 않고 같은 집합을 고쳐 쓴다
+_claimed_leases: ContextVar[Optional[set[tuple["SQLiteLLMCache", str]]]] = ContextVar(
+    "llm_cache_claimed_leases", default=None
+)
+
+
+class SQLiteLLMCache(BaseCache):
+    """LLM 응답을 디스크(SQLite)에 캐시하는 LangChain 캐시.
+
+    키는 (llm_string, 프롬프트)의 SHA-256이다. llm_string에는 모델명·temperature 등의
+    파라미터와 with_structured_output이 바인딩한 도구 스키마가 들어 있으므로 같은 프롬프트라도
+    모델·파라미터·출력 스키마가 다르면 다른 항목이 된다. ttl초가 지난 항목은 쓰지 않으며,
+    max_entries / max_bytes를 넘으면 가장 오래 사용되지 않은 항목부터 제거한다(LRU).
+    0은 해당 한도를 두지 않는다는 뜻이다.
+
+    같은 요청이 다른 프로세스에서 동시에 들어오면 먼저 온 호출만 LLM을 부르고 나머지는
+    그 응답이 캐시에 기록될 때까지 기다린다. 임대(lease)에는 처리 중인 프로세스의 PID를 기록한다.
+    LLM 호출이 실패하면 component_llm이 붙인 콜백이 임대를 바로 풀어 기다리던 프로세스가 직접
+    호출하게 한다. 그래도 남은 임대(콜백 없이 호출한 모델 등)는, 같은 프로세스의 재시도(@retry)는
+    자기 임대를 기다리지 않고 바로 넘겨받고, 다른 프로세스의 임대는 그 프로세스가 종료되었거나
+    inflight_timeout초가 지나면 넘겨받는다. 같은 프로세스 안의 동시 요청은 합치지 않는다.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl: float = 0.0,
+        max_entries: int = 10_000,
+        max_bytes: int = 0,
+        inflight_timeout: float = 120.0,
+        poll_interval: float = 0.05,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.inflight_timeout = inflight_timeout
+        self.poll_interval = poll_interval
+        self.hits = 0
+        self.misses = 0
+        # 다른 호출이 처리 중인 같은 요청을 기다린 뒤 그 응답을 받은 횟수 (hits에도 포함)
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 병렬로 실행되는 에이전트 프로세스들이 같은 파일을 쓰므로 잠금을 기다린다
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_created_at ON responses(created_at)"
+        )
+        # 처리 중인 요청의 임대(lease). 먼저 넣은 호출이 LLM을 부르고, owner는 그 프로세스의 PID
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(inflight)")]
+        if columns and "owner" not in columns:
+            # 이전 형식의 임대 테이블. 임대는 처리 중에만 의미가 있으므로 버리고 다시 만든다
+            self._conn.execute("DROP TABLE inflight")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS inflight ("
+            " key TEXT PRIMARY KEY, started REAL NOT NULL, owner INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+        self._entries, self._bytes = self._count()
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[Sequence[Generation]]:
+        key = self._key(prompt, llm_string)
+        value = self._wait_or_claim(key)
+        if value is None:
+            leases = _claimed_leases.get()
+            if leases is not None:
+                leases.add((self, key))
+        return value
+
+    def _wait_or_claim(self, key: str) -> Optional[list[Generation]]:
+        # 응답이 있으면 반환하고, 없으면 임대를 잡고 None을 반환한다. 다른 호출이 처리 중이면 기다린다
+        pid = os.getpid()
+        waited = False
+        while True:
+            with self._lock:
+                value = self._get(key)
+                if value is not None:
+                    self.hits += 1
+                    self.coalesced += waited
+                    return _loads(value)
+                if self._claim(key, pid, time.time()):
+                    self.misses += 1
+                    return None
+            waited = True
+            time.sleep(self.poll_interval)
+
+    def _claim(self, key: str, pid: int, now: float) -> bool:
+        lease = self._conn.execute(
+            "SELECT started, owner FROM inflight WHERE key = ?", (key,)
+        ).fetchone()
+        if lease is None:
+            claimed = self._conn.execute(
+                "INSERT OR IGNORE INTO inflight (key, started, owner) VALUES (?, ?, ?)",
+                (key, now, pid),
+            ).rowcount
+        elif (
+            lease[1] == pid
+            or lease[0] < now - self.inflight_timeout
+            or not _process_alive(lease[1])
+        ):
+            # 자기 프로세스의 임대는 이전 호출이 실패하고 남긴 것이고, 만료되었거나 주인이 종료된
+            # 임대도 응답이 기록되지 않을 것이므로 넘겨받는다. 다른 호출이 먼저 넘겨받았으면 기다린다
+            claimed = self._conn.execute(
+                "UPDATE inflight SET started = ?, owner = ?"
+                " WHERE key = ? AND started = ? AND owner = ?",
+                (now, pid, key, lease[0], lease[1]),
+            ).rowcount
+        else:
+            claimed = 0
+        self._conn.commit()
+        return bool(claimed)
+
+    def update(self, prompt: str, llm_string: str, return_val: Sequence[Generation]) -> None:
+        key = self._key(prompt, llm_string)
+        value = _dumps(return_val)
+        now = time.time()
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._conn.execute("DELETE FROM inflight WHERE key = ?", (key,))
+            # 다른 프로세스와 파일을 공유할 수 있으므로 항목 수·크기는 근사치로 관리하고 제거 후 다시 센다
+            self._entries += previous is None
+            self._bytes += len(value) - (previous[0] if previous else 0)
+            self._evict(now)
+            self._conn.commit()
+        leases = _claimed_leases.get()
+        if leases is not None:
+            leases.discard((self, key))
+
+    def _release(self, key: str) -> None:
+        # 응답을 기록하지 못한 요청의 임대를 푼다. 이 프로세스가 잡은 임대만 지운다
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM inflight WHERE key = ? AND owner = ?", (key, os.getpid())
+            )
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM inflight")
+            self._conn.commit()
+            self._entries, self._bytes = 0, 0
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            entries, size = self._count()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(
+            f"{llm_string}\0{_strip_message_ids(prompt)}".encode("utf-8")
+        ).hexdigest()
+
+    def _get(self, key: str) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        now = time.time()
+        if self.ttl > 0 and now - created_at > self.ttl:
+            return None
+        self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+        return value
+
+    def _count(self) -> tuple[int, int]:
+        return self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+
+    def _evict(self, now: float) -> None:
+        # 응답 기록은 LLM 호출마다 한 번이므로 만료 항목을 매번 지워도 부담이 없다
+        if self.ttl > 0 and self._conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.ttl,)
+        ).rowcount:
+            self._entries, self._bytes = self._count()
+        over_entries = self.max_entries > 0 and self._entries > self.max_entries
+        over_bytes = self.max_bytes > 0 and self._bytes > self.max_bytes
+        if not (over_entries or over_bytes):
+            return
+        # 매 삽입마다 지우지 않도록 한도의 90%까지 한 번에 줄인다
+        if over_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (int(self.max_entries * 0.9),),
+            )
+        if over_bytes:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY last_access DESC) AS total"
+                " FROM responses) WHERE total > ?)",
+                (int(self.max_bytes * 0.9),),
+            )
+        self._entries, self._bytes = self._count()
+
+
+def _process_alive(pid: int) -> bool:
+    # 캐시 파일은 같은 머신의 프로세스끼리 공유한다. Windows의 os.kill은 프로세스를 종료시키므로
+    # POSIX에서만 확인하고, 그 밖에서는 살아 있다고 보고 inflight_timeout에 맡긴다
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _strip_message_ids(prompt: str) -> str:
+    # 챗 모델은 메시지 목록을 직렬화한 문자열을 프롬프트로 넘긴다. LangGraph는 메시지마다 임의의
+    # ID를 붙이므로(ReAct 에이전트 등) 내용이 같아도 실행마다 키가 달라지지 않도록 ID를 뺀다
+    try:
+        messages = json.loads(prompt)
+    except ValueError:
+        return prompt
+    if not isinstance(messages, list):
+        return prompt
+    for message in messages:
+        if isinstance(message, dict) and isinstance(message.get("kwargs"), dict):
+            message["kwargs"].pop("id", None)
+    return json.dumps(messages, ensure_ascii=False, sort_keys=True)
+
+
+def _dumps(generations: Sequence[Generation]) -> str:
+    return json.dumps(
+        [
+            {"message": message_to_dict(generation.message)}
+            if isinstance(generation, ChatGeneration)
+            else {"text": generation.text}
+            for generation in generations
+        ],
+        ensure_ascii=False,
+    )
+
+
+def _loads(value: str) -> list[Generation]:
+    return [
+        ChatGeneration(message=messages_from_dict([item["message"]])[0])
+        if "message" in item
+        else Generation(text=item["text"])
+        for item in json.loads(value)
+    ]
+
+
+def install_llm_cache() -> Optional[SQLiteLLMCache]:
+    """설정(llm_cache_path)에 따라 모든 LangChain 챗 모델이 함께 쓰는 응답 캐시를 설치한다.
+
+    각 진입점의 main에서 호출한다. 경로가 비어 있으면 설치하지 않는다.
+    """
+    if not settings.llm_cache_path:
+        return None
+    cache = get_llm_cache()
+    if isinstance(cache, SQLiteLLMCache) and cache.path == settings.llm_cache_path:
+        return cache
+    cache = SQLiteLLMCache(
+        settings.llm_cache_path,
+        ttl=settings.llm_cache_ttl,
+        max_entries=settings.llm_cache_max_entries,
+        max_bytes=settings.llm_cache_max_bytes,
+        inflight_timeout=settings.llm_cache_inflight_timeout,
+    )
+    set_llm_cache(cache)
+    return cache
+
+
+class _LeaseReleaser(BaseCallbackHandler):
+    """LLM 호출이 실패하면 그 호출이 응답 캐시에서 잡은 임대를 바로 푼다."""
+
+    # 임대 집합을 호출한 컨텍스트에 두어야 하므로 executor로 넘기지 않고 그 자리에서 실행한다
+    run_inline = True
+
+    def on_chat_model_start(self, serialized: dict, messages: list, **kwargs: Any) -> None:
+        _claimed_leases.set(set())
+
+    def on_llm_start(self, serialized: dict, prompts: list[str], **kwargs: Any) -> None:
+        _claimed_leases.set(set())
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        leases = _claimed_leases.get()
+        while leases:
+            cache, key = leases.pop()
+            cache._release(key)
+
+
+_LEASE_RELEASER = _LeaseReleaser()
+
+
+def component_llm(llm: BaseChatModel, component: str) -> BaseChatModel:
+    """component(클래스 이름)에 맞게 응답 캐시 사용 방식을 정한 llm의 사본을 반환한다.
+
+    llm_cache_bypass에 있으면 캐시를 쓰지 않는다. 기본값은 TaskExecutor·Executor(ReAct
+    실행)·TaskReflector·CascadeJudge로, 재시도(@retry나 ReflectiveAgent의 재실행)에서 같은
+    프롬프트로 다른 응답을 기대하므로 캐시하면 잘못된 응답이 재시도마다 그대로 재생된다.
+    그 밖의 컴포넌트에는 호출이 실패했을 때 캐시 임대를 푸는 콜백을 붙인다.
+    """
+    if component in settings.llm_cache_bypass:
+        return llm.model_copy(update={"cache": False})
+    callbacks = llm.callbacks
+    if isinstance(callbacks, BaseCallbackManager):
+        callbacks = callbacks.copy()
+        callbacks.add_handler(_LEASE_RELEASER, inherit=False)
+    else:
+        callbacks = [*(callbacks or []), _LEASE_RELEASER]
+    return llm.model_copy(update={"callbacks": callbacks})
@@ -0,0 +1,124 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_MULTIPLIER = np.uint64(0x100000001B3)
+_SEPARATOR = 0
+# 한 번에 계산할 텍스트 수. (텍스트 수 × dim) 크기의 중간 배열이 CPU 캐시에 들어가게 한다
+_BLOCK = 64
+
+
+def _mix(h: np.ndarray) -> np.ndarray:
+    # splitmix64 마무리 단계: 인접한 n-gram의 해시가 같은 버킷에 몰리지 않게 비트를 섞는다
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+
+def hashed_ngram_embeddings(
+    texts: list[str], dim: int, ngram_range: tuple[int, int] = (2, 4)
+) -> np.ndarray:
+    """문자 n-gram을 부호 있는 feature hashing으로 dim차원에 투영한 L2 정규화 행렬을 반환한다.
+
+    배치의 모든 텍스트를 구분 문자로 이어 붙인 코드포인트 배열 하나에서 n-gram 해시를 한꺼번에
+    계산하고, (텍스트 번호, 버킷) 쌍을 bincount로 세므로 텍스트 수만큼 파이썬 루프를 돌지 않는다.
+    빈도는 log(1 + tf)로 줄여 흔한 n-gram이 벡터를 지배하지 않게 한다.
+    """
+    if len(texts) > _BLOCK:
+        return np.concatenate(
+            [
+                hashed_ngram_embeddings(texts[i : i + _BLOCK], dim, ngram_range)
+                for i in range(0, len(texts), _BLOCK)
+            ]
+        )
+    if not texts:
+        return np.zeros((0, dim), dtype="float32")
+    # 앞뒤 공백은 단어 경계를 n-gram에 담기 위한 것이다
+    padded = [f" {text.lower()} " for text in texts]
+    codes = np.frombuffer(
+        "\x00".join(padded).encode("utf-32-le"), dtype=np.uint32
+    ).astype(np.uint64)
+    lengths = np.fromiter((len(text) + 1 for text in padded), dtype=np.int64, count=len(padded))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    separators = np.concatenate(([0], np.cumsum(codes == _SEPARATOR)))
+
+    counts = np.zeros(len(texts) * dim, dtype="float64")
+    for n in range(ngram_range[0], ngram_range[1] + 1):
+        positions = len(codes) - n + 1
+        if positions <= 0:
+            continue
+        h = np.full(positions, n, dtype=np.uint64)
+        for j in range(n):
+            h = h * _MULTIPLIER + codes[j : j + positions]
+        # 구분 문자를 포함한(텍스트 경계를 넘는) n-gram은 버린다
+        valid = separators[n : n + positions] == separators[:positions]
+        h = _mix(h[valid])
+        owner = np.searchsorted(starts, np.flatnonzero(valid), side="right") - 1
+        buckets = owner * dim + (h % np.uint64(dim)).astype(np.int64)
+        signs = np.where(h >> np.uint64(63), -1.0, 1.0)
+        counts += np.bincount(buckets, weights=signs, minlength=len(counts))
+
+    matrix = counts.reshape(len(texts), dim)
+    matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix.astype("float32")
+
+
+class HashedNGramEmbeddings(Embeddings):
+    """네트워크 없이 CPU에서 계산하는 로컬 임베딩.
+
+    문자 n-gram을 feature hashing으로 고정 차원에 투영하므로 학습이나 모델 파일이 필요 없고,
+    같은 텍스트는 항상 같은 벡터가 된다. 의미 유사도가 아니라 표기(어휘) 유사도를 반영하므로
+    같은 태스크가 반복되는 리플렉션 검색이나 네트워크 없는 벤치마크에 알맞다.
+    텍스트가 parallel_threshold개 이상이면 workers개의 프로세스로 나누어 계산한다
+    (workers가 1 이하이면 항상 현재 프로세스에서 계산한다).
+    """
+
+    def __init__(
+        self,
+        dim: int = 768,
+        ngram_range: tuple[int, int] = (2, 4),
+        workers: int = 1,
+        parallel_threshold: int = 256,
+    ):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.workers = workers if workers > 0 else os.cpu_count() or 1
+        self.parallel_threshold = parallel_threshold
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def model(self) -> str:
+        """캐시 키 등에 쓰는 모델 이름. 설정이 다르면 벡터도 다르므로 이름에 포함한다."""
+        return f"hashed-ngram-{self.ngram_range[0]}-{self.ngram_range[1]}-{self.dim}"
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_matrix([text])[0].tolist()
+
+    def embed_matrix(self, texts: list[str]) -> np.ndarray:
+        """embed_documents와 같지만 list 변환 없이 float32 행렬을 반환한다."""
+        if self.workers <= 1 or len(texts) < self.parallel_threshold:
+            return hashed_ngram_embeddings(texts, self.dim, self.ngram_range)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers)
+        size = -(-len(texts) // self.workers)
+        chunks = [texts[i : i + size] for i in range(0, len(texts), size)]
+        parts = self._pool.map(
+            hashed_ngram_embeddings,
+            chunks,
+            [self.dim] * len(chunks),
+            [self.ngram_range] * len(chunks),
+        )
+        return np.concatenate(list(parts))
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
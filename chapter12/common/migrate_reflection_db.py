@@ -0,0 +1,29 @@
+import glob
+
+from common.reflection_store import ReflectionStore
+
+
+# main 함수: 기존 JSON 형식의 리플렉션 DB를 스냅샷 형식(.npy + .meta.jsonl)으로 변환한다
+# ReflectionManager도 로드 시 자동으로 변환하지만, 배포 전에 미리 변환해 두면 첫 기동이 빨라진다
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="JSON 리플렉션 DB를 mmap 가능한 스냅샷 형식으로 변환합니다"
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        default=sorted(glob.glob("tmp/*_reflection_db.json")),
+        help="변환할 JSON DB 경로 (기본값: tmp/*_reflection_db.json)",
+    )
+    args = parser.parse_args()
+
+    for path in args.paths:
+        store = ReflectionStore(path)
+        count = store.migrate_legacy()
+        print(f"{path}: {count}개 리플렉션 변환 완료 → {store.manifest_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import time
+from typing import Optional
+
+import numpy as np
+from common.reflection_filter import ReflectionFilter
+
+# 숫자 열: (이름, 자료형)
+_NUMERIC_COLUMNS = [
+    ("live", bool),
+    ("needs_retry", bool),
+    ("confidence", "float32"),
+    ("pattern", "int16"),
+    ("hits", "int32"),
+    ("created_at", "float64"),
+    ("last_used_at", "float64"),
+]
+
+
+class ReflectionColumns:
+    """행 번호 순서로 저장한 리플렉션 필드의 열 배열.
+
+    판정·사용 통계 필드는 numpy 배열, 텍스트 필드는 파이썬 리스트에 두고, Reflection
+    객체는 검색 결과 등으로 실제로 필요해질 때 record(row)로 만든다. 검색 필터는 행 전체에
+    대한 벡터 연산 한 번으로 불리언 마스크가 되어 faiss 선택자로 인덱스 스캔 안에서 적용된다.
+    """
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> "ReflectionColumns":
+        """arrays()로 내보낸 숫자 열로 만든다. 텍스트 열은 비어 있으므로 record는 쓸 수 없다."""
+        columns = cls()
+        columns.size = len(arrays["live"])
+        for name, dtype in _NUMERIC_COLUMNS:
+            setattr(columns, name, np.asarray(arrays[name], dtype=dtype))
+        columns.pattern_names = [str(name) for name in arrays["pattern_names"]]
+        columns.pattern_codes = {name: i for i, name in enumerate(columns.pattern_names)}
+        return columns
+
+    def __init__(self):
+        self.size = 0
+        for name, dtype in _NUMERIC_COLUMNS:
+            setattr(self, name, np.zeros(0, dtype))
+        self.task: list[Optional[str]] = []
+        self.reflection: list[Optional[str]] = []
+        self.reasons: list[Optional[list[str]]] = []
+        self.pattern_codes: dict[str, int] = {}
+        self.pattern_names: list[str] = []
+
+    def append(self, item: Optional[dict]) -> None:
+        """다음 행을 추가한다. item은 StoredReflection.model_dump() 형식이며 None은 무효화된 행이다."""
+        if self.size == len(self.live):
+            self._grow(max(16, 2 * self.size))
+        self.size += 1
+        self.task.append(None)
+        self.reflection.append(None)
+        self.reasons.append(None)
+        if item is not None:
+            self.set(self.size - 1, item)
+
+    def set(self, row: int, item: dict) -> None:
+        judgment = item["judgment"]
+        self.live[row] = True
+        self.task[row] = item["task"]
+        self.reflection[row] = item["reflection"]
+        self.reasons[row] = judgment["reasons"]
+        self.needs_retry[row] = judgment["needs_retry"]
+        self.confidence[row] = judgment["confidence"]
+        self.pattern[row] = self._pattern_code(item.get("pattern", ""))
+        self.hits[row] = item.get("hits", 1)
+        self.created_at[row] = item.get("created_at", 0.0)
+        self.last_used_at[row] = item.get("last_used_at", 0.0)
+
+    def record(self, row: int, reflection_id: str) -> dict:
+        """행을 StoredReflection.model_dump()와 같은 형식의 dict로 만든다."""
+        return {
+            "id": reflection_id,
+            "task": self.task[row],
+            "reflection": self.reflection[row],
+            "judgment": {
+                "needs_retry": bool(self.needs_retry[row]),
+                "confidence": float(self.confidence[row]),
+                "reasons": list(self.reasons[row]),
+            },
+            "pattern": self.pattern_names[self.pattern[row]],
+            "hits": int(self.hits[row]),
+            "created_at": float(self.created_at[row]),
+            "last_used_at": float(self.last_used_at[row]),
+        }
+
+    def records(self, row_ids: list[Optional[str]]) -> list[Optional[dict]]:
+        """row_ids 순서로 record를 만든다. ID가 None인 행(삭제된 행)은 None이다."""
+        return [
+            self.record(row, reflection_id) if reflection_id is not None else None
+            for row, reflection_id in enumerate(row_ids)
+        ]
+
+    def copy(self) -> "ReflectionColumns":
+        """현재 행들의 사본. 숫자 열은 배열 복사, 텍스트 열은 참조만 복사하므로 잠금 아래에서도 싸다."""
+        columns = ReflectionColumns()
+        columns.size = self.size
+        for name, _ in _NUMERIC_COLUMNS:
+            setattr(columns, name, getattr(self, name)[: self.size].copy())
+        columns.task = self.task[: self.size]
+        columns.reflection = self.reflection[: self.size]
+        columns.reasons = self.reasons[: self.size]
+        columns.pattern_codes = dict(self.pattern_codes)
+        columns.pattern_names = list(self.pattern_names)
+        return columns
+
+    def remove(self, rows: list[int]) -> None:
+        self.live[rows] = False
+        for row in rows:
+            # 텍스트는 더 이상 필요 없으므로 바로 놓아 준다
+            self.task[row] = self.reflection[row] = self.reasons[row] = None
+
+    def arrays(self, rows: np.ndarray) -> dict[str, np.ndarray]:
+        """지정한 행들의 숫자 열 사본 (스냅샷과 함께 저장해 복제본이 파싱 없이 필터를 적용한다)."""
+        arrays = {name: getattr(self, name)[rows] for name, _ in _NUMERIC_COLUMNS}
+        arrays["pattern_names"] = np.array(self.pattern_names, dtype=str)
+        return arrays
+
+    def touch(self, rows: np.ndarray, now: float) -> None:
+        self.last_used_at[rows] = now
+
+    def mask(self, filter: ReflectionFilter) -> np.ndarray:
+        mask = self.live[: self.size].copy()
+        if filter.needs_retry is not None:
+            mask &= self.needs_retry[: self.size] == filter.needs_retry
+        if filter.min_confidence is not None:
+            mask &= self.confidence[: self.size] >= filter.min_confidence
+        if filter.patterns is not None:
+            codes = [self.pattern_codes[p] for p in filter.patterns if p in self.pattern_codes]
+            mask &= np.isin(self.pattern[: self.size], codes)
+        if filter.max_age_seconds is not None:
+            mask &= self.created_at[: self.size] >= time.time() - filter.max_age_seconds
+        return mask
+
+    def _pattern_code(self, pattern: str) -> int:
+        if pattern not in self.pattern_codes:
+            self.pattern_codes[pattern] = len(self.pattern_names)
+            self.pattern_names.append(pattern)
+        return self.pattern_codes[pattern]
+
+    def _grow(self, capacity: int) -> None:
+        for name, _ in _NUMERIC_COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, column.dtype)
+            grown[: self.size] = column[: self.size]
+            setattr(self, name, grown)
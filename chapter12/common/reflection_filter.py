@@ -0,0 +1,14 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ReflectionFilter(BaseModel):
+    """리플렉션 검색 조건. None인 조건은 적용하지 않는다."""
+
+    needs_retry: Optional[bool] = None
+    min_confidence: Optional[float] = None
+    # 리플렉션을 만든 패턴 (예: self_reflection, cross_reflection)
+    patterns: Optional[list[str]] = None
+    max_age_seconds: Optional[float] = None
+
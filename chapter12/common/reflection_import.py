@@ -0,0 +1,227 @@
+import json
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+import numpy as np
+from common.local_embeddings import HashedNGramEmbeddings
+from common.reflection_columns import ReflectionColumns
+from common.reflection_manager import ReflectionManager, StoredReflection, create_embeddings
+from common.reflection_store import ReflectionStore
+from langchain_core.embeddings import Embeddings
+from settings import Settings
+
+settings = Settings()
+
+
+class ImportStats(NamedTuple):
+    imported: int
+    skipped: int  # 이미 저장소에 있는 ID
+    embed_calls: int
+    throttled: int  # rate limit으로 기다린 횟수
+    embed_s: float
+    write_s: float
+    index_s: float
+
+
+def read_jsonl(path: str) -> Iterator[dict]:
+    """리플렉션 JSONL 파일을 한 줄씩 읽는다. 파일 전체를 메모리에 올리지 않는다."""
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _is_rate_limit(error: Exception) -> bool:
+    # openai.RateLimitError 등은 HTTP 429 상태 코드를 갖는다
+    return getattr(error, "status_code", None) == 429 or "RateLimit" in type(error).__name__
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Embedder:
+    """배치 임베딩 호출을 재시도한다. rate limit에 걸리면 모든 작업 스레드가 함께 쉰다."""
+
+    def __init__(self, embeddings: Embeddings, max_retries: int):
+        self.embeddings = embeddings
+        self.max_retries = max_retries
+        self.calls = 0
+        self.throttled = 0
+        self._pause_until = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self, texts: list[str]) -> np.ndarray:
+        attempt = 0
+        while True:
+            # 다른 스레드가 rate limit을 만났으면 그 대기가 끝날 때까지 새 요청을 보내지 않는다
+            delay = self._pause_until - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                with self._lock:
+                    self.calls += 1
+                if isinstance(self.embeddings, HashedNGramEmbeddings):
+                    return self.embeddings.embed_matrix(texts)
+                return np.asarray(self.embeddings.embed_documents(texts), dtype="float32")
+            except Exception as e:
+                attempt += 1
+                if attempt >= self.max_retries:
+                    raise
+                # 지수 백오프 + jitter. 서버가 Retry-After를 주면 그 값을 따른다
+                delay = _retry_after(e) or min(2**attempt, 30) * (0.5 + random.random())
+                if _is_rate_limit(e):
+                    with self._lock:
+                        self.throttled += 1
+                        self._pause_until = max(self._pause_until, time.monotonic() + delay)
+                else:
+                    time.sleep(delay)
+
+
+def import_reflections(
+    file_path: str,
+    records: Iterable[dict],
+    embeddings: Optional[Embeddings] = None,
+    batch_size: int = 256,
+    concurrency: int = 4,
+    max_retries: int = 8,
+    build_index: bool = True,
+) -> ImportStats:
+    """리플렉션 레코드를 대량으로 가져와 저장소를 한 번에 다시 쓴다.
+
+    records는 StoredReflection 필드(task, reflection, judgment 필수, id·pattern·hits 등 선택)를
+    가진 dict이며 "embedding"이 있으면 그대로 쓴다. 레코드를 batch_size개씩 읽어 최대
+    concurrency개의 임베딩 요청을 동시에 보내고, 요청이 그만큼 밀려 있으면 다음 레코드를 읽지
+    않으므로(backpressure) 입력 크기와 상관없이 대기 중인 배치 수가 제한된다. 임베딩이 끝나면
+    기존 리플렉션과 합쳐 새 세대의 스냅샷을 한 번만 쓰고(로그 없음), build_index이면
+    ReflectionManager로 열어 인덱스를 한 번 만든 뒤 체크포인트로 저장한다.
+
+    저장소를 쓰는 ReflectionManager가 없는 상태(배포 전 시딩 등)에서 호출해야 한다. 용량
+    (reflection_capacity)을 지정했고 그보다 많이 가져오면 다음 저장 때 eviction_policy에
+    따라 줄어든다.
+    """
+    embeddings = embeddings or create_embeddings()
+    store = ReflectionStore(file_path, fsync="never", dtype=settings.reflection_snapshot_dtype)
+    # 기존 스냅샷(mmap)은 그대로 두고 새 행만 뒤에 붙인다
+    items, matrix = store.load()
+    known = {item["id"] for item in items if item is not None}
+    embedder = _Embedder(embeddings, max_retries)
+    imported = skipped = 0
+    now = time.time()
+
+    def batches() -> Iterator[tuple[list[dict], list[Optional[list[float]]]]]:
+        nonlocal skipped
+        batch: list[dict] = []
+        vectors: list[Optional[list[float]]] = []
+        for record in records:
+            record = dict(record)
+            vector = record.pop("embedding", None)
+            record.setdefault("id", str(uuid.uuid4()))
+            if record["id"] in known:
+                skipped += 1
+                continue
+            known.add(record["id"])
+            record.setdefault("created_at", now)
+            record.setdefault("last_used_at", record["created_at"])
+            batch.append(StoredReflection(**record).model_dump())
+            vectors.append(vector)
+            if len(batch) == batch_size:
+                yield batch, vectors
+                batch, vectors = [], []
+        if batch:
+            yield batch, vectors
+
+    def embed(batch: list[dict], vectors: list[Optional[list[float]]]) -> np.ndarray:
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if not missing:
+            return np.asarray(vectors, dtype="float32")
+        computed = embedder([batch[i]["reflection"] for i in missing])
+        if len(missing) == len(vectors):
+            return computed
+        result = np.empty((len(vectors), computed.shape[1]), "float32")
+        result[missing] = computed
+        for i, vector in enumerate(vectors):
+            if vector is not None:
+                result[i] = vector
+        return result
+
+    def collect(batch: list[dict], future: Future) -> None:
+        nonlocal imported
+        matrix.extend(future.result())
+        items.extend(batch)
+        imported += len(batch)
+
+    start = time.perf_counter()
+    in_flight: deque[tuple[list[dict], Future]] = deque()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for batch, vectors in batches():
+            if len(in_flight) >= concurrency:
+                # 가장 오래된 요청이 끝나야 다음 배치를 읽는다. 결과도 입력 순서대로 붙는다
+                collect(*in_flight.popleft())
+            in_flight.append((batch, pool.submit(embed, batch, vectors)))
+        while in_flight:
+            collect(*in_flight.popleft())
+    embed_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = ReflectionColumns()
+    for item in items:
+        columns.append(item)
+    live_rows = np.flatnonzero(columns.live[: columns.size])
+    store.compact(items, matrix, columns=columns.arrays(live_rows))
+    store.close()
+    write_s = time.perf_counter() - start
+
+    index_s = 0.0
+    if build_index:
+        start = time.perf_counter()
+        manager = ReflectionManager(file_path=file_path, embeddings=embeddings)
+        manager.checkpoint_index()
+        manager.store.close()
+        index_s = time.perf_counter() - start
+    return ImportStats(
+        imported, skipped, embedder.calls, embedder.throttled, embed_s, write_s, index_s
+    )
+
+
+# main 함수: JSONL 파일의 리플렉션을 리플렉션 DB로 가져온다
+# 에이전트를 띄우기 전에 기존 코퍼스로 DB를 채워 두는 용도
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="JSONL 리플렉션 코퍼스를 배치 임베딩해 리플렉션 DB에 한 번에 가져옵니다"
+    )
+    parser.add_argument("source", help="가져올 JSONL 파일 (한 줄에 리플렉션 하나)")
+    parser.add_argument("--db", default=settings.default_reflection_db_path)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--no-index", action="store_true", help="인덱스 체크포인트를 만들지 않는다")
+    args = parser.parse_args()
+
+    stats = import_reflections(
+        args.db,
+        read_jsonl(args.source),
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        build_index=not args.no_index,
+    )
+    print(
+        f"{args.db}: {stats.imported}개 가져옴, {stats.skipped}개 건너뜀"
+        f" (임베딩 호출 {stats.embed_calls}회, rate limit 대기 {stats.throttled}회,"
+        f" 임베딩 {stats.embed_s:.1f}s, 쓰기 {stats.write_s:.1f}s, 인덱스 {stats.index_s:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+import math
+import os
+from typing import Literal, Optional
+
+import faiss
+import numpy as np
+from common.reflection_store import EmbeddingMatrix, write_atomically
+
+IndexBackend = Literal["flat", "hnsw", "ivf_flat", "ivf_pq"]
+Compression = Literal["none", "fp16", "int8", "pq"]
+
+_SQ_TYPES = {
+    "fp16": faiss.ScalarQuantizer.QT_fp16,
+    "int8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+
+class ReflectionIndex:
+    """리플렉션 임베딩 검색용 faiss 인덱스 래퍼.
+
+    벡터는 호출자가 지정한 int64 ID와 함께 IndexIDMap2에 저장되므로, 검색 결과의 ID로
+    바로 리플렉션을 찾을 수 있고 전체 재구축 없이 개별 벡터를 삭제할 수 있다.
+    저장된 벡터 수가 promotion_threshold 미만일 때는 정확한 IndexFlatL2를 쓰고,
+    임계값을 넘으면 설정된 근사 최근접 이웃(ANN) 인덱스로 한 번 승격한다.
+    IVF 계열의 학습은 승격 시점에 그때까지의 벡터로 자동 수행된다.
+
+    compression을 지정하면 승격된 인덱스가 벡터를 float16 / int8 스칼라 양자화 /
+    PQ 코드로 압축해 보관한다(backend가 flat이어도 임계값에서 압축 인덱스로 승격한다).
+    이때 검색 거리는 근삿값이므로 approximate가 True가 되며, 호출자는 원본 벡터로
+    후보를 다시 정렬(re-rank)할 수 있다.
+
+    vectors로 EmbeddingMatrix를 넘기면 승격 전의 정확한 검색은 faiss 인덱스에 벡터를
+    복사하지 않고 그 행렬을 직접 스캔한다. 이때 add에 넘기는 ID는 행렬의 행 번호여야 한다.
+
+    승격된 인덱스는 export / write로 파일에 저장하고 restore로 다시 열 수 있으므로,
+    프로세스를 시작할 때마다 전체 벡터를 다시 추가하거나 다시 학습하지 않아도 된다.
+    """
+
+    def __init__(
+        self,
+        backend: IndexBackend = "flat",
+        promotion_threshold: int = 10_000,
+        hnsw_m: int = 32,
+        hnsw_ef_search: int = 64,
+        ivf_nlist: int = 0,
+        ivf_nprobe: int = 16,
+        pq_m: int = 64,
+        compression: Compression = "none",
+        vectors: Optional[EmbeddingMatrix] = None,
+    ):
+        self.backend = backend
+        self.compression = compression
+        self.promotion_threshold = promotion_threshold
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_search = hnsw_ef_search
+        self.ivf_nlist = ivf_nlist
+        self.ivf_nprobe = ivf_nprobe
+        self.pq_m = pq_m
+        self.dim: Optional[int] = None
+        self.index: Optional[faiss.IndexIDMap2] = None
+        self.promoted = False
+        # HNSW는 개별 삭제를 지원하지 않고, IVF는 삭제 후 내부 번호를 다시 매기지 않아
+        # IndexIDMap2의 ID 매핑과 어긋나므로 삭제된 ID를 검색 시 선택자로 걸러낸다
+        self.tombstones: set[int] = set()
+        self._tombstone_selectors = None
+        # mmap으로 연 체크포인트 파일. 처음 변경될 때 메모리로 다시 읽는다
+        self._mmap_path: Optional[str] = None
+        # 공유 행렬 모드: 행별 유효 여부와 제곱 노름 (L2² = |x|² - 2q·x + |q|²)
+        self.vectors = vectors
+        self._live = np.zeros(0, bool)
+        self._norms = np.zeros(0, "float32")
+        self._count = 0
+
+    @property
+    def ntotal(self) -> int:
+        if self.index is None:
+            return self._count
+        return self.index.ntotal - len(self.tombstones)
+
+    @property
+    def approximate(self) -> bool:
+        """저장된 벡터가 압축되어 검색 거리가 근삿값인지 여부."""
+        return self.promoted and (self.compression != "none" or self.backend == "ivf_pq")
+
+    @property
+    def inner(self) -> faiss.Index:
+        """IndexIDMap2가 감싸고 있는 실제 인덱스."""
+        return faiss.downcast_index(self.index.index)
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        self._ensure_writable()
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        ids = np.ascontiguousarray(ids, dtype="int64")
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        if self.index is None and self.vectors is None:
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(self.dim))
+
+        if (
+            self.promoted
+            or (self.backend == "flat" and self.compression == "none")
+            or self.ntotal + len(vectors) < self.promotion_threshold
+        ):
+            if self.index is None:
+                self._add_shared(vectors, ids)
+            else:
+                self.index.add_with_ids(vectors, ids)
+            return
+
+        if self.index is None and self._count:
+            stored_ids = np.flatnonzero(self._live)
+            vectors = np.vstack([self.vectors.take(stored_ids), vectors])
+            ids = np.concatenate([stored_ids, ids])
+        elif self.index is not None and self.index.ntotal:
+            inner = self.inner
+            vectors = np.vstack([inner.reconstruct_n(0, inner.ntotal), vectors])
+            ids = np.concatenate([faiss.vector_to_array(self.index.id_map), ids])
+        self._promote(vectors, ids)
+        self._live, self._norms, self._count = np.zeros(0, bool), np.zeros(0, "float32"), 0
+
+    def remove(self, ids: list[int]) -> None:
+        if self.index is None:
+            ids = np.asarray(ids, dtype="int64")
+            self._count -= int(self._live[ids].sum())
+            self._live[ids] = False
+            return
+        if not isinstance(self.inner, faiss.IndexFlatCodes):
+            # 행을 당겨 번호를 다시 매기는 flat 계열만 실제로 삭제한다
+            self.tombstones.update(ids)
+            self._update_tombstone_selectors()
+        else:
+            self._ensure_writable()
+            self.index.remove_ids(np.asarray(ids, dtype="int64"))
+
+    def ids(self) -> np.ndarray:
+        """인덱스에 들어 있는(삭제되지 않은) ID 목록."""
+        if self.index is None:
+            return np.flatnonzero(self._live)
+        ids = faiss.vector_to_array(self.index.id_map)
+        if self.tombstones:
+            ids = ids[~np.isin(ids, np.fromiter(self.tombstones, dtype="int64"))]
+        return ids
+
+    def export(self, remap: np.ndarray) -> Optional[tuple[faiss.Index, dict]]:
+        """승격된 인덱스의 사본과 복원에 필요한 정보를 반환한다 (승격 전이면 None).
+
+        remap은 현재 ID → 저장할 ID 배열이며, 음수는 더 이상 유효하지 않은 ID다.
+        삭제 표시로 남아 있는 그런 벡터에는 서로 다른 음수 ID를 주고 삭제 표시로 기록한다.
+        """
+        if self.index is None or not self.promoted:
+            return None
+        self._ensure_writable()
+        index = faiss.clone_index(self.index)
+        ids = faiss.vector_to_array(index.id_map)
+        # 복원한 체크포인트에서 이미 삭제 표시된 벡터는 음수 ID를 가진다. 음수로 remap을 색인하면
+        # 배열 끝에서부터 세어 살아 있는 행으로 바뀌므로, remap 전에 삭제 표시와 함께 걸러 낸다
+        dead = ids < 0
+        if self.tombstones:
+            dead |= np.isin(ids, np.fromiter(self.tombstones, dtype="int64"))
+        new_ids = np.full_like(ids, -1)
+        new_ids[~dead] = remap[ids[~dead]]
+        dead |= new_ids < 0
+        # 이전 세대의 음수 ID와 겹치지 않도록 삭제 표시된 벡터에 새로 음수 ID를 매긴다
+        new_ids[dead] = -2 - np.arange(int(dead.sum()), dtype="int64")
+        faiss.copy_array_to_vector(new_ids, index.id_map)
+        index.construct_rev_map()
+        info = {
+            "backend": self.backend,
+            "compression": self.compression,
+            "dim": self.dim,
+            "tombstones": new_ids[dead].tolist(),
+        }
+        return index, info
+
+    @staticmethod
+    def write(index: faiss.Index, path: str) -> None:
+        # 쓰다가 중단되어도 이전 파일이 남도록 고유한 임시 파일에 쓴 뒤 교체한다
+        write_atomically(path, lambda tmp_path: faiss.write_index(index, tmp_path))
+
+    def restore(self, path: str, info: dict, mmap: bool = False) -> bool:
+        """export / write로 저장한 인덱스를 연다. 설정이 달라 쓸 수 없으면 False를 반환한다.
+
+        mmap=True이면 IO_FLAG_MMAP으로 열어 벡터를 바로 읽지 않으며, 처음 add나
+        remove가 필요할 때 파일을 메모리로 다시 읽는다.
+        """
+        if (
+            info.get("backend") != self.backend
+            or info.get("compression") != self.compression
+            or not os.path.exists(path)
+        ):
+            return False
+        index = faiss.read_index(path, faiss.IO_FLAG_MMAP if mmap else 0)
+        self.index = index
+        self.dim = self.index.d
+        self.promoted = True
+        self.tombstones = set(info.get("tombstones", []))
+        self._update_tombstone_selectors()
+        self._mmap_path = path if mmap else None
+        self._configure_search()
+        return True
+
+    def search(
+        self, queries: np.ndarray, k: int, mask: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """검색 결과의 I에는 add 시 지정한 ID가 담긴다 (결과가 k개 미만이면 -1).
+
+        mask는 ID로 색인한 불리언 배열이며, True인 ID만 인덱스 스캔 중에 후보가 된다.
+        삭제된 ID는 mask에서 False여야 한다.
+        """
+        queries = np.ascontiguousarray(queries, dtype="float32")
+        if self.index is None:
+            return self._search_shared(queries, k, mask)
+        keepalive, params = self._search_params(mask)
+        if params is None:
+            return self.index.search(queries, k)
+        return self.index.search(queries, k, params=params)
+
+    def range_search(
+        self, queries: np.ndarray, radius: float, mask: Optional[np.ndarray] = None
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """L2² 거리가 radius 미만인 모든 벡터를 쿼리별 (D, I)로 거리 순으로 반환한다."""
+        queries = np.ascontiguousarray(queries, dtype="float32")
+        if self.index is None:
+            return self._range_search_shared(queries, radius, mask)
+        keepalive, params = self._search_params(mask)
+        if params is None:
+            lims, D, I = self.index.range_search(queries, radius)
+        else:
+            lims, D, I = self.index.range_search(queries, radius, params=params)
+        results = []
+        for q in range(len(queries)):
+            order = np.argsort(D[lims[q] : lims[q + 1]])
+            results.append((D[lims[q] : lims[q + 1]][order], I[lims[q] : lims[q + 1]][order]))
+        return results
+
+    def _add_shared(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        size = int(ids.max()) + 1 if len(ids) else 0
+        if size > len(self._live):
+            capacity = max(size, 16, 2 * len(self._live))
+            self._live = np.concatenate([self._live, np.zeros(capacity - len(self._live), bool)])
+            self._norms = np.concatenate(
+                [self._norms, np.zeros(capacity - len(self._norms), "float32")]
+            )
+        self._count += len(ids) - int(self._live[ids].sum())
+        self._live[ids] = True
+        self._norms[ids] = np.einsum("ij,ij->i", vectors, vectors)
+
+    def _shared_distances(self, queries: np.ndarray, mask: Optional[np.ndarray]):
+        # 공유 행렬을 블록 단위로 스캔하며 (시작 행, 거리 블록)을 돌려준다. 제외된 행은 inf
+        query_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+        for start, block in self.vectors.blocks():
+            end = min(start + len(block), len(self._live))
+            if end <= start:
+                break
+            live = self._live[start:end]
+            if mask is not None:
+                live = live & mask[start:end]
+            if not live.any():
+                continue
+            distances = self._norms[start:end] - 2 * queries @ block[: end - start].T
+            distances += query_norms
+            distances[:, ~live] = np.inf
+            yield start, distances
+
+    def _search_shared(
+        self, queries: np.ndarray, k: int, mask: Optional[np.ndarray]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        D = np.full((len(queries), k), np.inf, "float32")
+        I = np.full((len(queries), k), -1, "int64")
+        for start, distances in self._shared_distances(queries, mask):
+            # 블록별 상위 k개를 지금까지의 상위 k개와 합쳐 다시 고른다
+            top = np.argpartition(distances, min(k, distances.shape[1]) - 1, axis=1)[:, :k]
+            D = np.hstack([D, np.take_along_axis(distances, top, axis=1)])
+            I = np.hstack([I, top + start])
+            order = np.argsort(D, axis=1)[:, :k]
+            D, I = np.take_along_axis(D, order, axis=1), np.take_along_axis(I, order, axis=1)
+        I[np.isinf(D)] = -1
+        return D, I
+
+    def _range_search_shared(
+        self, queries: np.ndarray, radius: float, mask: Optional[np.ndarray]
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        found = [([], []) for _ in queries]
+        for start, distances in self._shared_distances(queries, mask):
+            for q, row in enumerate(distances):
+                hits = np.flatnonzero(row < radius)
+                found[q][0].append(row[hits])
+                found[q][1].append(hits + start)
+        results = []
+        for D, I in found:
+            D = np.concatenate(D) if D else np.zeros(0, "float32")
+            I = np.concatenate(I) if I else np.zeros(0, "int64")
+            order = np.argsort(D)
+            results.append((D[order], I[order]))
+        return results
+
+    def _update_tombstone_selectors(self) -> None:
+        if not self.tombstones:
+            self._tombstone_selectors = None
+            return
+        batch = faiss.IDSelectorBatch(np.fromiter(self.tombstones, dtype="int64"))
+        # IDSelectorNot은 내부 선택자를 소유하지 않으므로 둘 다 참조를 유지한다
+        self._tombstone_selectors = (batch, faiss.IDSelectorNot(batch))
+
+    def _ensure_writable(self) -> None:
+        # mmap으로 연 인덱스(IVF는 읽기 전용)는 변경 전에 메모리로 다시 읽는다
+        if self._mmap_path is not None:
+            self.index = faiss.read_index(self._mmap_path)
+            self._mmap_path = None
+            self._configure_search()
+
+    def _configure_search(self) -> None:
+        # 검색 파라미터는 파일에서 읽은 값 대신 현재 설정을 따른다
+        inner = self.inner
+        if isinstance(inner, faiss.IndexHNSW):
+            inner.hnsw.efSearch = self.hnsw_ef_search
+        elif isinstance(inner, faiss.IndexIVF):
+            inner.nprobe = min(self.ivf_nprobe, inner.nlist)
+
+    def _search_params(self, mask: Optional[np.ndarray]):
+        # 선택자와 비트맵 배열은 검색이 끝날 때까지 살아 있어야 하므로 함께 반환한다
+        if mask is not None:
+            bitmap = np.packbits(mask, bitorder="little")
+            selectors = (faiss.IDSelectorBitmap(len(mask), faiss.swig_ptr(bitmap)),)
+        elif self.tombstones:
+            bitmap, selectors = None, self._tombstone_selectors
+        else:
+            return None, None
+
+        sel = selectors[-1]
+        inner = self.inner
+        if isinstance(inner, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(sel=sel, efSearch=self.hnsw_ef_search)
+        elif isinstance(inner, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF(sel=sel, nprobe=inner.nprobe)
+        else:
+            params = faiss.SearchParameters(sel=sel)
+        return (bitmap, selectors), params
+
+    def _promote(self, vectors: np.ndarray, ids: np.ndarray) -> None:
+        index = self._create(len(vectors))
+        if not index.is_trained:
+            index.train(vectors)
+        self.index = faiss.IndexIDMap2(index)
+        self.index.add_with_ids(vectors, ids)
+        self.promoted = True
+
+    def _create(self, n: int) -> faiss.Index:
+        if self.backend == "hnsw":
+            if self.compression in _SQ_TYPES:
+                index = faiss.IndexHNSWSQ(
+                    self.dim, _SQ_TYPES[self.compression], self.hnsw_m
+                )
+            elif self.compression == "pq":
+                index = faiss.IndexHNSWPQ(
+                    self.dim, self._checked_pq_m(), self.hnsw_m, self._pq_nbits(n)
+                )
+            else:
+                index = faiss.IndexHNSWFlat(self.dim, self.hnsw_m)
+            index.hnsw.efSearch = self.hnsw_ef_search
+            return index
+
+        if self.backend == "flat":
+            if self.compression in _SQ_TYPES:
+                return faiss.IndexScalarQuantizer(self.dim, _SQ_TYPES[self.compression])
+            # IndexPQ는 ID 선택자를 지원하지 않으므로 리스트 하나짜리 IVFPQ로 전수 스캔한다
+            nlist = 1
+        else:
+            # 클러스터당 학습 점이 최소 39개는 되도록 nlist를 제한한다 (faiss 권장)
+            nlist = self.ivf_nlist or int(4 * math.sqrt(n))
+            nlist = max(1, min(nlist, n // 39))
+        quantizer = faiss.IndexFlatL2(self.dim)
+        if self.backend == "ivf_pq" or self.compression == "pq":
+            index = faiss.IndexIVFPQ(
+                quantizer, self.dim, nlist, self._checked_pq_m(), self._pq_nbits(n)
+            )
+        elif self.backend == "ivf_flat" and self.compression in _SQ_TYPES:
+            index = faiss.IndexIVFScalarQuantizer(
+                quantizer, self.dim, nlist, _SQ_TYPES[self.compression]
+            )
+        elif self.backend == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, self.dim, nlist)
+        else:
+            raise ValueError(f"알 수 없는 인덱스 백엔드입니다: {self.backend}")
+        index.nprobe = min(self.ivf_nprobe, nlist)
+        return index
+
+    def _checked_pq_m(self) -> int:
+        if self.dim % self.pq_m:
+            raise ValueError(
+                f"pq_m({self.pq_m})은 임베딩 차원({self.dim})의 약수여야 합니다"
+            )
+        return self.pq_m
+
+    @staticmethod
+    def _pq_nbits(n: int) -> int:
+        # 코드북 학습 점이 부족하면 서브 양자화기 비트 수를 줄인다
+        return 8 if n >= 256 * 39 else max(1, int(math.log2(max(2, n // 39))))
@@ -0,0 +1,164 @@
+import logging
+import re
+from typing import Optional
+
+from common.llm_cache import component_llm
+from common.reflection_lexical import tokenize
+from common.reflection_manager import ReflectionJudgment
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_openai import ChatOpenAI
+from settings import Settings
+
+settings = Settings()
+
+logger = logging.getLogger(__name__)
+
+# 답변 거절·도구 실패를 나타내는 표현 (한국어·영어)
+_REFUSAL = re.compile(
+    r"(죄송|할 수 없|수 없습니다|답변(을|할) 수|i'?m sorry|i cannot|i can'?t|unable to|as an ai)",
+    re.IGNORECASE,
+)
+_TOOL_ERROR = re.compile(
+    r"(traceback \(most recent call last\)|error:|exception:|rate limit|timed? ?out|"
+    r"오류가 발생|에러가 발생|검색 결과가 없|찾을 수 없)",
+    re.IGNORECASE,
+)
+
+
+# 이 길이 이하의 결과가 첫 문장부터 거절·오류 표현이면 답변 전체가 거절·오류인 것으로 본다
+_WHOLE_ANSWER_CHARS = 200
+_FIRST_SENTENCE = re.compile(r"^[^.!?。\n]*")
+# 긴 결과 중간에 거절·오류 표현이 있을 때의 자신감. 정상 답변도 "확인할 수 없습니다" 같은 문장을
+# 포함할 수 있으므로, 기본 임계값(reflection_judge_confidence)보다 낮게 두어 빠른 모델이 판정하게 한다
+_PATTERN_ONLY_CONFIDENCE = 0.5
+# 텍스트만으로는 답변이 맞는지 알 수 없으므로 '재시도 불필요' 판정의 자신감은 이 값을 넘지 않게 해
+# 항상 빠른 모델이 판정하게 한다. 휴리스틱에서 끝나는 것은 확실한 재시도 판정뿐이다
+_NO_RETRY_MAX_CONFIDENCE = 0.5
+
+
+def heuristic_judgment(task: str, result: str) -> ReflectionJudgment:
+    """LLM 호출 없이 결과 텍스트만 보고 재시도 여부와 그 자신감을 정한다.
+
+    비어 있거나 매우 짧은 결과와, 짧은 결과 전체가 거절·도구 오류인 경우는 높은 자신감으로
+    재시도로 판정한다. 긴 결과에 거절·오류 표현이 섞여 있으면 재시도로 판정하되 자신감을 낮춰
+    다음 단계로 넘긴다. 그 밖에는 '재시도 불필요'로 판정하고, 결과가 길고 태스크의 단어를 많이
+    다룰수록 자신감을 높이되 _NO_RETRY_MAX_CONFIDENCE를 넘기지 않는다.
+    """
+    text = result.strip()
+    if len(text) < 40:
+        return ReflectionJudgment(
+            needs_retry=True, confidence=0.95, reasons=["결과가 비어 있거나 너무 짧음"]
+        )
+    first_sentence = _FIRST_SENTENCE.match(text).group() if len(text) <= _WHOLE_ANSWER_CHARS else ""
+    head = text[:400]
+    for pattern, reason, confidence in (
+        (_REFUSAL, "답변을 거절하거나 회피함", 0.9),
+        (_TOOL_ERROR, "도구 실행 오류가 결과에 나타남", 0.85),
+    ):
+        if first_sentence and pattern.search(first_sentence):
+            return ReflectionJudgment(needs_retry=True, confidence=confidence, reasons=[reason])
+        if pattern.search(head):
+            return ReflectionJudgment(
+                needs_retry=True,
+                confidence=_PATTERN_ONLY_CONFIDENCE,
+                reasons=[f"{reason} (긴 결과의 일부 표현만으로 판단)"],
+            )
+    task_terms = set(tokenize(task))
+    coverage = len(task_terms & set(tokenize(text))) / len(task_terms) if task_terms else 0.0
+    # 길이(최대 0.2)와 태스크 단어 포함률(최대 0.4)로 매긴 점수(0.4~1)를 상한에 맞춰 줄인다
+    score = 0.4 + 0.2 * min(1.0, len(text) / 1500) + 0.4 * coverage
+    confidence = _NO_RETRY_MAX_CONFIDENCE * score
+    return ReflectionJudgment(
+        needs_retry=False,
+        confidence=round(confidence, 3),
+        reasons=[f"결과 길이 {len(text)}자, 태스크 단어 포함률 {coverage:.0%}"],
+    )
+
+
+class CascadeJudge:
+    """저렴한 판정부터 시도하고, 자신감이 낮을 때만 다음 단계로 넘기는 재시도 판정기.
+
+    1) heuristic_judgment, 2) 빠른 모델(llm)의 ReflectionJudgment 구조화 출력 순으로 판정해
+    confidence가 threshold 이상이면 그 판정을 쓴다. 둘 다 자신이 없으면 None을 반환하고,
+    호출 측(TaskReflector)이 고성능 모델로 리플렉션 전체를 생성한다. 빠른 모델에는 결과의
+    앞뒤 max_result_chars자만 보낸다.
+    """
+
+    def __init__(
+        self,
+        llm: Optional[BaseChatModel] = None,
+        threshold: float = settings.reflection_judge_confidence,
+        max_result_chars: int = settings.reflection_judge_max_result_chars,
+    ):
+        self.llm = (
+            component_llm(llm, "CascadeJudge").with_structured_output(
+                ReflectionJudgment, strict=False
+            )
+            if llm
+            else None
+        )
+        self.threshold = threshold
+        self.max_result_chars = max_result_chars
+        # 단계별로 판정을 끝낸 횟수 (escalated는 고성능 모델로 넘긴 횟수)
+        self.stats = {"heuristic": 0, "fast": 0, "escalated": 0}
+
+    def judge(self, task: str, result: str) -> Optional[ReflectionJudgment]:
+        judgment = heuristic_judgment(task, result)
+        if judgment.confidence >= self.threshold:
+            self.stats["heuristic"] += 1
+            return judgment
+        if self.llm is not None:
+            try:
+                judgment = self._chain().invoke(self._inputs(task, result))
+            except Exception as e:
+                logger.warning("Error judging task result with the fast model: %s", e)
+            else:
+                if judgment.confidence >= self.threshold:
+                    self.stats["fast"] += 1
+                    return judgment
+        self.stats["escalated"] += 1
+        return None
+
+    async def ajudge(self, task: str, result: str) -> Optional[ReflectionJudgment]:
+        """judge의 비동기 버전. 빠른 모델은 ainvoke로 호출한다."""
+        judgment = heuristic_judgment(task, result)
+        if judgment.confidence >= self.threshold:
+            self.stats["heuristic"] += 1
+            return judgment
+        if self.llm is not None:
+            try:
+                judgment = await self._chain().ainvoke(self._inputs(task, result))
+            except Exception as e:
+                logger.warning("Error judging task result with the fast model: %s", e)
+            else:
+                if judgment.confidence >= self.threshold:
+                    self.stats["fast"] += 1
+                    return judgment
+        self.stats["escalated"] += 1
+        return None
+
+    def _chain(self):
+        prompt = ChatPromptTemplate.from_template(
+            "태스크:\n{task}\n\n"
+            "태스크 실행 결과(일부):\n{result}\n\n"
+            "실행 결과가 태스크에 대한 적절한 답변인지 판정하세요.\n"
+            "- needs_retry: 부적절하여 재시도가 필요하면 true\n"
+            "- confidence: 판정에 대한 자신감 (0~1). 확실하지 않으면 낮게 표시하세요.\n"
+            "- reasons: 판정 이유를 짧게 나열\n"
+            "반드시 한국어로 출력하세요."
+        )
+        return prompt | self.llm
+
+    def _inputs(self, task: str, result: str) -> dict:
+        limit = self.max_result_chars
+        if len(result) > limit:
+            result = f"{result[: limit // 2]}\n...\n{result[-limit // 2 :]}"
+        return {"task": task, "result": result}
+
+
+def create_judge() -> CascadeJudge:
+    """설정의 빠른 모델(openai_fast_model)을 2단계 판정에 쓰는 CascadeJudge를 만든다."""
+    return CascadeJudge(
+        ChatOpenAI(model=settings.openai_fast_model, temperature=settings.temperature)
+    )
@@ -0,0 +1,210 @@
+import math
+import re
+from array import array
+from collections import Counter
+from collections.abc import Hashable
+from typing import Optional, TypeVar
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+
+T = TypeVar("T", bound=Hashable)
+
+
+def tokenize(text: str) -> list[str]:
+    """소문자 단어 토큰. 한국어처럼 조사가 붙는 비ASCII 단어는 글자 bigram도 함께 넣는다.
+
+    "카레라이스를"과 "카레라이스"처럼 어미만 다른 단어가 bigram으로 겹치게 된다.
+    """
+    tokens = []
+    for word in _WORD.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2 and not word.isascii():
+            tokens.extend(word[i : i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def reciprocal_rank_fusion(rankings: list[list[T]], k: int = 60) -> list[T]:
+    """여러 검색 결과의 순위를 합친다. 각 결과에서 rank번째 항목은 1 / (rank + k)점을 받는다."""
+    scores: dict[T, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            scores[row] = scores.get(row, 0.0) + 1 / (rank + k)
+    return sorted(scores, key=scores.__getitem__, reverse=True)
+
+
+class _Postings:
+    """한 단어의 포스팅 목록 (행 번호, 단어 빈도).
+
+    추가는 array.array에 하고, 검색은 np.frombuffer로 복사 없이 numpy 배열로 본다.
+    """
+
+    __slots__ = ("rows", "tfs", "removals")
+
+    def __init__(self):
+        self.rows = array("q")
+        self.tfs = array("f")
+        # 삭제된 행을 마지막으로 걸러 낸 시점의 LexicalIndex.removals
+        self.removals = 0
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        return np.frombuffer(self.rows, dtype="int64"), np.frombuffer(self.tfs, dtype="float32")
+
+
+class LexicalIndex:
+    """리플렉션 텍스트의 BM25 역색인. 행 번호는 ReflectionManager의 행 번호와 같다.
+
+    행을 추가할 때마다 포스팅에 덧붙이고, 삭제된 행은 표시만 해 두었다가 그 단어가 다음에
+    검색될 때 포스팅에서 지운다(문서 수·평균 길이는 살아 있는 행 기준). 삭제된 행 수(dead)가
+    살아 있는 문서 수를 넘으면 호출 측이 다시 만든다.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, common_df: float = 0.05):
+        self.k1 = k1
+        self.b = b
+        self.common_df = common_df
+        self.terms: dict[str, _Postings] = {}
+        self.doc_len = np.zeros(0, dtype="float32")
+        self.live = np.zeros(0, dtype=bool)
+        # 살아 있는 문서 수와 그 토큰 수 합, 포스팅에 남아 있는 삭제된 문서 수
+        self.docs = 0
+        self.total_len = 0.0
+        self.dead = 0
+        # remove가 실제로 행을 지운 횟수. 포스팅은 검색할 때 이 값을 보고 삭제된 행을 걸러 낸다
+        self.removals = 0
+
+    def add(self, row: int, text: str) -> None:
+        if row >= len(self.live):
+            size = max(16, 2 * len(self.live), row + 1)
+            self.doc_len = np.resize(self.doc_len, size)
+            self.live = np.resize(self.live, size)
+            self.doc_len[row:] = 0
+            self.live[row:] = False
+        tokens = tokenize(text)
+        for term, tf in Counter(tokens).items():
+            postings = self.terms.get(term)
+            if postings is None:
+                postings = self.terms[term] = _Postings()
+            postings.rows.append(row)
+            postings.tfs.append(tf)
+        self.doc_len[row] = len(tokens)
+        self.live[row] = True
+        self.docs += 1
+        self.total_len += len(tokens)
+
+    def remove(self, rows: list[int]) -> None:
+        rows = np.asarray(rows, dtype="int64")
+        rows = rows[rows < len(self.live)]
+        rows = rows[self.live[rows]]
+        self.live[rows] = False
+        self.docs -= len(rows)
+        self.total_len -= float(self.doc_len[rows].sum())
+        self.dead += len(rows)
+        if len(rows):
+            self.removals += 1
+
+    def search(
+        self, query: str, k: int, mask: Optional[np.ndarray] = None
+    ) -> list[int]:
+        """BM25 점수가 높은 순서로 행 번호를 최대 k개 반환한다. mask가 있으면 True인 행만 본다.
+
+        흔한 단어는 포스팅이 길지만 점수에 주는 몫(최대 idf * (k1 + 1))이 작다. MaxScore처럼
+        드문 단어부터 점수를 매기다가, 남은 단어의 최대 기여분을 모두 더해도 지금의 k번째
+        점수에 못 미치면 멈추고, 남은 후보에만 나머지 단어의 점수를 포스팅 이진 탐색으로
+        더한다. 결과는 모든 단어로 점수를 매긴 것과 같다.
+        """
+        if not self.docs:
+            return []
+        avg_len = self.total_len / self.docs
+        entries = []
+        for term in set(tokenize(query)):
+            postings = self.terms.get(term)
+            if postings is None:
+                continue
+            rows, tfs = self._live_postings(postings)
+            if not len(rows):
+                continue
+            # 문서 빈도는 필터와 상관없이 살아 있는 전체 문서 기준으로 센다
+            idf = math.log(1 + (self.docs - len(rows) + 0.5) / (len(rows) + 0.5))
+            entries.append((idf, rows, tfs))
+        if not entries:
+            return []
+        entries.sort(key=lambda entry: -entry[0])
+        bounds = np.cumsum([idf * (self.k1 + 1) for idf, _, _ in entries][::-1])[::-1]
+
+        rows = np.zeros(0, dtype="int64")
+        scores = np.zeros(0, dtype="float64")
+        for split, (idf, term_rows, tfs) in enumerate(entries):
+            if split and len(rows) >= k:
+                kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+                if kth >= bounds[split]:
+                    break
+            if len(rows) + len(term_rows) > len(self.live) // 4:
+                # 후보가 많으면 행 수 크기의 배열에 한꺼번에 더하는 편이 빠르다
+                return self._search_all(entries, k, mask, avg_len)
+            term_scores = self._scores(idf, term_rows, tfs, avg_len)
+            if mask is not None:
+                keep = mask[term_rows]
+                term_rows, term_scores = term_rows[keep], term_scores[keep]
+            rows, inverse = np.unique(np.concatenate([rows, term_rows]), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate([scores, term_scores]))
+        else:
+            split = len(entries)
+
+        bounds = np.append(bounds, 0.0)
+        for j in range(split, len(entries)):
+            # 남은 단어를 모두 더해도 k번째 점수에 못 미치는 후보는 버린다
+            keep = scores + bounds[j] >= kth
+            rows, scores = rows[keep], scores[keep]
+            idf, term_rows, tfs = entries[j]
+            # 포스팅은 행 번호 순으로 추가되므로 정렬되어 있다
+            positions = np.searchsorted(term_rows, rows)
+            positions[positions == len(term_rows)] = 0
+            hit = term_rows[positions] == rows
+            scores[hit] += self._scores(idf, rows[hit], tfs[positions[hit]], avg_len)
+            kth = np.partition(scores, len(scores) - k)[len(scores) - k]
+        if not len(rows):
+            return []
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return rows[top].tolist()
+
+    def _live_postings(self, postings: _Postings) -> tuple[np.ndarray, np.ndarray]:
+        rows, tfs = postings.arrays()
+        if postings.removals != self.removals:
+            # 마지막으로 정리한 뒤에 삭제된 행이 있으면 이 단어의 포스팅에서 지운다
+            alive = self.live[rows]
+            if not alive.all():
+                rows, tfs = rows[alive], tfs[alive]
+                postings.rows = array("q", rows.tobytes())
+                postings.tfs = array("f", tfs.tobytes())
+            postings.removals = self.removals
+        return rows, tfs
+
+    def _search_all(
+        self, entries: list, k: int, mask: Optional[np.ndarray], avg_len: float
+    ) -> list[int]:
+        # 행 수 크기의 배열에 모든 단어의 점수를 한 번에 더한다
+        scores = np.bincount(
+            np.concatenate([rows for _, rows, _ in entries]),
+            weights=np.concatenate([self._scores(*entry, avg_len) for entry in entries]),
+            minlength=len(self.live),
+        )
+        if mask is not None:
+            scores[: len(mask)][~mask] = 0
+            scores[len(mask) :] = 0
+        candidates = np.count_nonzero(scores)
+        if not candidates:
+            return []
+        k = min(k, candidates)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return top.tolist()
+
+    def _scores(
+        self, idf: float, rows: np.ndarray, tfs: np.ndarray, avg_len: float
+    ) -> np.ndarray:
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len[rows] / avg_len)
+        return idf * tfs * (self.k1 + 1) / (tfs + norm)
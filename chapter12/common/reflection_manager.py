@@ -1,10 +1,26 @@
-import json
+import asyncio
+import atexit
 import os
+import threading
+import time
 import uuid
-from typing import Optional
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from collections.abc import Iterator, Mapping
+from typing import TYPE_CHECKING, Literal, Optional
 
-import faiss
 import numpy as np
+from common.embedding_cache import CachedEmbeddings
+from common.llm_cache import component_llm
+from common.local_embeddings import HashedNGramEmbeddings
+from common.reflection_columns import ReflectionColumns
+from common.reflection_filter import ReflectionFilter
+from common.reflection_index import ReflectionIndex
+from common.reflection_lexical import LexicalIndex, reciprocal_rank_fusion
+from common.reflection_store import EmbeddingMatrix, ReflectionStore
+from common.reflection_write_behind import ReflectionWriteBehind
+from langchain_core.embeddings import Embeddings
 from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_openai import OpenAIEmbeddings
@@ -12,6 +28,9 @@ from pydantic import BaseModel, Field
 from retry import retry
 from settings import Settings
 
+if TYPE_CHECKING:
+    from common.reflection_judge import CascadeJudge
+
 settings = Settings()
 
 
@@ -36,86 +55,902 @@ class Reflection(BaseModel):
     judgment: ReflectionJudgment = Field(description="재시도가 필요한지에 대한 판정")
 
 
+class ReflectionBatch(BaseModel):
+    reflections: list[Reflection] = Field(
+        description="입력된 각 태스크에 대한 리플렉션. 입력과 같은 순서로, 태스크마다 하나씩 작성하세요."
+    )
+
+
+class StoredReflection(Reflection):
+    """ReflectionManager가 보관하는 리플렉션. 사용 통계는 LLM 출력 스키마(Reflection)에 넣지 않는다."""
+
+    # 리플렉션을 만든 에이전트 패턴 (예: self_reflection, cross_reflection)
+    pattern: str = ""
+    # 같은 교훈이 반복되어 병합된 횟수
+    hits: int = 1
+    # 유닉스 시각. 0이면 통계가 없던 이전 형식의 레코드
+    created_at: float = 0.0
+    last_used_at: float = 0.0
+
+
+EvictionPolicy = Literal["lru", "age", "confidence"]
+SearchMode = Literal["vector", "lexical", "hybrid"]
+
+
+def create_embeddings() -> Embeddings:
+    """설정된 임베딩 제공자를 만든다.
+
+    OpenAI 임베딩은 캐시 경로가 있으면 디스크 캐시로 감싼다. 로컬 임베딩은 캐시 조회보다
+    직접 계산하는 편이 빠르므로 감싸지 않는다.
+    """
+    if settings.embedding_provider == "local":
+        return HashedNGramEmbeddings(
+            dim=settings.local_embedding_dim,
+            ngram_range=(settings.local_embedding_ngram_min, settings.local_embedding_ngram_max),
+            workers=settings.local_embedding_workers,
+        )
+    embeddings = OpenAIEmbeddings(model=settings.openai_embedding_model)
+    if not settings.embedding_cache_path:
+        return embeddings
+    return CachedEmbeddings(
+        embeddings,
+        model=settings.openai_embedding_model,
+        path=settings.embedding_cache_path,
+        max_entries=settings.embedding_cache_max_entries,
+        max_bytes=settings.embedding_cache_max_bytes,
+    )
+
+
+def create_index(vectors: Optional[EmbeddingMatrix] = None) -> ReflectionIndex:
+    """설정된 백엔드·압축 방식의 빈 리플렉션 검색 인덱스를 만든다."""
+    return ReflectionIndex(
+        backend=settings.reflection_index_backend,
+        promotion_threshold=settings.reflection_index_promotion_threshold,
+        hnsw_m=settings.reflection_index_hnsw_m,
+        hnsw_ef_search=settings.reflection_index_hnsw_ef_search,
+        ivf_nlist=settings.reflection_index_ivf_nlist,
+        ivf_nprobe=settings.reflection_index_ivf_nprobe,
+        pq_m=settings.reflection_index_pq_m,
+        compression=settings.reflection_embedding_compression,
+        vectors=vectors,
+    )
+
+
+def nearest_rows(
+    index: ReflectionIndex,
+    columns: ReflectionColumns,
+    embedding_matrix: EmbeddingMatrix,
+    queries: np.ndarray,
+    k: int,
+    filter: Optional[ReflectionFilter] = None,
+    max_distance: Optional[float] = None,
+    rerank_factor: int = 0,
+) -> list[list[int]]:
+    """쿼리별로 가까운 순서의 행 번호를 최대 k개 반환한다 (ReflectionManager·ReflectionReplica 공용).
+
+    filter는 열 배열의 마스크로 인덱스 스캔 안에서 적용되고, max_distance가 있으면 범위
+    검색을 한다. 압축 인덱스면 k * rerank_factor개의 후보를 원본 벡터로 다시 정렬한다.
+    """
+    mask = columns.mask(filter) if filter is not None else None
+    if mask is not None and not mask.any():
+        return [[] for _ in queries]
+    rerank = index.approximate and rerank_factor > 0
+    fetch = k * rerank_factor if rerank else k
+    if max_distance is not None:
+        I = [ids[:fetch] for _, ids in index.range_search(queries, max_distance, mask)]
+    else:
+        D, I = index.search(queries, min(fetch, index.ntotal), mask)
+    if rerank:
+        I = [
+            _rerank(embedding_matrix, query, ids, k, max_distance)
+            for query, ids in zip(queries, I)
+        ]
+    # ANN 인덱스는 결과가 k개 미만이면 -1을 채워 반환한다
+    return [[int(i) for i in row if i >= 0] for row in I]
+
+
+def _rerank(
+    embedding_matrix: EmbeddingMatrix,
+    query: np.ndarray,
+    ids: np.ndarray,
+    k: int,
+    max_distance: Optional[float],
+) -> np.ndarray:
+    # 압축 인덱스의 후보를 원본 벡터(스냅샷 부분은 디스크 mmap)와의 정확한 거리로 다시 정렬한다
+    ids = np.asarray(ids, dtype="int64")
+    ids = ids[ids >= 0]
+    if not len(ids):
+        return ids
+    distances = ((embedding_matrix.take(ids) - query) ** 2).sum(axis=1)
+    order = np.argsort(distances)[:k]
+    if max_distance is not None:
+        order = order[distances[order] < max_distance]
+    return ids[order]
+
+
+class _ReflectionView(Mapping):
+    """리플렉션 ID → StoredReflection 읽기 전용 뷰.
+
+    리플렉션은 ReflectionColumns의 열 배열에만 저장되며, 조회할 때마다 해당 행으로
+    새 객체를 만든다. 반환된 객체를 수정해도 저장된 값은 바뀌지 않는다.
+    """
+
+    def __init__(self, manager: "ReflectionManager"):
+        self._manager = manager
+
+    def __getitem__(self, reflection_id: str) -> StoredReflection:
+        manager = self._manager
+        with manager._lock:
+            row = manager.rows[reflection_id]
+            return StoredReflection(**manager.columns.record(row, reflection_id))
+
+    def __contains__(self, reflection_id: object) -> bool:
+        return reflection_id in self._manager.rows
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._manager.rows))
+
+    def __len__(self) -> int:
+        return len(self._manager.rows)
+
+
+class QueryEmbeddingCache:
+    """최근 검색 쿼리의 임베딩 LRU 캐시.
+
+    캐시에 없는 쿼리만 한 번의 임베딩 요청으로 계산한다. 배치 조회나 embed_queries로 미리
+    채워 두면 이후 같은 쿼리의 단건 조회는 임베딩 호출 없이 검색만 수행한다.
+    """
+
+    def __init__(self, embeddings: Embeddings, max_size: int = 256):
+        self.embeddings = embeddings
+        self.max_size = max_size
+        self._items: OrderedDict[str, list[float]] = OrderedDict()
+        # 임베딩 API 호출은 잠금 밖에서 수행한다
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, query: object) -> bool:
+        return query in self._items
+
+    def embed(self, queries: list[str]) -> list[list[float]]:
+        known = self._cached(queries)
+        missing = [q for q in dict.fromkeys(queries) if q not in known]
+        if len(missing) == 1:
+            known[missing[0]] = self.embeddings.embed_query(missing[0])
+        elif missing:
+            known.update(zip(missing, self.embeddings.embed_documents(missing)))
+        return self._remember(queries, known)
+
+    async def aembed(self, queries: list[str]) -> list[list[float]]:
+        known = self._cached(queries)
+        missing = [q for q in dict.fromkeys(queries) if q not in known]
+        if len(missing) == 1:
+            known[missing[0]] = await self.embeddings.aembed_query(missing[0])
+        elif missing:
+            known.update(zip(missing, await self.embeddings.aembed_documents(missing)))
+        return self._remember(queries, known)
+
+    def _cached(self, queries: list[str]) -> dict[str, list[float]]:
+        with self._lock:
+            return {q: self._items[q] for q in queries if q in self._items}
+
+    def _remember(self, queries: list[str], known: dict[str, list[float]]) -> list[list[float]]:
+        with self._lock:
+            for query in queries:
+                self._items[query] = known[query]
+                self._items.move_to_end(query)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return [known[query] for query in queries]
+
+
 class ReflectionManager:
-    def __init__(self, file_path: str = settings.default_reflection_db_path):
+    def __init__(
+        self,
+        file_path: str = settings.default_reflection_db_path,
+        embeddings: Optional[Embeddings] = None,
+    ):
         self.file_path = file_path
-        self.embeddings = OpenAIEmbeddings(model=settings.openai_embedding_model)
-        self.reflections: dict[str, Reflection] = {}
-        self.embeddings_dict: dict[str, list[float]] = {}
-        self.index = None
+        self.embeddings = embeddings or create_embeddings()
+        self.store = ReflectionStore(
+            file_path,
+            fsync=settings.reflection_log_fsync,
+            fsync_interval=settings.reflection_log_fsync_interval,
+            compact_threshold=settings.reflection_log_compact_threshold,
+            dtype=settings.reflection_snapshot_dtype,
+        )
+        # 리플렉션은 행 번호 순의 열 배열에 두고, 이 뷰로 조회할 때만 객체를 만든다
+        self.reflections: Mapping[str, StoredReflection] = _ReflectionView(self)
+        # 리플렉션 저장 순서대로 정렬된 임베딩 행렬 (스냅샷 부분은 mmap)
+        self.embedding_matrix = EmbeddingMatrix()
+        # 행 번호(= 인덱스의 int64 ID) ↔ 리플렉션 UUID. 갱신·삭제된 행은 None
+        self.row_ids: list[Optional[str]] = []
+        self.rows: dict[str, int] = {}
+        # 리플렉션 필드의 열 배열 (행 번호 순). 검색 필터와 용량 제거도 이 배열로 계산한다
+        self.columns = ReflectionColumns()
+        self.index = self._create_index()
+        # task·reflection 텍스트의 BM25 역색인. lexical·hybrid 검색을 처음 할 때 만들고 이후 행마다 갱신한다
+        self.lexical: Optional[LexicalIndex] = None
+        # 메모리의 행 번호 → 현재 디스크 세대를 다시 로드했을 때의 행 번호 (인덱스 체크포인트용).
+        # compaction은 무효화된 행을 빼고 번호를 다시 매기므로, 그 시점의 행까지는
+        # disk_rows로 변환하고 이후 행은 disk_rows_base부터 차례로 번호가 붙는다 (None이면 그대로)
+        self._disk_generation = 0
+        self._disk_rows: Optional[np.ndarray] = None
+        self._disk_rows_base = 0
+        # 최근 검색 쿼리의 임베딩. 배치 조회로 미리 채워 두면 이후 단건 조회가 임베딩 호출을 생략한다
+        self.query_embeddings = QueryEmbeddingCache(self.embeddings)
+        # 인덱스·행 매핑·로그 변경과 검색을 보호한다. 임베딩 API 호출은 잠금 밖에서 수행한다
+        self._lock = threading.RLock()
+        # 인덱스 체크포인트 쓰기(checkpoint_index와 백그라운드 compaction)를 직렬화한다.
+        # 인덱스 파일과 정보 파일은 한 쌍으로 공개되어야 하므로 두 쓰기를 함께 보호한다
+        self._checkpoint_lock = threading.Lock()
+        # 가장 가까운 기존 리플렉션과의 L2² 거리가 이 값 이하이면 새로 추가하지 않고 병합한다
+        self.merge_distance = settings.reflection_merge_distance
+        self.capacity = settings.reflection_capacity
+        self.eviction_policy: EvictionPolicy = settings.reflection_eviction_policy
+        # 압축 인덱스에서 k * rerank_factor개의 후보를 원본 벡터로 다시 정렬한다 (0이면 하지 않음)
+        self.rerank_factor = settings.reflection_rerank_factor
+        # enqueue_reflection의 백그라운드 저장 큐. 처음 쓰일 때(또는 저장 전에 종료된 저널이 있으면 로드 때) 만든다
+        self.write_behind: Optional[ReflectionWriteBehind] = None
         self.load_reflections()
+        journal_path = f"{self.store.base_path}.pending.jsonl"
+        if os.path.exists(journal_path) and os.path.getsize(journal_path):
+            self._write_behind().replay()
+
+    def _create_index(self) -> ReflectionIndex:
+        # 승격 전의 정확한 검색은 embedding_matrix를 직접 스캔하므로 벡터를 한 벌만 둔다
+        return create_index(self.embedding_matrix)
 
     def load_reflections(self):
-        if os.path.exists(self.file_path):
-            with open(self.file_path, "r") as file:
-                data = json.load(file)
-                for item in data:
-                    reflection = Reflection(**item["reflection"])
-                    self.reflections[reflection.id] = reflection
-                    self.embeddings_dict[reflection.id] = item["embedding"]
-
-            if self.reflections:
-                embeddings = list(self.embeddings_dict.values())
-                self.index = faiss.IndexFlatL2(len(embeddings[0]))
-                self.index.add(np.array(embeddings).astype("float32"))
-
-    def save_reflection(self, reflection: Reflection) -> str:
+        items, self.embedding_matrix = self.store.load()
+        self.index = self._create_index()
+        self.lexical = None
+        # 레코드 dict를 열 배열에 바로 옮긴다. pydantic 객체는 만들지 않는다
+        for row, item in enumerate(items):
+            self.columns.append(item)
+            if item is None:
+                self.row_ids.append(None)
+                continue
+            self.rows[item["id"]] = row
+            self.row_ids.append(item["id"])
+        self._disk_generation = self.store.generation
+        self._disk_rows = None
+
+        # 인덱스 체크포인트가 있으면 그 이후의 행만 추가한다 (없으면 전체 재구축)
+        if not self._restore_index_checkpoint():
+            self._index_live_rows()
+
+    def _restore_index_checkpoint(self) -> bool:
+        info = self.store.read_index_checkpoint()
+        if info is None or info.get("sequence", 0) > len(self.row_ids):
+            return False
+        try:
+            restored = self.index.restore(
+                self.store.index_checkpoint_path(self.store.generation),
+                info,
+                mmap=settings.reflection_index_checkpoint_mmap,
+            )
+        except RuntimeError as e:
+            print(f"Error restoring reflection index checkpoint: {e}")
+            restored = False
+        if not restored:
+            self.index = self._create_index()
+            return False
+        # 체크포인트 이후 삭제·갱신된 행을 빼고, 이후에 추가된 행을 넣는다
+        ids = self.index.ids()
+        stale = ids[~self.columns.live[ids]]
+        if len(stale):
+            self.index.remove(stale.tolist())
+        self._index_live_rows(start=info["sequence"])
+        return True
+
+    def checkpoint_index(self) -> bool:
+        """검색 인덱스를 현재 스냅샷 세대의 체크포인트로 저장한다.
+
+        다음 로드는 인덱스를 다시 만들거나 학습하지 않고 체크포인트를 연 뒤, 그 이후에
+        추가된 행만 넣는다. 승격 전(정확한 검색)이라 저장할 인덱스가 없으면 False를 반환한다.
+        """
+        with self._lock:
+            size = len(self.row_ids)
+            remap = np.arange(size)
+            sequence = size
+            if self._disk_rows is not None:
+                # compaction 이후 행 번호로 바꿔 저장한다
+                count = len(self._disk_rows)
+                remap[:count] = self._disk_rows
+                remap[count:] += self._disk_rows_base - count
+                sequence = self._disk_rows_base + size - count
+            exported = self.index.export(remap)
+            generation = self._disk_generation
+        if exported is None:
+            return False
+        # 파일 쓰기는 사본으로 잠금 밖에서 수행한다
+        self._write_index_checkpoint(exported, sequence, generation)
+        return True
+
+    def _write_index_checkpoint(
+        self, exported: tuple, sequence: int, generation: int
+    ) -> None:
+        index, info = exported
+        with self._checkpoint_lock:
+            # 백그라운드 compaction의 체크포인트(내보낸 시점의 행까지)가 그 뒤에 내보낸
+            # checkpoint_index의 체크포인트보다 늦게 도착하면, 더 최신인 쪽을 덮어쓰지 않는다
+            published = self.store.read_index_checkpoint(generation)
+            if published is not None and published.get("sequence", 0) > sequence:
+                return
+            self.index.write(index, self.store.index_checkpoint_path(generation))
+            self.store.publish_index_checkpoint(generation, {**info, "sequence": sequence})
+
+    def _index_live_rows(self, start: int = 0) -> None:
+        # mmap된 행렬을 블록 단위로 넘기므로 원소 단위의 파이썬 변환이 없고,
+        # float16 스냅샷도 블록 크기만큼만 float32로 변환된다
+        live_rows = self.columns.live
+        for offset, block in self.embedding_matrix.blocks():
+            if offset + len(block) <= start:
+                continue
+            if offset < start:
+                block, offset = block[start - offset :], start
+            ids = np.arange(offset, offset + len(block))
+            live = live_rows[offset : offset + len(block)]
+            if live.all():
+                self.index.add(block, ids)
+            elif live.any():
+                self.index.add(block[live], ids[live])
+
+    def save_reflection(self, reflection: Reflection, pattern: str = "") -> str:
+        """리플렉션을 저장하고 ID를 반환한다.
+
+        거의 같은 교훈이 이미 있으면 새로 추가하지 않고 기존 리플렉션에 병합하며,
+        그 ID를 반환한다. 용량을 넘으면 eviction_policy에 따라 오래된 리플렉션을 제거한다.
+        pattern은 리플렉션을 만든 에이전트 패턴으로, 검색 필터에 쓰인다.
+        """
         reflection.id = str(uuid.uuid4())
-        reflection_id = reflection.id
-        self.reflections[reflection_id] = reflection
         embedding = self.embeddings.embed_query(reflection.reflection)
-        self.embeddings_dict[reflection_id] = embedding
-
-        if self.index is None:
-            self.index = faiss.IndexFlatL2(len(embedding))
-        self.index.add(np.array([embedding]).astype("float32"))
-
-        with open(self.file_path, "w", encoding="utf-8") as file:
-            json.dump(
-                [
-                    {"reflection": reflection.dict(), "embedding": embedding}
-                    for reflection, embedding in zip(
-                        self.reflections.values(), self.embeddings_dict.values()
+        reflection.id = self._insert(reflection, embedding, pattern)
+        return reflection.id
+
+    def save_reflections(self, reflections: list[Reflection], pattern: str = "") -> list[str]:
+        """여러 리플렉션을 한 번의 임베딩 요청과 한 번의 로그 쓰기로 저장하고 ID 목록을 반환한다.
+
+        병합·용량 제한은 save_reflection과 같으며, 같은 묶음 안의 거의 같은 교훈끼리도 병합된다.
+        """
+        if not reflections:
+            return []
+        for reflection in reflections:
+            reflection.id = str(uuid.uuid4())
+        embeddings = self.embeddings.embed_documents(
+            [reflection.reflection for reflection in reflections]
+        )
+        ids = self._insert_many(reflections, embeddings, pattern)
+        for reflection, reflection_id in zip(reflections, ids):
+            reflection.id = reflection_id
+        return ids
+
+    async def asave_reflection(self, reflection: Reflection, pattern: str = "") -> str:
+        """save_reflection의 비동기 버전. 로그 쓰기(fsync 포함)는 executor 스레드에서 수행한다."""
+        reflection.id = str(uuid.uuid4())
+        embedding = await self.embeddings.aembed_query(reflection.reflection)
+        reflection.id = await asyncio.get_running_loop().run_in_executor(
+            None, self._insert, reflection, embedding, pattern
+        )
+        return reflection.id
+
+    def enqueue_reflection(self, reflection: Reflection, pattern: str = "") -> str:
+        """리플렉션을 백그라운드 저장 큐에 넣고 ID를 바로 반환한다 (write-behind).
+
+        get_reflection으로는 바로 조회되지만, 임베딩과 로그 쓰기는 작업 스레드가 나중에 하므로
+        검색 결과에는 저장이 끝난 뒤부터 나온다. 거의 같은 교훈에 병합되면 원래 ID로 조회해도
+        병합된 리플렉션이 반환된다. flush()는 큐가 빌 때까지 기다리며, 종료 시에도 호출된다.
+        """
+        now = time.time()
+        reflection.id = str(uuid.uuid4())
+        stored = StoredReflection(
+            **reflection.model_dump(include=set(Reflection.model_fields)),
+            pattern=pattern,
+            created_at=now,
+            last_used_at=now,
+        )
+        return self._write_behind().enqueue(stored)
+
+    def flush(self) -> None:
+        """enqueue_reflection으로 넣은 리플렉션이 모두 저장될 때까지 기다린다."""
+        if self.write_behind is not None:
+            self.write_behind.flush()
+
+    def _write_behind(self) -> ReflectionWriteBehind:
+        with self._lock:
+            if self.write_behind is None:
+                self.write_behind = ReflectionWriteBehind(
+                    self,
+                    max_queue=settings.reflection_write_behind_queue_size,
+                    batch_size=settings.reflection_write_behind_batch_size,
+                )
+                # 프로세스가 정상 종료하면 남은 리플렉션을 저장한 뒤 끝낸다
+                atexit.register(self.write_behind.flush)
+            return self.write_behind
+
+    def _flush_pending(self, reflection_id: str) -> None:
+        # 저장 전인 리플렉션을 고치거나 지우려면 먼저 저장을 마친다
+        if self.write_behind is not None and reflection_id in self.write_behind.pending:
+            self.write_behind.flush()
+
+    def update_reflection(self, reflection: Reflection) -> bool:
+        """같은 ID의 리플렉션을 교체한다. 리플렉션 본문이 바뀐 경우에만 다시 임베딩한다."""
+        self._flush_pending(reflection.id)
+        current = self.get_reflection(reflection.id)
+        if current is None:
+            return False
+        # 사용 통계는 갱신 전 리플렉션의 것을 이어받는다
+        reflection = StoredReflection(
+            **{
+                **current.model_dump(include={"pattern", "hits", "created_at", "last_used_at"}),
+                **reflection.model_dump(include=set(Reflection.model_fields)),
+            }
+        )
+        embedding = None
+        if reflection.reflection != current.reflection:
+            embedding = self.embeddings.embed_query(reflection.reflection)
+        with self._lock:
+            row = self.rows.get(reflection.id)
+            if row is None:
+                return False  # 임베딩하는 동안 삭제되었다
+            if embedding is None:
+                embedding = self.embedding_matrix.row(row).tolist()
+            self.index.remove([row])
+            if self.lexical is not None:
+                self.lexical.remove([row])
+            self.row_ids[row] = None
+            self.columns.remove([row])
+            self._put(reflection, embedding)
+        return True
+
+    def delete_reflection(self, reflection_id: str) -> bool:
+        self._flush_pending(reflection_id)
+        with self._lock:
+            if reflection_id not in self.rows:
+                return False
+            self._remove([reflection_id])
+            self.store.append_delete(reflection_id)
+            self._maybe_compact()
+        return True
+
+    def _remove(self, reflection_ids: list[str]) -> None:
+        rows = [self.rows.pop(reflection_id) for reflection_id in reflection_ids]
+        for row in rows:
+            self.row_ids[row] = None
+        self.columns.remove(rows)
+        self.index.remove(rows)
+        if self.lexical is not None:
+            self.lexical.remove(rows)
+            # 삭제된 행의 포스팅이 살아 있는 행보다 많아지면 다음 검색 때 다시 만든다
+            if self.lexical.dead > self.lexical.docs:
+                self.lexical = None
+
+    def _insert(
+        self, reflection: Reflection, embedding: list[float], pattern: str = ""
+    ) -> str:
+        now = time.time()
+        with self._lock:
+            duplicate = self._find_duplicate(embedding)
+            if duplicate is not None:
+                # 같은 교훈의 반복: 행을 추가하지 않고 최신 판정과 사용 통계만 갱신한다
+                merged = duplicate.model_copy(
+                    update={
+                        "judgment": reflection.judgment,
+                        "hits": duplicate.hits + 1,
+                        "last_used_at": now,
+                    }
+                )
+                self.columns.set(self.rows[merged.id], merged.model_dump())
+                self.store.append_metadata(merged)
+                self._maybe_compact()
+                return merged.id
+
+            stored = StoredReflection(
+                **reflection.model_dump(include=set(Reflection.model_fields)),
+                pattern=pattern,
+                created_at=now,
+                last_used_at=now,
+            )
+            self._put(stored, embedding)
+            self._evict()
+            return stored.id
+
+    def _insert_many(
+        self, reflections: list[Reflection], embeddings: list[list[float]], pattern: str = ""
+    ) -> list[str]:
+        # _insert와 같지만 로그 레코드를 모아 한 번에 기록하고, 용량 정리도 끝에 한 번만 한다
+        now = time.time()
+        ids: list[str] = []
+        added: list[tuple[StoredReflection, list[float]]] = []
+        updated: list[StoredReflection] = []
+        with self._lock:
+            for reflection, embedding in zip(reflections, embeddings):
+                duplicate = self._find_duplicate(embedding)
+                if duplicate is not None:
+                    merged = duplicate.model_copy(
+                        update={
+                            "judgment": reflection.judgment,
+                            "hits": duplicate.hits + 1,
+                            "last_used_at": now,
+                        }
                     )
-                ],
-                file,
-                ensure_ascii=False,
-                indent=4,
+                    self.columns.set(self.rows[merged.id], merged.model_dump())
+                    updated.append(merged)
+                    ids.append(merged.id)
+                    continue
+                stored = StoredReflection(
+                    **reflection.model_dump(include=set(Reflection.model_fields)),
+                    pattern=pattern,
+                    created_at=now,
+                    last_used_at=now,
+                )
+                self._add_row(stored, embedding)
+                added.append((stored, embedding))
+                ids.append(stored.id)
+            self.store.append_many(added, updated)
+            self._evict()
+            self._maybe_compact()
+        return ids
+
+    def _find_duplicate(self, embedding: list[float]) -> Optional[StoredReflection]:
+        if self.merge_distance <= 0 or not self.index.ntotal:
+            return None
+        D, I = self.index.search(np.array([embedding], dtype="float32"), 1)
+        row = I[0][0]
+        if row < 0 or self.row_ids[row] is None or D[0][0] > self.merge_distance:
+            return None
+        return self.reflections[self.row_ids[row]]
+
+    def _evict(self) -> None:
+        if not self.capacity or len(self.rows) <= self.capacity:
+            return
+        # 매 저장마다 정렬하지 않도록 용량의 90%까지 한 번에 줄인다
+        live = np.flatnonzero(self.columns.live[: self.columns.size])
+        keys = self._eviction_keys()[live]
+        count = len(live) - int(self.capacity * 0.9)
+        victims = [
+            self.row_ids[row] for row in live[np.argpartition(keys, count - 1)[:count]]
+        ]
+        self._remove(victims)
+        self.store.append_deletes(victims)
+        # HNSW·IVF는 삭제된 벡터를 남겨 두므로 살아 있는 벡터보다 많아지면 인덱스를 다시 만든다
+        if len(self.index.tombstones) > self.index.ntotal:
+            self.index = self._create_index()
+            self._index_live_rows()
+        self._maybe_compact()
+
+    def _eviction_keys(self) -> np.ndarray:
+        # 행별 제거 우선순위. 값이 작은 리플렉션부터 제거된다
+        if self.eviction_policy == "age":
+            return self.columns.created_at
+        if self.eviction_policy == "confidence":
+            return self.columns.confidence
+        return self.columns.last_used_at
+
+    def _put(self, reflection: StoredReflection, embedding: list[float]) -> None:
+        self._add_row(reflection, embedding)
+        # 전체 DB를 다시 쓰지 않고 로그에 한 줄만 추가한다
+        self.store.append(reflection, embedding)
+        self._maybe_compact()
+
+    def _add_row(self, reflection: StoredReflection, embedding: list[float]) -> None:
+        # 새 행을 추가한다. 행 번호가 곧 인덱스의 ID이므로 기존 행은 다시 쓰지 않는다
+        row = len(self.embedding_matrix)
+        self.embedding_matrix.append(embedding)
+        self.rows[reflection.id] = row
+        self.row_ids.append(reflection.id)
+        self.columns.append(reflection.model_dump())
+        self.index.add(np.array([embedding]).astype("float32"), np.array([row]))
+        if self.lexical is not None:
+            self.lexical.add(row, f"{reflection.task}\n{reflection.reflection}")
+
+    def _maybe_compact(self) -> None:
+        if self.store.should_compact():
+            self.compact(wait=False)
+
+    def compact(self, wait: bool = True) -> None:
+        """로그를 스냅샷으로 접어 넣는다. wait=False이면 스냅샷 쓰기를 백그라운드로 수행한다.
+
+        스냅샷에는 필터용 열 배열과, 승격된 인덱스면 새 세대의 행 번호로 바꾼 인덱스
+        체크포인트가 함께 공개되므로 ReflectionReplica는 파싱·재구축 없이 새 세대를 연다.
+        """
+        with self._lock:
+            generation = self.store.generation + 1
+            # 새 세대는 살아 있는 행만 순서대로 담는다
+            live = self.columns.live[: len(self.row_ids)].copy()
+            disk_rows = np.where(live, np.cumsum(live) - 1, -1)
+            live_rows = np.flatnonzero(live)
+            exported = self.index.export(disk_rows)
+            # 잠금 아래에서는 열 배열과 ID 목록만 복사하고, 행마다 dict를 만드는 일은
+            # 스냅샷을 쓰는 스레드(wait=False이면 백그라운드)에서 한다
+            columns = self.columns.copy()
+            started = self.store.compact(
+                partial(columns.records, list(self.row_ids)),
+                self.embedding_matrix,
+                wait=wait,
+                columns=columns.arrays(live_rows),
+                on_written=(
+                    partial(self._write_index_checkpoint, exported, len(live_rows))
+                    if exported is not None
+                    else None
+                ),
             )
+            if started:
+                self._disk_rows = disk_rows
+                self._disk_rows_base = len(live_rows)
+                self._disk_generation = generation
+
+    def publish_snapshot(self) -> int:
+        """현재 상태를 새 세대의 스냅샷으로 공개하고 그 세대 번호를 반환한다.
+
+        스냅샷은 한 번 공개되면 바뀌지 않으며 manifest의 원자적 교체로 공개된다.
+        읽기 복제본(ReflectionReplica)은 다음 폴링 때 이 세대로 교체한다.
+        """
+        self.compact(wait=True)
+        return self.store.generation
+
+    def close(self) -> None:
+        if self.write_behind is not None:
+            atexit.unregister(self.write_behind.flush)
+            self.write_behind.close()
+            self.write_behind = None
+        if settings.reflection_index_checkpoint_on_close:
+            # 진행 중인 compaction이 같은 세대의 체크포인트를 먼저 쓰고 스냅샷을 공개하게 한 뒤,
+            # 그 이후의 행까지 담은 체크포인트로 덮어쓴다
+            self.store.wait_for_compaction()
+            self.checkpoint_index()
+        self.store.close()
+
+    def get_reflection(self, reflection_id: str) -> Optional[StoredReflection]:
+        reflection = self.reflections.get(reflection_id)
+        if reflection is None and self.write_behind is not None:
+            return self.write_behind.get(reflection_id)
+        return reflection
+
+    def get_relevant_reflections(
+        self,
+        query: str,
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+    ) -> list[Reflection]:
+        if not self.reflections or not self.index.ntotal:
+            return []
+        return self.get_relevant_reflections_batch([query], k, filter, max_distance, mode)[0]
+
+    def get_relevant_reflections_batch(
+        self,
+        queries: list[str],
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+    ) -> list[list[Reflection]]:
+        """여러 쿼리를 한 번의 embed_documents 호출과 한 번의 인덱스 검색으로 조회한다.
+
+        저장된 리플렉션이 아직 없어도 쿼리 임베딩은 계산해 두므로, 이후 같은 쿼리의
+        get_relevant_reflections는 임베딩 호출 없이 검색만 수행한다.
+
+        filter의 조건은 인덱스 스캔 안에서 적용되므로 over-fetch 없이 조건을 만족하는
+        top-k가 반환된다. max_distance(L2²)를 주면 범위 검색으로 그보다 먼 리플렉션은
+        k개를 채우기 위해 끼워 넣지 않는다 (None이면 reflection_search_max_distance 설정).
+
+        mode(None이면 reflection_search_mode 설정)가 lexical이면 임베딩 없이 task·reflection
+        텍스트의 BM25 역색인만으로 찾고, hybrid이면 벡터 검색과 BM25의 순위를 reciprocal
+        rank fusion으로 합친다. max_distance는 벡터 검색 쪽에만 적용된다.
+        """
+        if not queries:
+            return []
+        mode = mode or settings.reflection_search_mode
+        if mode == "lexical":
+            return self._search(None, k, filter, max_distance, texts=queries)
+        query_embeddings = self._embed_queries(queries)
+        texts = queries if mode == "hybrid" else None
+        return self._search(query_embeddings, k, filter, max_distance, texts)
 
-        return reflection_id
+    def embed_queries(self, queries: list[str]) -> None:
+        """검색은 하지 않고 쿼리 임베딩만 한 번의 요청으로 계산해 캐시에 넣는다.
 
-    def get_reflection(self, reflection_id: str) -> Optional[Reflection]:
-        return self.reflections.get(reflection_id)
+        나중에 검색할 쿼리를 미리 알 때 쓴다. 검색은 실제로 필요한 시점에 하므로 그 사이에
+        저장된 리플렉션도 결과에 포함된다. lexical 검색 모드에서는 아무것도 하지 않는다.
+        """
+        if queries and settings.reflection_search_mode != "lexical":
+            self._embed_queries(queries)
 
-    def get_relevant_reflections(self, query: str, k: int = 3) -> list[Reflection]:
-        if not self.reflections or self.index is None:
+    async def aget_relevant_reflections(
+        self,
+        query: str,
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+    ) -> list[Reflection]:
+        if not self.reflections or not self.index.ntotal:
             return []
+        return (
+            await self.aget_relevant_reflections_batch([query], k, filter, max_distance, mode)
+        )[0]
 
-        query_embedding = self.embeddings.embed_query(query)
+    async def aget_relevant_reflections_batch(
+        self,
+        queries: list[str],
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+    ) -> list[list[Reflection]]:
+        """get_relevant_reflections_batch의 비동기 버전. faiss 검색은 executor 스레드에서 수행한다."""
+        if not queries:
+            return []
+        mode = mode or settings.reflection_search_mode
+        query_embeddings = None
+        if mode != "lexical":
+            query_embeddings = await self._aembed_queries(queries)
+        if not self.reflections or not self.index.ntotal:
+            return [[] for _ in queries]
+        texts = queries if mode != "vector" else None
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._search, query_embeddings, k, filter, max_distance, texts
+        )
+
+    def _search(
+        self,
+        query_embeddings: Optional[list[list[float]]],
+        k: int,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        texts: Optional[list[str]] = None,
+    ) -> list[list[Reflection]]:
+        # query_embeddings만 있으면 벡터 검색, texts만 있으면 BM25 검색, 둘 다 있으면 두 순위를 합친다
+        count = len(query_embeddings) if query_embeddings is not None else len(texts)
         try:
-            D, I = self.index.search(
-                np.array([query_embedding]).astype("float32"),
-                min(k, len(self.reflections)),
-            )
-            reflection_ids = list(self.reflections.keys())
-            return [
-                self.reflections[reflection_ids[i]]
-                for i in I[0]
-                if i < len(reflection_ids)
-            ]
+            with self._lock:
+                rows = self._search_rows(query_embeddings, k, filter, max_distance, texts)
+                # 인덱스가 돌려주는 ID가 곧 행 번호이므로 k개 결과만 객체로 만든다
+                return [self._records(row) for row in rows]
         except Exception as e:
             print(f"Error during reflection search: {e}")
-            return []
+            return [[] for _ in range(count)]
+
+    def _search_scored(
+        self,
+        query_embeddings: Optional[list[list[float]]],
+        k: int,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        texts: Optional[list[str]] = None,
+    ) -> list[list[tuple[float, int]]]:
+        """_search와 같지만 다른 매니저(샤드)의 결과와 합칠 수 있도록 (점수, 행 번호)를 반환한다.
+
+        점수는 작을수록 가깝다. 쿼리 임베딩이 있으면 L2² 거리, lexical 검색이면 순위다.
+        객체는 만들지 않으므로, 합친 뒤 남은 행만 records(rows)로 만든다.
+        """
+        count = len(query_embeddings) if query_embeddings is not None else len(texts)
+        try:
+            with self._lock:
+                rows = self._search_rows(query_embeddings, k, filter, max_distance, texts)
+                if query_embeddings is None:
+                    return [[(float(rank), i) for rank, i in enumerate(row)] for row in rows]
+                scored = []
+                for query, row in zip(query_embeddings, rows):
+                    vectors = self.embedding_matrix.take(row)
+                    distances = ((vectors - np.asarray(query, dtype="float32")) ** 2).sum(axis=1)
+                    scored.append(list(zip(distances.tolist(), row)))
+                return scored
+        except Exception as e:
+            print(f"Error during reflection search: {e}")
+            return [[] for _ in range(count)]
+
+    def records(self, rows: list[int]) -> list[Optional[StoredReflection]]:
+        """행 번호들의 리플렉션을 만든다. 그 사이 삭제된 행은 None이다 (최근 사용 시각도 갱신된다)."""
+        with self._lock:
+            live = [i for i in rows if self.row_ids[i] is not None]
+            found = dict(zip(live, self._records(live)))
+            return [found.get(i) for i in rows]
+
+    def _search_rows(
+        self,
+        query_embeddings: Optional[list[list[float]]],
+        k: int,
+        filter: Optional[ReflectionFilter],
+        max_distance: Optional[float],
+        texts: Optional[list[str]],
+    ) -> list[list[int]]:
+        # 잠금 안에서 호출된다. 쿼리마다 가까운 순서의 살아 있는 행 번호를 반환한다
+        count = len(query_embeddings) if query_embeddings is not None else len(texts)
+        if not self.reflections or not self.index.ntotal:
+            return [[] for _ in range(count)]
+        if max_distance is None and settings.reflection_search_max_distance > 0:
+            max_distance = settings.reflection_search_max_distance
+
+        # hybrid는 양쪽에서 더 많은 후보를 받아 합친 뒤 k개로 자른다
+        hybrid = texts is not None and query_embeddings is not None
+        fetch = k * settings.reflection_hybrid_candidates if hybrid else k
+        I = None
+        if query_embeddings is not None:
+            I = nearest_rows(
+                self.index,
+                self.columns,
+                self.embedding_matrix,
+                np.array(query_embeddings).astype("float32"),
+                fetch,
+                filter,
+                max_distance,
+                self.rerank_factor,
+            )
+        if texts is not None:
+            lexical = self._lexical_index()
+            mask = self.columns.mask(filter) if filter is not None else None
+            lexical_rows = [lexical.search(text, fetch, mask) for text in texts]
+            if I is None:
+                I = lexical_rows
+            else:
+                I = [
+                    reciprocal_rank_fusion([vector, words], settings.reflection_rrf_k)[:k]
+                    for vector, words in zip(I, lexical_rows)
+                ]
+        return [[i for i in row if self.row_ids[i] is not None] for row in I]
+
+    def _records(self, rows: list[int]) -> list[StoredReflection]:
+        # 잠금 안에서 호출된다. LRU 제거용 최근 사용 시각은 메모리에서만 갱신하고 다음 compaction 때 영속화된다
+        self.columns.touch(np.asarray(rows, dtype="int64"), time.time())
+        return [StoredReflection(**self.columns.record(i, self.row_ids[i])) for i in rows]
+
+    def _lexical_index(self) -> LexicalIndex:
+        # 잠금 안에서 호출된다. 처음 쓰일 때 살아 있는 행으로 만들고, 이후에는 _add_row·_remove가 갱신한다
+        if self.lexical is None:
+            lexical = LexicalIndex()
+            for row in np.flatnonzero(self.columns.live[: self.columns.size]).tolist():
+                lexical.add(row, f"{self.columns.task[row]}\n{self.columns.reflection[row]}")
+            self.lexical = lexical
+        return self.lexical
+
+    def _embed_queries(self, queries: list[str]) -> list[list[float]]:
+        return self.query_embeddings.embed(queries)
+
+    async def _aembed_queries(self, queries: list[str]) -> list[list[float]]:
+        return await self.query_embeddings.aembed(queries)
 
 
 class TaskReflector:
-    def __init__(self, llm: BaseChatModel, reflection_manager: ReflectionManager):
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        reflection_manager: ReflectionManager,
+        pattern: str = "",
+        write_behind: Optional[bool] = None,
+        judge: Optional["CascadeJudge"] = None,
+    ):
+        llm = component_llm(llm, "TaskReflector")
         # strict=False로 설정하여 더 유연한 파싱 허용
         self.llm = llm.with_structured_output(Reflection, strict=False)
+        # 리플렉션 수가 맞지 않아 다시 요청할 때 캐시된 같은 응답을 받지 않도록 배치 호출은 캐시를 쓰지 않는다
+        self.batch_llm = llm.model_copy(update={"cache": False}).with_structured_output(
+            ReflectionBatch, strict=False
+        )
         self.reflection_manager = reflection_manager
+        # 저장하는 리플렉션에 기록할 에이전트 패턴 (검색 필터용)
+        self.pattern = pattern
+        # True이면 리플렉션을 저장 큐에 넣고 바로 반환한다. 재시도 판단에는 judgment만 필요하므로
+        # 임베딩·디스크 쓰기를 기다리지 않는다
+        self.write_behind = (
+            settings.reflection_write_behind if write_behind is None else write_behind
+        )
+        # 재시도 판정기. 있으면 판정만 먼저 하고, 자신 있는 판정이면 교훈 작성은 백그라운드로 미룬다
+        if judge is None and settings.reflection_judge == "cascade":
+            from common.reflection_judge import create_judge
 
-    def run(self, task: str, result: str) -> Reflection:
+            judge = create_judge()
+        self.judge = judge
+        # 교훈을 백그라운드에서 작성 중인 리플렉션: 임시 ID → 저장된 ID를 돌려줄 Future
+        self._lessons: dict[str, Future] = {}
+        self._lesson_pool: Optional[ThreadPoolExecutor] = None
+
+    def _chain(self):
         prompt = ChatPromptTemplate.from_template(
             "주어진 태스크 내용:\n{task}\n\n"
             "태스크 실행 결과:\n{result}\n\n"
@@ -132,14 +967,150 @@ class TaskReflector:
             "IMPORTANT: You MUST use the provided tool to respond. Do NOT output raw text or XML."
         )
 
-        chain = prompt | self.llm
+        return prompt | self.llm
+
+    def run(self, task: str, result: str) -> Reflection:
+        if self.judge is not None:
+            judgment = self.judge.judge(task, result)
+            if judgment is not None:
+                return self._defer_lesson(task, result, judgment)
+        return self._reflect(task, result)
+
+    def _reflect(
+        self, task: str, result: str, judgment: Optional[ReflectionJudgment] = None
+    ) -> Reflection:
+        chain = self._chain()
 
         @retry(tries=5)
         def invoke_chain() -> Reflection:
             return chain.invoke({"task": task, "result": result})
 
         reflection = invoke_chain()
-        reflection_id = self.reflection_manager.save_reflection(reflection)
+        if judgment is not None:
+            # 재시도 여부는 이미 이 판정으로 결정되었으므로 저장되는 리플렉션도 같은 판정을 갖는다
+            reflection.judgment = judgment
+        if self.write_behind:
+            reflection.id = self.reflection_manager.enqueue_reflection(reflection, self.pattern)
+        else:
+            reflection.id = self.reflection_manager.save_reflection(reflection, self.pattern)
+
+        return reflection
+
+    def _batch_chain(self):
+        prompt = ChatPromptTemplate.from_template(
+            "주어진 태스크 {count}개와 각 태스크의 실행 결과:\n{task_results}\n\n"
+            "당신은 고도의 추론 능력을 가진 AI 에이전트입니다. 위 태스크들을 실행한 결과를 하나씩 분석하고, 각 태스크에 대한 당신의 접근이 적절했는지 반성하세요.\n"
+            "태스크마다 아래 항목에 따라 리플렉션 내용을 출력하세요. 리플렉션은 입력과 같은 순서로 정확히 {count}개여야 합니다.\n\n"
+            "리플렉션:\n"
+            "이 태스크에 대한 접근 시 당신의 사고 프로세스나 방법을 되돌아보세요. 개선할 수 있는 부분이 있었습니까?\n"
+            "다음에 유사한 태스크를 수행할 때, 더 나은 결과를 내기 위한 교훈을 2~3문장 정도로 간결하게 서술하세요.\n\n"
+            "판정:\n"
+            "- 결과의 적절성(needs_retry): 태스크 실행 결과가 부적절하여 재시도가 필요한지 boolean 값으로 표시하세요.\n"
+            "- 판정의 자신감(confidence): 위 판단에 대한 당신의 자신감 정도를 0부터 1까지의 소수로 표시하세요.\n"
+            "- 판정의 이유(reasons): 태스크 실행 결과의 적절성과 그에 대한 자신감에 대해 판단에 이른 이유를 간결하게 나열하세요.\n\n"
+            "반드시 한국어로 출력하세요.\n\n"
+            "IMPORTANT: You MUST use the provided tool to respond. Do NOT output raw text or XML."
+        )
+
+        return prompt | self.batch_llm
+
+    def run_batch(self, tasks: list[str], results: list[str]) -> list[Reflection]:
+        """여러 태스크의 실행 결과를 한 번의 구조화 출력 호출로 리플렉션한다.
+
+        지시문을 한 번만 보내고, 저장도 한 번의 임베딩 요청과 로그 쓰기(write-behind이면 저장
+        큐)로 끝난다. 모든 결과가 나온 뒤에 판정하므로 태스크를 동시에 실행했거나 실행이 끝난
+        뒤 사후 리플렉션을 할 때 쓴다. judge는 쓰지 않는다. 응답의 리플렉션 수가 태스크 수와
+        다르면 다시 요청한다.
+        """
+        if len(tasks) != len(results):
+            raise ValueError(f"태스크 {len(tasks)}개와 결과 {len(results)}개의 수가 다릅니다")
+        if not tasks:
+            return []
+        chain = self._batch_chain()
+        task_results = "\n".join(
+            f"<task_{i}><task>{task}</task><result>{result}</result></task_{i}>"
+            for i, (task, result) in enumerate(zip(tasks, results))
+        )
+
+        @retry(tries=5)
+        def invoke_chain() -> list[Reflection]:
+            batch = chain.invoke({"count": len(tasks), "task_results": task_results})
+            if len(batch.reflections) != len(tasks):
+                raise ValueError(
+                    f"리플렉션 {len(batch.reflections)}개를 받았습니다 (태스크 {len(tasks)}개)"
+                )
+            return batch.reflections
+
+        reflections = invoke_chain()
+        for reflection, task in zip(reflections, tasks):
+            # 모델이 태스크를 요약해 옮겨 적더라도 원래 태스크로 저장한다
+            reflection.task = task
+        if self.write_behind:
+            for reflection in reflections:
+                reflection.id = self.reflection_manager.enqueue_reflection(
+                    reflection, self.pattern
+                )
+        else:
+            self.reflection_manager.save_reflections(reflections, self.pattern)
+
+        return reflections
+
+    async def arun(self, task: str, result: str) -> Reflection:
+        """run의 비동기 버전. LLM 호출은 ainvoke, 저장은 asave_reflection을 사용한다."""
+        if self.judge is not None:
+            judgment = await self.judge.ajudge(task, result)
+            if judgment is not None:
+                return self._defer_lesson(task, result, judgment)
+        chain = self._chain()
+
+        # retry 데코레이터는 코루틴을 지원하지 않으므로 같은 횟수만큼 직접 재시도한다
+        for attempt in range(5):
+            try:
+                reflection = await chain.ainvoke({"task": task, "result": result})
+                break
+            except Exception:
+                if attempt == 4:
+                    raise
+        if self.write_behind:
+            # 큐가 가득 차면 enqueue가 기다리므로 이벤트 루프를 막지 않도록 executor에서 호출한다
+            reflection_id = await asyncio.get_running_loop().run_in_executor(
+                None, self.reflection_manager.enqueue_reflection, reflection, self.pattern
+            )
+        else:
+            reflection_id = await self.reflection_manager.asave_reflection(
+                reflection, self.pattern
+            )
         reflection.id = reflection_id
 
         return reflection
+
+    def resolve(self, reflection_id: str) -> str:
+        """run이 반환한 ID를 저장소의 ID로 바꾼다. 교훈을 작성 중이면 끝날 때까지 기다린다.
+
+        바꾼 ID는 더 추적하지 않으므로 같은 임시 ID는 한 번만 바꿀 수 있다.
+        """
+        future = self._lessons.pop(reflection_id, None)
+        if future is None:
+            return reflection_id
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error writing deferred reflection: {e}")
+            return reflection_id
+
+    def flush(self) -> None:
+        """백그라운드에서 작성 중인 교훈이 모두 저장될 때까지 기다린다."""
+        for reflection_id in list(self._lessons):
+            self.resolve(reflection_id)
+
+    def _defer_lesson(self, task: str, result: str, judgment: ReflectionJudgment) -> Reflection:
+        # 판정만 담은 리플렉션을 바로 반환하고, 교훈은 고성능 모델이 백그라운드에서 작성해 저장한다
+        reflection = Reflection(id=str(uuid.uuid4()), task=task, reflection="", judgment=judgment)
+        if self._lesson_pool is None:
+            self._lesson_pool = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="reflection-lesson"
+            )
+        self._lessons[reflection.id] = self._lesson_pool.submit(
+            lambda: self._reflect(task, result, judgment).id
+        )
+        return reflection
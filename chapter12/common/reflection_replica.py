@@ -0,0 +1,211 @@
+import asyncio
+import json
+import mmap
+import threading
+from typing import Optional
+
+import numpy as np
+from common.reflection_columns import ReflectionColumns
+from common.reflection_filter import ReflectionFilter
+from common.reflection_manager import (
+    StoredReflection,
+    create_embeddings,
+    create_index,
+    nearest_rows,
+)
+from common.reflection_store import ReflectionStore
+from langchain_core.embeddings import Embeddings
+from settings import Settings
+
+settings = Settings()
+
+
+class _ReplicaSnapshot:
+    """복제본이 연 한 세대의 스냅샷. 만들어진 뒤에는 바뀌지 않으므로 잠금 없이 읽는다."""
+
+    def __init__(self, store: ReflectionStore, generation: int):
+        snapshot = store.open_snapshot(generation)
+        self.generation = generation
+        self.embedding_matrix = snapshot.embeddings
+        with open(snapshot.meta_path, "rb") as file:
+            size = file.seek(0, 2)
+            self._meta = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if snapshot.offsets is not None and snapshot.columns:
+            self.offsets = snapshot.offsets
+            self.columns = ReflectionColumns.from_arrays(snapshot.columns)
+        else:
+            # 열 배열이 없는 이전 형식의 스냅샷: 메타데이터를 한 번 파싱한다
+            self.offsets, self.columns = self._parse_meta()
+
+        self.index = create_index(self.embedding_matrix)
+        info = store.read_index_checkpoint(generation)
+        if not (
+            info is not None
+            and info.get("sequence") == self.columns.size
+            and self.index.restore(store.index_checkpoint_path(generation), info, mmap=True)
+        ):
+            # 체크포인트가 없으면(승격 전 등) 직접 만든다
+            self.index = create_index(self.embedding_matrix)
+            for start, block in self.embedding_matrix.blocks():
+                self.index.add(block, np.arange(start, start + len(block)))
+
+    def __len__(self) -> int:
+        return self.columns.size
+
+    def record(self, row: int) -> StoredReflection:
+        line = self._meta[self.offsets[row] : self.offsets[row + 1]]
+        return StoredReflection(**json.loads(line))
+
+    def _parse_meta(self) -> tuple[np.ndarray, ReflectionColumns]:
+        offsets, columns = [0], ReflectionColumns()
+        for line in self._meta[:].split(b"\n")[:-1]:
+            columns.append(json.loads(line))
+            offsets.append(offsets[-1] + len(line) + 1)
+        return np.array(offsets, dtype="int64"), columns
+
+
+class ReflectionReplica:
+    """ReflectionManager가 공개한 스냅샷을 읽는 읽기 전용 복제본.
+
+    쓰기 프로세스가 publish_snapshot(또는 compaction)으로 새 세대를 공개하면, 백그라운드
+    스레드가 poll_interval마다 manifest를 확인해 새 세대의 파일을 mmap으로 열고 참조 하나만
+    바꿔 끼운다. 열 배열과 인덱스 체크포인트가 스냅샷과 함께 공개되므로 교체에 메타데이터
+    파싱이나 인덱스 재구축이 필요 없다. 검색은 시작 시점의 세대를 끝까지 사용하므로 잠금을
+    잡지 않으며, 교체 중에도 막히지 않는다. 로그에만 있고 아직 공개되지 않은 리플렉션은
+    보이지 않는다.
+    """
+
+    def __init__(
+        self,
+        file_path: str = settings.default_reflection_db_path,
+        embeddings: Optional[Embeddings] = None,
+        poll_interval: float = settings.reflection_replica_poll_interval,
+    ):
+        self.file_path = file_path
+        self.embeddings = embeddings or create_embeddings()
+        self.store = ReflectionStore(file_path)
+        self.rerank_factor = settings.reflection_rerank_factor
+        self.poll_interval = poll_interval
+        self._snapshot: Optional[_ReplicaSnapshot] = None
+        self.refresh()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        if poll_interval > 0:
+            self._watcher = threading.Thread(target=self._watch, daemon=True)
+            self._watcher.start()
+
+    @property
+    def generation(self) -> int:
+        """현재 검색에 쓰는 스냅샷 세대 (아직 공개된 스냅샷이 없으면 0)."""
+        return self._snapshot.generation if self._snapshot is not None else 0
+
+    def __len__(self) -> int:
+        return len(self._snapshot) if self._snapshot is not None else 0
+
+    def refresh(self) -> bool:
+        """더 새로운 세대가 공개되었으면 열어서 교체하고 True를 반환한다."""
+        manifest = self.store.read_manifest()
+        if manifest is None or manifest["generation"] == self.generation:
+            return False
+        try:
+            snapshot = _ReplicaSnapshot(self.store, manifest["generation"])
+        except FileNotFoundError:
+            # 여는 사이에 다음 세대가 공개되어 파일이 지워졌다. 다음 폴링에서 새 세대를 연다
+            return False
+        self._snapshot = snapshot
+        return True
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def get_relevant_reflections(
+        self,
+        query: str,
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+    ) -> list[StoredReflection]:
+        if not len(self):
+            return []
+        return self.get_relevant_reflections_batch([query], k, filter, max_distance)[0]
+
+    def get_relevant_reflections_batch(
+        self,
+        queries: list[str],
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+    ) -> list[list[StoredReflection]]:
+        if not queries:
+            return []
+        if len(queries) == 1:
+            query_embeddings = [self.embeddings.embed_query(queries[0])]
+        else:
+            query_embeddings = self.embeddings.embed_documents(queries)
+        return self._search(query_embeddings, k, filter, max_distance)
+
+    async def aget_relevant_reflections(
+        self,
+        query: str,
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+    ) -> list[StoredReflection]:
+        if not len(self):
+            return []
+        return (
+            await self.aget_relevant_reflections_batch([query], k, filter, max_distance)
+        )[0]
+
+    async def aget_relevant_reflections_batch(
+        self,
+        queries: list[str],
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+    ) -> list[list[StoredReflection]]:
+        if not queries:
+            return []
+        query_embeddings = await self.embeddings.aembed_documents(queries)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self._search, query_embeddings, k, filter, max_distance
+        )
+
+    def _search(
+        self,
+        query_embeddings: list[list[float]],
+        k: int,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+    ) -> list[list[StoredReflection]]:
+        # 검색하는 동안 세대가 교체되어도 이 검색은 처음 잡은 세대를 쓴다
+        snapshot = self._snapshot
+        if snapshot is None or not snapshot.index.ntotal:
+            return [[] for _ in query_embeddings]
+        if max_distance is None and settings.reflection_search_max_distance > 0:
+            max_distance = settings.reflection_search_max_distance
+        try:
+            rows = nearest_rows(
+                snapshot.index,
+                snapshot.columns,
+                snapshot.embedding_matrix,
+                np.array(query_embeddings).astype("float32"),
+                k,
+                filter,
+                max_distance,
+                self.rerank_factor,
+            )
+            return [[snapshot.record(i) for i in row] for row in rows]
+        except Exception as e:
+            print(f"Error during reflection search: {e}")
+            return [[] for _ in query_embeddings]
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing reflection replica: {e}")
@@ -0,0 +1,285 @@
+import asyncio
+import json
+import os
+import socket
+import socketserver
+import threading
+from typing import Any, Optional, Union
+
+from common.reflection_filter import ReflectionFilter
+from common.reflection_manager import (
+    Reflection,
+    ReflectionManager,
+    SearchMode,
+    StoredReflection,
+)
+from common.reflection_shards import ShardedReflectionManager
+from langchain_core.embeddings import Embeddings
+from settings import Settings
+
+settings = Settings()
+
+
+def socket_path_for(file_path: str) -> str:
+    """리플렉션 DB 경로에 대응하는 Unix 소켓 경로 (예: tmp/self_reflection_db.sock)."""
+    return f"{os.path.splitext(file_path)[0]}.sock"
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    # 한 연결에서 줄 단위 JSON 요청/응답을 반복한다: {"method", "params"} → {"result"} | {"error"}
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = {
+                    "result": self.server.dispatch(
+                        request["method"], request.get("params", {})
+                    )
+                }
+            except Exception as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+            self.wfile.flush()
+
+
+class ReflectionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """하나의 ReflectionManager를 Unix 소켓으로 여러 에이전트 프로세스에 공유하는 단일 작성자 서버.
+
+    연결마다 스레드가 요청을 처리하고, 쓰기와 검색은 ReflectionManager 내부 잠금으로
+    직렬화된다(임베딩 API 호출은 잠금 밖에서 병렬로 수행). 인덱스와 DB는 서버 프로세스에만
+    한 벌 존재하며, 클라이언트는 DB를 다시 읽지 않고 검색 결과만 받는다.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, manager: ReflectionManager):
+        if os.path.exists(socket_path):
+            # 이전 서버가 비정상 종료하며 남긴 소켓 파일
+            os.remove(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+        self.socket_path = socket_path
+        self.manager = manager
+
+    def dispatch(self, method: str, params: dict[str, Any]) -> Any:
+        if method == "save_reflection":
+            return self.manager.save_reflection(
+                Reflection(**params["reflection"]), params.get("pattern", "")
+            )
+        if method == "save_reflections":
+            return self.manager.save_reflections(
+                [Reflection(**reflection) for reflection in params["reflections"]],
+                params.get("pattern", ""),
+            )
+        if method == "enqueue_reflection":
+            return self.manager.enqueue_reflection(
+                Reflection(**params["reflection"]), params.get("pattern", "")
+            )
+        if method == "flush":
+            return self.manager.flush()
+        if method == "update_reflection":
+            return self.manager.update_reflection(Reflection(**params["reflection"]))
+        if method == "delete_reflection":
+            return self.manager.delete_reflection(params["reflection_id"])
+        if method == "get_reflection":
+            reflection = self.manager.get_reflection(params["reflection_id"])
+            return reflection.model_dump() if reflection else None
+        if method == "get_relevant_reflections_batch":
+            return [
+                [reflection.model_dump() for reflection in reflections]
+                for reflections in self.manager.get_relevant_reflections_batch(
+                    params["queries"],
+                    params.get("k", 3),
+                    ReflectionFilter(**params["filter"]) if params.get("filter") else None,
+                    params.get("max_distance"),
+                    params.get("mode"),
+                )
+            ]
+        if method == "embed_queries":
+            return self.manager.embed_queries(params["queries"])
+        if method == "count":
+            return len(self.manager.reflections)
+        raise ValueError(f"알 수 없는 메서드입니다: {method}")
+
+    def server_close(self):
+        super().server_close()
+        self.manager.close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class RemoteReflectionManager:
+    """ReflectionServer에 연결해 ReflectionManager와 같은 인터페이스를 제공하는 클라이언트."""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.connect(socket_path)
+        self._file = self._socket.makefile("rwb")
+        self._lock = threading.Lock()
+
+    def _call(self, method: str, **params) -> Any:
+        request = json.dumps({"method": method, "params": params}, ensure_ascii=False)
+        with self._lock:
+            self._file.write(request.encode() + b"\n")
+            self._file.flush()
+            line = self._file.readline()
+        if not line:
+            raise ConnectionError("리플렉션 서버와의 연결이 끊어졌습니다")
+        response = json.loads(line)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    def save_reflection(self, reflection: Reflection, pattern: str = "") -> str:
+        reflection.id = self._call(
+            "save_reflection", reflection=reflection.model_dump(), pattern=pattern
+        )
+        return reflection.id
+
+    def save_reflections(self, reflections: list[Reflection], pattern: str = "") -> list[str]:
+        ids = self._call(
+            "save_reflections",
+            reflections=[reflection.model_dump() for reflection in reflections],
+            pattern=pattern,
+        )
+        for reflection, reflection_id in zip(reflections, ids):
+            reflection.id = reflection_id
+        return ids
+
+    async def asave_reflection(self, reflection: Reflection, pattern: str = "") -> str:
+        # 요청·응답은 블로킹 소켓으로 주고받으므로 이벤트 루프를 막지 않도록 스레드에서 호출한다
+        return await asyncio.to_thread(self.save_reflection, reflection, pattern)
+
+    def enqueue_reflection(self, reflection: Reflection, pattern: str = "") -> str:
+        # 서버의 저장 큐에 넣는다. 임베딩과 로그 쓰기는 서버 프로세스의 작업 스레드가 수행한다
+        reflection.id = self._call(
+            "enqueue_reflection", reflection=reflection.model_dump(), pattern=pattern
+        )
+        return reflection.id
+
+    def flush(self) -> None:
+        self._call("flush")
+
+    def update_reflection(self, reflection: Reflection) -> bool:
+        return self._call("update_reflection", reflection=reflection.model_dump())
+
+    def delete_reflection(self, reflection_id: str) -> bool:
+        return self._call("delete_reflection", reflection_id=reflection_id)
+
+    def get_reflection(self, reflection_id: str) -> Optional[StoredReflection]:
+        item = self._call("get_reflection", reflection_id=reflection_id)
+        return StoredReflection(**item) if item else None
+
+    def get_relevant_reflections(
+        self,
+        query: str,
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+    ) -> list[StoredReflection]:
+        return self.get_relevant_reflections_batch([query], k, filter, max_distance, mode)[0]
+
+    def get_relevant_reflections_batch(
+        self,
+        queries: list[str],
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+    ) -> list[list[StoredReflection]]:
+        return [
+            [StoredReflection(**item) for item in items]
+            for items in self._call(
+                "get_relevant_reflections_batch",
+                queries=queries,
+                k=k,
+                filter=filter.model_dump() if filter else None,
+                max_distance=max_distance,
+                mode=mode,
+            )
+        ]
+
+    async def aget_relevant_reflections(
+        self,
+        query: str,
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+    ) -> list[StoredReflection]:
+        return (
+            await self.aget_relevant_reflections_batch([query], k, filter, max_distance, mode)
+        )[0]
+
+    async def aget_relevant_reflections_batch(
+        self,
+        queries: list[str],
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+    ) -> list[list[StoredReflection]]:
+        return await asyncio.to_thread(
+            self.get_relevant_reflections_batch, queries, k, filter, max_distance, mode
+        )
+
+    def embed_queries(self, queries: list[str]) -> None:
+        # 쿼리 임베딩 캐시는 서버의 매니저에 있으므로 서버에서 계산해 둔다
+        self._call("embed_queries", queries=queries)
+
+    def count(self) -> int:
+        return self._call("count")
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+
+def connect_reflection_manager(
+    file_path: str = settings.default_reflection_db_path,
+    embeddings: Optional[Embeddings] = None,
+) -> Union[RemoteReflectionManager, ReflectionManager, ShardedReflectionManager]:
+    """DB에 대응하는 리플렉션 서버가 떠 있으면 연결하고, 없으면 프로세스 내 ReflectionManager를 만든다.
+
+    reflection_shard_root가 설정되어 있으면 file_path 대신 그 아래의 샤드 저장소
+    (ShardedReflectionManager)를 열어, 패턴별 샤드에 저장하고 전체 샤드에서 검색한다.
+    """
+    if settings.reflection_shard_root:
+        return ShardedReflectionManager(settings.reflection_shard_root, embeddings)
+    socket_path = socket_path_for(file_path)
+    if settings.reflection_server_enabled and os.path.exists(socket_path):
+        try:
+            return RemoteReflectionManager(socket_path)
+        except OSError:
+            pass  # 남아 있는 소켓 파일만 있고 서버는 없는 경우
+    return ReflectionManager(file_path=file_path, embeddings=embeddings)
+
+
+# main 함수: 리플렉션 DB 하나를 담당하는 서버를 실행한다
+def main():
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(
+        description="여러 에이전트 프로세스가 공유하는 리플렉션 서버를 실행합니다"
+    )
+    parser.add_argument(
+        "--db", type=str, default=settings.default_reflection_db_path, help="리플렉션 DB 경로"
+    )
+    args = parser.parse_args()
+
+    server = ReflectionServer(socket_path_for(args.db), ReflectionManager(file_path=args.db))
+    # SIGTERM으로도 로그를 flush하고 소켓을 정리한 뒤 종료하도록 한다
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"리플렉션 서버 시작: {server.socket_path} (리플렉션 {len(server.manager.reflections)}개)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import asyncio
+import heapq
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from common.reflection_filter import ReflectionFilter
+from common.reflection_lexical import reciprocal_rank_fusion
+from common.reflection_manager import (
+    QueryEmbeddingCache,
+    Reflection,
+    ReflectionManager,
+    SearchMode,
+    StoredReflection,
+    create_embeddings,
+)
+from langchain_core.embeddings import Embeddings
+from settings import Settings
+
+settings = Settings()
+
+_NAMESPACE = re.compile(r"^[A-Za-z0-9_.-]+$")
+_DB_NAME = "reflection_db.json"
+
+
+class ShardedReflectionManager:
+    """네임스페이스(테넌트·에이전트 패턴·주제 등)마다 저장소와 검색 인덱스를 따로 두는 리플렉션 매니저.
+
+    각 네임스페이스는 root/{namespace}/ 아래의 독립된 ReflectionManager(샤드)이며 처음
+    쓰일 때 열린다. 저장은 한 샤드에만 하고, 검색은 지정한 샤드들(기본값은 전체)에
+    병렬로 보낸 뒤 결과를 합쳐 top-k를 만든다. 쿼리 임베딩은 샤드 수와 상관없이 한 번만
+    계산한다. ReflectionManager와 같은 메서드를 제공하므로 에이전트에 그대로 넘길 수 있다.
+    """
+
+    def __init__(
+        self,
+        root: str = settings.reflection_shard_root,
+        embeddings: Optional[Embeddings] = None,
+        default_namespace: str = "default",
+        search_workers: int = settings.reflection_shard_search_workers,
+    ):
+        self.root = root
+        self.embeddings = embeddings or create_embeddings()
+        # 샤드 전체에 한 번만 계산하는 쿼리 임베딩의 캐시
+        self.query_embeddings = QueryEmbeddingCache(self.embeddings)
+        self.default_namespace = default_namespace
+        self.shards: dict[str, ReflectionManager] = {}
+        self._lock = threading.Lock()
+        # faiss 검색은 GIL을 놓으므로 스레드로 샤드를 동시에 검색한다. 워커가 하나면 스레드에
+        # 넘기는 비용만 더해지므로 호출한 스레드에서 차례로 검색한다
+        workers = search_workers or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        self._namespaces: Optional[list[str]] = None
+        os.makedirs(root, exist_ok=True)
+
+    def namespaces(self, refresh: bool = False) -> list[str]:
+        """디스크에 있거나 이미 열린 네임스페이스 목록.
+
+        디렉터리 목록은 처음 한 번만 읽고 캐시한다. 다른 프로세스가 만든 네임스페이스를
+        보려면 refresh=True로 다시 읽는다.
+        """
+        if self._namespaces is None or refresh:
+            on_disk = {
+                name
+                for name in os.listdir(self.root)
+                if os.path.isdir(os.path.join(self.root, name)) and _NAMESPACE.match(name)
+            }
+            self._namespaces = sorted(on_disk | set(self.shards))
+        return self._namespaces
+
+    def shard(self, namespace: str) -> ReflectionManager:
+        """네임스페이스의 샤드를 반환한다. 없으면 새로 만든다."""
+        if not _NAMESPACE.match(namespace):
+            raise ValueError(f"네임스페이스에는 영문자·숫자·'_'·'.'·'-'만 쓸 수 있습니다: {namespace!r}")
+        with self._lock:
+            shard = self.shards.get(namespace)
+            if shard is None:
+                directory = os.path.join(self.root, namespace)
+                os.makedirs(directory, exist_ok=True)
+                shard = ReflectionManager(
+                    file_path=os.path.join(directory, _DB_NAME), embeddings=self.embeddings
+                )
+                self.shards[namespace] = shard
+                if self._namespaces is not None and namespace not in self._namespaces:
+                    self._namespaces = sorted([*self._namespaces, namespace])
+            return shard
+
+    def __len__(self) -> int:
+        return sum(len(self.shard(namespace).reflections) for namespace in self.namespaces())
+
+    def save_reflection(
+        self, reflection: Reflection, pattern: str = "", namespace: Optional[str] = None
+    ) -> str:
+        """리플렉션을 namespace(없으면 pattern, 그것도 없으면 default_namespace)의 샤드에 저장한다."""
+        return self.shard(self._namespace_for(pattern, namespace)).save_reflection(
+            reflection, pattern
+        )
+
+    def save_reflections(
+        self, reflections: list[Reflection], pattern: str = "", namespace: Optional[str] = None
+    ) -> list[str]:
+        """여러 리플렉션을 한 샤드에 한 번의 임베딩 요청과 로그 쓰기로 저장한다."""
+        return self.shard(self._namespace_for(pattern, namespace)).save_reflections(
+            reflections, pattern
+        )
+
+    async def asave_reflection(
+        self, reflection: Reflection, pattern: str = "", namespace: Optional[str] = None
+    ) -> str:
+        shard = self.shard(self._namespace_for(pattern, namespace))
+        return await shard.asave_reflection(reflection, pattern)
+
+    def enqueue_reflection(
+        self, reflection: Reflection, pattern: str = "", namespace: Optional[str] = None
+    ) -> str:
+        """save_reflection의 write-behind 버전. 샤드의 저장 큐에 넣고 ID를 바로 반환한다."""
+        return self.shard(self._namespace_for(pattern, namespace)).enqueue_reflection(
+            reflection, pattern
+        )
+
+    def flush(self) -> None:
+        with self._lock:
+            shards = list(self.shards.values())
+        for shard in shards:
+            shard.flush()
+
+    def update_reflection(self, reflection: Reflection) -> bool:
+        shard = self._shard_of(reflection.id)
+        return shard is not None and shard.update_reflection(reflection)
+
+    def delete_reflection(self, reflection_id: str) -> bool:
+        shard = self._shard_of(reflection_id)
+        return shard is not None and shard.delete_reflection(reflection_id)
+
+    def get_reflection(self, reflection_id: str) -> Optional[StoredReflection]:
+        shard = self._shard_of(reflection_id)
+        return shard.get_reflection(reflection_id) if shard is not None else None
+
+    def get_relevant_reflections(
+        self,
+        query: str,
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+        namespaces: Optional[list[str]] = None,
+    ) -> list[StoredReflection]:
+        return self.get_relevant_reflections_batch(
+            [query], k, filter, max_distance, mode, namespaces
+        )[0]
+
+    def get_relevant_reflections_batch(
+        self,
+        queries: list[str],
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+        namespaces: Optional[list[str]] = None,
+    ) -> list[list[StoredReflection]]:
+        """namespaces(None이면 전체)의 샤드를 병렬로 검색해 합친 top-k를 반환한다.
+
+        벡터 검색은 샤드별 결과를 쿼리와의 L2² 거리로 합친다. lexical 검색은 BM25 점수가
+        샤드마다 다른 문서 통계로 계산되므로, 샤드 안의 순위로 번갈아 합친다. hybrid 검색은
+        샤드마다 벡터·BM25 후보를 따로 받아 위의 방식으로 각각 합친 뒤, 전체 순위에 한 번만
+        RRF를 적용한다.
+        """
+        if not queries:
+            return []
+        mode = mode or settings.reflection_search_mode
+        query_embeddings = None
+        if mode != "lexical":
+            query_embeddings = self.query_embeddings.embed(queries)
+        return self._fan_out(queries, query_embeddings, k, filter, max_distance, mode, namespaces)
+
+    def embed_queries(self, queries: list[str]) -> None:
+        """검색은 하지 않고 쿼리 임베딩만 계산해 캐시에 넣는다 (ReflectionManager.embed_queries 참고)."""
+        if queries and settings.reflection_search_mode != "lexical":
+            self.query_embeddings.embed(queries)
+
+    async def aget_relevant_reflections(
+        self,
+        query: str,
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+        namespaces: Optional[list[str]] = None,
+    ) -> list[StoredReflection]:
+        return (
+            await self.aget_relevant_reflections_batch(
+                [query], k, filter, max_distance, mode, namespaces
+            )
+        )[0]
+
+    async def aget_relevant_reflections_batch(
+        self,
+        queries: list[str],
+        k: int = 3,
+        filter: Optional[ReflectionFilter] = None,
+        max_distance: Optional[float] = None,
+        mode: Optional[SearchMode] = None,
+        namespaces: Optional[list[str]] = None,
+    ) -> list[list[StoredReflection]]:
+        """get_relevant_reflections_batch의 비동기 버전. 샤드 검색은 executor 스레드에서 수행한다."""
+        if not queries:
+            return []
+        mode = mode or settings.reflection_search_mode
+        query_embeddings = None
+        if mode != "lexical":
+            query_embeddings = await self.query_embeddings.aembed(queries)
+        return await asyncio.get_running_loop().run_in_executor(
+            None,
+            self._fan_out,
+            queries,
+            query_embeddings,
+            k,
+            filter,
+            max_distance,
+            mode,
+            namespaces,
+        )
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+        with self._lock:
+            for shard in self.shards.values():
+                shard.close()
+            self.shards.clear()
+
+    def _fan_out(
+        self,
+        queries: list[str],
+        query_embeddings: Optional[list[list[float]]],
+        k: int,
+        filter: Optional[ReflectionFilter],
+        max_distance: Optional[float],
+        mode: SearchMode,
+        namespaces: Optional[list[str]],
+    ) -> list[list[StoredReflection]]:
+        known = self.namespaces()
+        if namespaces is not None:
+            # 없는 네임스페이스는 검색하려고 새로 만들지 않는다
+            known = [namespace for namespace in namespaces if namespace in known]
+        shards = [self.shard(namespace) for namespace in known]
+        if not shards:
+            return [[] for _ in queries]
+        texts = queries if mode != "vector" else None
+        # hybrid는 샤드 안에서 합친 순위를 다시 합치면 RRF 점수를 비교할 수 없으므로, 샤드마다
+        # 벡터·BM25 순위를 따로 받아 모든 샤드의 후보로 한 번만 RRF를 적용한다
+        hybrid = query_embeddings is not None and texts is not None
+        fetch = k * settings.reflection_hybrid_candidates if hybrid else k
+
+        def search(shard: ReflectionManager) -> list[list[list[tuple[float, int]]]]:
+            if hybrid:
+                return [
+                    shard._search_scored(query_embeddings, fetch, filter, max_distance, None),
+                    shard._search_scored(None, fetch, filter, max_distance, texts),
+                ]
+            return [shard._search_scored(query_embeddings, k, filter, max_distance, texts)]
+
+        if len(shards) == 1 or self._pool is None:
+            results = [search(shard) for shard in shards]
+        else:
+            results = list(self._pool.map(search, shards))
+        merged = []
+        for i in range(len(queries)):
+            # 샤드별 결과(이미 점수 순)를 점수가 작은 순서로 합친다. lexical은 점수가 순위이므로
+            # 샤드들의 결과를 번갈아 고른다
+            rankings = [
+                [
+                    (shard, row)
+                    for _, shard, row in heapq.nsmallest(
+                        fetch,
+                        (
+                            (score, shard, row)
+                            for shard, result in enumerate(results)
+                            for score, row in result[ranking][i]
+                        ),
+                    )
+                ]
+                for ranking in range(len(results[0]))
+            ]
+            if hybrid:
+                best = reciprocal_rank_fusion(rankings, settings.reflection_rrf_k)[:k]
+            else:
+                best = rankings[0]
+            # k개만 객체로 만든다
+            by_shard: dict[int, list[int]] = {}
+            for shard, row in best:
+                by_shard.setdefault(shard, []).append(row)
+            records = {
+                (shard, row): reflection
+                for shard, rows in by_shard.items()
+                for row, reflection in zip(rows, shards[shard].records(rows))
+            }
+            merged.append([records[key] for key in best if records[key] is not None])
+        return merged
+
+    def _namespace_for(self, pattern: str, namespace: Optional[str]) -> str:
+        return namespace or pattern or self.default_namespace
+
+    def _shard_of(self, reflection_id: str) -> Optional[ReflectionManager]:
+        for namespace in self.namespaces():
+            shard = self.shard(namespace)
+            # 저장 큐에서 아직 기다리는 리플렉션도 찾도록 get_reflection으로 확인한다
+            if shard.get_reflection(reflection_id) is not None:
+                return shard
+        return None
@@ -0,0 +1,573 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Callable, Iterator, Literal, NamedTuple, Optional, Union
+
+import numpy as np
+from pydantic import BaseModel
+
+FsyncPolicy = Literal["always", "interval", "never"]
+
+
+def write_atomically(path: str, write: Callable[[str], None]) -> None:
+    """write(임시 경로)로 같은 디렉터리의 고유한 임시 파일에 쓴 뒤 path로 원자적으로 교체한다.
+
+    같은 path를 여러 스레드가 동시에 써도 임시 파일이 겹치지 않으며, 쓰다가 실패하면
+    임시 파일을 지우고 기존 path는 그대로 둔다.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}.", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class EmbeddingMatrix:
+    """리플렉션 임베딩을 보관하는 행렬.
+
+    스냅샷에서 읽은 부분(base)은 읽기 전용 mmap으로 두고(스냅샷 자료형에 따라 float32
+    또는 float16), 이후 추가된 행만 메모리상의 float32 버퍼(tail)에 용량을 두 배씩
+    늘려 가며 쌓는다. 행 순서는 리플렉션 저장 순서와 같다.
+    """
+
+    def __init__(self, base: Optional[np.ndarray] = None):
+        self.base = base if base is not None and len(base) else None
+        self.dim: Optional[int] = self.base.shape[1] if self.base is not None else None
+        self._tail: Optional[np.ndarray] = None
+        self._tail_size = 0
+
+    def __len__(self) -> int:
+        return (len(self.base) if self.base is not None else 0) + self._tail_size
+
+    def append(self, vector) -> None:
+        vector = np.asarray(vector, dtype="float32")
+        if self.dim is None:
+            self.dim = vector.shape[-1]
+        if self._tail is None or self._tail_size == len(self._tail):
+            capacity = max(16, 2 * self._tail_size)
+            grown = np.empty((capacity, self.dim), "float32")
+            if self._tail is not None:
+                grown[: self._tail_size] = self._tail[: self._tail_size]
+            self._tail = grown
+        self._tail[self._tail_size] = vector
+        self._tail_size += 1
+
+    def extend(self, vectors: np.ndarray) -> None:
+        """여러 행을 한 번에 추가한다. 대량 가져오기에서 행마다 append하는 비용을 없앤다."""
+        vectors = np.asarray(vectors, dtype="float32")
+        if not len(vectors):
+            return
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        needed = self._tail_size + len(vectors)
+        if self._tail is None or needed > len(self._tail):
+            capacity = max(16, 2 * self._tail_size, needed)
+            grown = np.empty((capacity, self.dim), "float32")
+            if self._tail is not None:
+                grown[: self._tail_size] = self._tail[: self._tail_size]
+            self._tail = grown
+        self._tail[self._tail_size : needed] = vectors
+        self._tail_size = needed
+
+    def row(self, i: int) -> np.ndarray:
+        base_size = len(self.base) if self.base is not None else 0
+        if i < base_size:
+            return self.base[i]
+        return self._tail[i - base_size]
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """지정한 행들을 float32 배열로 모은다. mmap된 부분은 해당 페이지만 읽는다."""
+        rows = np.asarray(rows, dtype="int64")
+        base_size = len(self.base) if self.base is not None else 0
+        result = np.empty((len(rows), self.dim), "float32")
+        in_base = rows < base_size
+        if in_base.any():
+            result[in_base] = self.base[rows[in_base]]
+        if not in_base.all():
+            result[~in_base] = self._tail[rows[~in_base] - base_size]
+        return result
+
+    def blocks(self, max_bytes: int = 64 * 2**20) -> Iterator[tuple[int, np.ndarray]]:
+        """(시작 행, float32 블록)을 차례로 돌려준다. float16 스냅샷은 블록 크기만큼만 변환된다."""
+        rows = max(1024, max_bytes // (4 * (self.dim or 1)))
+        offset = 0
+        for chunk in self.chunks():
+            for start in range(0, len(chunk), rows):
+                block = chunk[start : start + rows]
+                yield offset + start, np.ascontiguousarray(block, dtype="float32")
+            offset += len(chunk)
+
+    def chunks(self) -> list[np.ndarray]:
+        """현재 시점의 행들을 연속 배열 조각으로 반환한다(복사하지 않는다)."""
+        chunks = []
+        if self.base is not None and len(self.base):
+            chunks.append(self.base)
+        if self._tail_size:
+            chunks.append(self._tail[: self._tail_size])
+        return chunks
+
+
+class Snapshot(NamedTuple):
+    """공개된 한 세대의 스냅샷 (open_snapshot의 반환값)."""
+
+    generation: int
+    embeddings: EmbeddingMatrix
+    meta_path: str
+    # 메타데이터 파일에서 각 행이 시작하는 바이트 위치 (행 수 + 1개). 이전 형식이면 None
+    offsets: Optional[np.ndarray]
+    # compact에 넘긴 열 배열. 없으면 빈 dict
+    columns: dict[str, np.ndarray]
+
+
+class ReflectionStore:
+    """리플렉션을 스냅샷 + 추가 전용 로그(JSONL)로 영속화한다.
+
+    스냅샷은 세대(generation)별로 임베딩 행렬(.npy)과 메타데이터(.meta.jsonl)를 따로 쓰고,
+    manifest를 원자적으로 교체해 공개한다. 로드 시 임베딩은 mmap으로 열기 때문에
+    float 파싱 없이 그대로 faiss에 넘길 수 있다. 저장 1회당 로그에 레코드 한 줄만
+    추가하며, 로그가 compact_threshold를 넘으면 새 스냅샷으로 접어 넣는다(compaction).
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        fsync: FsyncPolicy = "always",
+        fsync_interval: float = 1.0,
+        compact_threshold: int = 1000,
+        dtype: str = "float32",
+    ):
+        # file_path는 기존 JSON DB 경로(예: tmp/self_reflection_db.json)이며, 확장자를 뗀 이름을 기준으로 파일을 만든다
+        self.file_path = file_path
+        self.base_path = os.path.splitext(file_path)[0]
+        self.manifest_path = f"{self.base_path}.manifest.json"
+        self.log_path = f"{self.base_path}.log"
+        # compaction 도중의 로그 세그먼트. 크래시 시에도 로드 시 재생된다.
+        self.rotated_log_path = f"{self.base_path}.log.old"
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_threshold = compact_threshold
+        # 스냅샷 임베딩 파일의 자료형. float16이면 디스크와 페이지 캐시 사용량이 절반이 된다
+        self.dtype = dtype
+        self.generation = 0
+        self.log_records = 0
+        self._last_fsync = time.monotonic()
+        self._lock = threading.Lock()
+        self._compaction_lock = threading.Lock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self._log_file = None
+
+    def load(self) -> tuple[list[Optional[dict]], EmbeddingMatrix]:
+        """스냅샷을 mmap으로 열고 로그 꼬리를 재생한다.
+
+        반환하는 리플렉션 목록은 임베딩 행렬의 행과 같은 순서이며, 이후 갱신되거나
+        삭제되어 더 이상 유효하지 않은 행은 None이다.
+        """
+        if not os.path.exists(self.manifest_path) and self._has_legacy_data():
+            self.migrate_legacy()
+
+        reflections: list[Optional[dict]] = []
+        matrix = EmbeddingMatrix()
+        positions: dict[str, int] = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                manifest = json.load(file)
+            self.generation = manifest["generation"]
+            matrix = EmbeddingMatrix(
+                np.load(self._embeddings_path(self.generation), mmap_mode="r")
+            )
+            with open(self._meta_path(self.generation), "r", encoding="utf-8") as file:
+                for line in file:
+                    item = json.loads(line)
+                    positions[item["id"]] = len(reflections)
+                    reflections.append(item)
+
+        self.log_records = 0
+        for path in (self.rotated_log_path, self.log_path):
+            for item in self._read_log(path):
+                self.log_records += 1
+                if item.get("op") == "delete":
+                    position = positions.pop(item["id"], None)
+                    if position is not None:
+                        reflections[position] = None
+                    continue
+                if item.get("op") == "meta":
+                    position = positions.get(item["reflection"]["id"])
+                    if position is not None:
+                        reflections[position] = item["reflection"]
+                    continue
+                # 같은 ID의 put은 갱신이다: 이전 행을 무효화하고 새 행을 추가한다
+                reflection_id = item["reflection"]["id"]
+                if reflection_id in positions:
+                    reflections[positions[reflection_id]] = None
+                positions[reflection_id] = len(reflections)
+                reflections.append(item["reflection"])
+                matrix.append(item["embedding"])
+        return reflections, matrix
+
+    def append(self, reflection: BaseModel, embedding: list[float]) -> None:
+        """리플렉션 추가 또는 갱신(같은 ID) 레코드를 로그에 기록한다."""
+        self._write_log_record(
+            {"reflection": reflection.model_dump(), "embedding": list(embedding)}
+        )
+
+    def append_many(
+        self,
+        added: list[tuple[BaseModel, list[float]]],
+        updated: list[BaseModel] = (),
+    ) -> None:
+        """여러 리플렉션의 추가 레코드와 메타데이터 레코드를 한 번의 쓰기·fsync로 기록한다.
+
+        updated는 기존 행 또는 added에 있는 행의 필드만 바꾸므로 추가 레코드 뒤에 기록한다.
+        """
+        self._write_log_records(
+            [
+                {"reflection": reflection.model_dump(), "embedding": list(embedding)}
+                for reflection, embedding in added
+            ]
+            + [{"op": "meta", "reflection": reflection.model_dump()} for reflection in updated]
+        )
+
+    def append_metadata(self, reflection: BaseModel) -> None:
+        """임베딩은 그대로 두고 리플렉션 필드만 바꾸는 레코드를 기록한다(행 번호 유지)."""
+        self._write_log_record({"op": "meta", "reflection": reflection.model_dump()})
+
+    def append_delete(self, reflection_id: str) -> None:
+        self._write_log_record({"op": "delete", "id": reflection_id})
+
+    def append_deletes(self, reflection_ids: list[str]) -> None:
+        """여러 삭제 레코드를 한 번의 쓰기·fsync로 기록한다."""
+        self._write_log_records(
+            [{"op": "delete", "id": reflection_id} for reflection_id in reflection_ids]
+        )
+
+    def _write_log_record(self, record: dict) -> None:
+        self._write_log_records([record])
+
+    def _write_log_records(self, records: list[dict]) -> None:
+        if not records:
+            return
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with self._lock:
+            log_file = self._open_log()
+            log_file.write(data)
+            log_file.flush()
+            self._maybe_fsync(log_file)
+            self.log_records += len(records)
+
+    def should_compact(self) -> bool:
+        return self.compact_threshold > 0 and self.log_records >= self.compact_threshold
+
+    def compact(
+        self,
+        reflections: Union[list[Optional[BaseModel]], Callable[[], list[Optional[dict]]]],
+        embeddings: EmbeddingMatrix,
+        wait: bool = True,
+        columns: Optional[dict[str, np.ndarray]] = None,
+        on_written: Optional[Callable[[int], None]] = None,
+    ) -> bool:
+        """메모리 상의 전체 상태를 새 세대의 스냅샷으로 쓰고 로그를 비운다.
+
+        reflections는 embeddings의 행과 같은 순서이며, None인 행은 스냅샷에서 제외된다.
+        리스트 대신 그런 리스트를 만드는 함수를 넘기면 스냅샷을 쓰는 스레드에서 호출하므로
+        레코드를 만드는 비용도 저장 경로에서 빠진다(함수는 호출 시점의 사본만 읽어야 한다).
+        이미 진행 중인 compaction이 있어 아무것도 하지 않았으면 False를 반환한다.
+
+        columns는 스냅샷 행(None이 아닌 행) 순서의 열 배열로, 함께 저장되어 open_snapshot으로
+        파싱 없이 읽을 수 있다. on_written(generation)은 스냅샷 파일을 다 쓴 뒤 manifest를
+        교체하기 직전에 호출되므로, 스냅샷과 함께 보여야 하는 파일을 쓰는 데 쓴다.
+
+        로그 회전은 잠금 아래에서 즉시 수행되고, 직렬화와 스냅샷 쓰기는 wait=False이면
+        백그라운드 스레드에서 진행되므로 저장 경로에는 레코드 참조를 복사하는 비용만 남는다.
+        """
+        if not self._compaction_lock.acquire(blocking=wait):
+            return False  # 이미 진행 중인 compaction이 있다
+        try:
+            with self._lock:
+                if self._log_file is not None:
+                    self._log_file.close()
+                    self._log_file = None
+                if os.path.exists(self.log_path):
+                    if os.path.exists(self.rotated_log_path):
+                        # 이전 compaction이 끝나지 못한 경우: 두 세그먼트를 합친다
+                        with open(self.rotated_log_path, "a", encoding="utf-8") as dst, open(
+                            self.log_path, "r", encoding="utf-8"
+                        ) as src:
+                            dst.write(src.read())
+                        os.remove(self.log_path)
+                    else:
+                        os.replace(self.log_path, self.rotated_log_path)
+                self.log_records = 0
+        except BaseException:
+            self._compaction_lock.release()
+            raise
+
+        if not callable(reflections):
+            reflections = list(reflections)
+        args = (reflections, embeddings.chunks(), embeddings.dim, columns, on_written)
+        if wait:
+            self._write_snapshot(*args)
+        else:
+            self._compaction_thread = threading.Thread(
+                target=self._write_snapshot, args=args, daemon=True
+            )
+            self._compaction_thread.start()
+        return True
+
+    def read_manifest(self) -> Optional[dict]:
+        """현재 공개된 스냅샷의 manifest. 스냅샷이 없으면 None."""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def open_snapshot(self, generation: int) -> Snapshot:
+        """공개된 세대의 스냅샷을 읽기 전용 mmap으로 연다 (로그는 읽지 않는다).
+
+        이미 열어 둔 세대의 파일은 다음 compaction이 지워도 mmap이 유지되는 동안 읽을 수 있다.
+        """
+        embeddings = EmbeddingMatrix(np.load(self._embeddings_path(generation), mmap_mode="r"))
+        offsets, columns = None, {}
+        if os.path.exists(self._columns_path(generation)):
+            with np.load(self._columns_path(generation)) as arrays:
+                columns = {name: arrays[name] for name in arrays.files}
+            offsets = columns.pop("offsets")
+        return Snapshot(generation, embeddings, self._meta_path(generation), offsets, columns)
+
+    def index_checkpoint_path(self, generation: int) -> str:
+        """해당 세대의 스냅샷에 대응하는 검색 인덱스 체크포인트 파일 경로."""
+        return f"{self.base_path}.{generation:05d}.index"
+
+    def publish_index_checkpoint(self, generation: int, info: dict) -> None:
+        """index_checkpoint_path(generation)에 쓴 인덱스의 정보를 원자적으로 공개한다.
+
+        info["sequence"]는 인덱스에 반영된 행 수로, 로드 시 그 이후의 행만 다시 추가하면 된다.
+        """
+
+        def write(tmp_path: str) -> None:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump({**info, "generation": generation}, file)
+                file.flush()
+                os.fsync(file.fileno())
+
+        write_atomically(f"{self.index_checkpoint_path(generation)}.json", write)
+
+    def read_index_checkpoint(self, generation: Optional[int] = None) -> Optional[dict]:
+        """해당 세대(기본은 load한 현재 세대)의 인덱스 체크포인트 정보. 없으면 None."""
+        if generation is None:
+            generation = self.generation
+        path = f"{self.index_checkpoint_path(generation)}.json"
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    def _remove_index_checkpoint(self, generation: int) -> None:
+        path = self.index_checkpoint_path(generation)
+        # 정보 파일을 먼저 지워 인덱스 파일만 남은 체크포인트가 공개되지 않게 한다
+        for checkpoint_path in (f"{path}.json", path):
+            if os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
+
+    def wait_for_compaction(self) -> None:
+        """백그라운드 compaction이 진행 중이면 스냅샷을 공개(또는 실패)할 때까지 기다린다."""
+        thread = self._compaction_thread
+        if thread is not None:
+            thread.join()
+
+    def close(self) -> None:
+        self.wait_for_compaction()
+        self._compaction_thread = None
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.flush()
+                if self.fsync != "never":
+                    os.fsync(self._log_file.fileno())
+                self._log_file.close()
+                self._log_file = None
+
+    def migrate_legacy(self) -> int:
+        """기존 JSON DB(file_path)와 그 로그를 새 스냅샷 형식으로 변환하고 레코드 수를 반환한다.
+
+        원본 파일은 삭제하지 않고 `.migrated` 확장자를 붙여 남겨 둔다.
+        """
+        records: dict[str, tuple[dict, list[float]]] = {}
+        if os.path.exists(self.file_path):
+            with open(self.file_path, "r", encoding="utf-8") as file:
+                for item in json.load(file):
+                    records[item["reflection"]["id"]] = (
+                        item["reflection"],
+                        item["embedding"],
+                    )
+        legacy_logs = [f"{self.file_path}.log.old", f"{self.file_path}.log"]
+        for path in legacy_logs:
+            for item in self._read_log(path):
+                records[item["reflection"]["id"]] = (
+                    item["reflection"],
+                    item["embedding"],
+                )
+
+        matrix = EmbeddingMatrix()
+        for _, embedding in records.values():
+            matrix.append(embedding)
+        self._compaction_lock.acquire()
+        self._write_snapshot(
+            [item for item, _ in records.values()], matrix.chunks(), matrix.dim
+        )
+        for path in [self.file_path, *legacy_logs]:
+            if os.path.exists(path):
+                os.replace(path, f"{path}.migrated")
+        return len(records)
+
+    def _has_legacy_data(self) -> bool:
+        return os.path.exists(self.file_path) or os.path.exists(
+            f"{self.file_path}.log"
+        )
+
+    def _embeddings_path(self, generation: int) -> str:
+        return f"{self.base_path}.{generation:05d}.npy"
+
+    def _meta_path(self, generation: int) -> str:
+        return f"{self.base_path}.{generation:05d}.meta.jsonl"
+
+    def _columns_path(self, generation: int) -> str:
+        return f"{self.base_path}.{generation:05d}.columns.npz"
+
+    def _write_snapshot(
+        self,
+        reflections: Union[list[Union[BaseModel, dict, None]], Callable[[], list]],
+        chunks: list[np.ndarray],
+        dim: Optional[int],
+        columns: Optional[dict[str, np.ndarray]] = None,
+        on_written: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        try:
+            if callable(reflections):
+                reflections = reflections()
+            generation = self.generation + 1
+            directory = os.path.dirname(self.base_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            live = np.fromiter((r is not None for r in reflections), bool, len(reflections))
+            # 임베딩은 조각 단위로 바로 .npy에 기록해 전체 행렬의 임시 사본을 만들지 않는다
+            matrix = np.lib.format.open_memmap(
+                self._embeddings_path(generation),
+                mode="w+",
+                dtype=self.dtype,
+                shape=(int(live.sum()), dim or 0),
+            )
+            source, target = 0, 0
+            for chunk in chunks:
+                mask = live[source : source + len(chunk)]
+                rows = chunk if mask.all() else chunk[mask]
+                matrix[target : target + len(rows)] = rows
+                source += len(chunk)
+                target += len(rows)
+            matrix.flush()
+            del matrix
+
+            offsets = [0]
+            with open(self._meta_path(generation), "wb") as file:
+                for reflection in reflections:
+                    if reflection is None:
+                        continue
+                    if isinstance(reflection, BaseModel):
+                        reflection = reflection.model_dump()
+                    line = (json.dumps(reflection, ensure_ascii=False) + "\n").encode("utf-8")
+                    file.write(line)
+                    offsets.append(offsets[-1] + len(line))
+                file.flush()
+                os.fsync(file.fileno())
+            # 행별 시작 위치와 열 배열: 읽기 복제본이 메타데이터를 파싱하지 않고 연다
+            with open(self._columns_path(generation), "wb") as file:
+                np.savez(file, offsets=np.array(offsets, dtype="int64"), **(columns or {}))
+                file.flush()
+                os.fsync(file.fileno())
+            if on_written is not None:
+                on_written(generation)
+
+            # manifest 교체가 곧 새 스냅샷의 공개 시점이다
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(
+                    {"generation": generation, "count": int(live.sum()), "dim": dim},
+                    file,
+                )
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.manifest_path)
+
+            previous, self.generation = self.generation, generation
+            if os.path.exists(self.rotated_log_path):
+                os.remove(self.rotated_log_path)
+            for path in (
+                self._embeddings_path(previous),
+                self._meta_path(previous),
+                self._columns_path(previous),
+            ):
+                if os.path.exists(path):
+                    os.remove(path)
+            # 이전 세대의 행 번호에 맞춰진 인덱스 체크포인트는 새 세대에서 쓸 수 없다
+            self._remove_index_checkpoint(previous)
+        finally:
+            self._compaction_lock.release()
+
+    def _open_log(self):
+        if self._log_file is None:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._truncate_partial_tail(self.log_path)
+            self._log_file = open(self.log_path, "a", encoding="utf-8")
+        return self._log_file
+
+    @staticmethod
+    def _truncate_partial_tail(path: str, chunk_size: int = 64 * 1024) -> None:
+        # 크래시로 잘린 마지막 레코드 뒤에 새 레코드가 이어 붙지 않도록 마지막 개행 이후를 잘라낸다
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as file:
+            end = file.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - chunk_size)
+                file.seek(start)
+                newline = file.read(position - start).rfind(b"\n")
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position != end:
+                file.truncate(position)
+
+    def _maybe_fsync(self, log_file) -> None:
+        if self.fsync == "always":
+            os.fsync(log_file.fileno())
+        elif self.fsync == "interval":
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                os.fsync(log_file.fileno())
+                self._last_fsync = now
+
+    @staticmethod
+    def _read_log(path: str) -> Iterator[dict]:
+        if not os.path.exists(path):
+            return
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # 크래시로 잘린 마지막 레코드는 버린다
+                    break
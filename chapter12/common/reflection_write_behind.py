@@ -0,0 +1,186 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+from common.reflection_store import ReflectionStore
+
+if TYPE_CHECKING:
+    from common.reflection_manager import ReflectionManager, StoredReflection
+
+
+class ReflectionWriteBehind:
+    """리플렉션의 임베딩과 영속화를 백그라운드 스레드에서 수행하는 write-behind 큐.
+
+    enqueue는 리플렉션을 저널({db}.pending.jsonl)에 한 줄 기록하고 대기 목록에 넣은 뒤
+    바로 반환하므로, 호출 측은 임베딩 API와 로그 쓰기를 기다리지 않는다. 대기 중인 리플렉션은
+    get_reflection으로 바로 조회되지만, 임베딩이 끝나 인덱스에 들어가기 전까지는 검색되지 않는다.
+    작업 스레드는 쌓인 리플렉션을 batch_size개씩 한 번에 임베딩한 뒤 ReflectionManager에 넣는다.
+
+    큐가 가득 차면 enqueue는 자리가 날 때까지 기다린다. 저장을 마친 리플렉션은 저널에 완료
+    표시를 남기고, 대기 목록이 비면 저널을 비운다. 프로세스가 저장 전에 죽으면 다음 로드 때
+    완료 표시가 없는 리플렉션을 다시 큐에 넣는다(이미 저장된 ID는 건너뛴다). 임베딩이나 저장에
+    실패한 리플렉션은 대기 목록과 저널에 남아 다음 로드 때 다시 시도되며, 작업 스레드는 계속 돈다.
+    """
+
+    def __init__(
+        self,
+        manager: "ReflectionManager",
+        max_queue: int = 256,
+        batch_size: int = 32,
+        retries: int = 5,
+    ):
+        self.manager = manager
+        self.batch_size = batch_size
+        self.retries = retries
+        self.journal_path = f"{manager.store.base_path}.pending.jsonl"
+        # 저장 전인 리플렉션과, 기존 리플렉션에 병합된 리플렉션의 원래 ID → 병합된 ID
+        self.pending: dict[str, "StoredReflection"] = {}
+        self.aliases: dict[str, str] = {}
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._journal = None
+        self._last_fsync = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._run, name="reflection-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def replay(self) -> int:
+        """저널에서 완료 표시가 없는 리플렉션을 다시 큐에 넣고 그 수를 반환한다."""
+        from common.reflection_manager import StoredReflection
+
+        unfinished: dict[str, StoredReflection] = {}
+        for record in ReflectionStore._read_log(self.journal_path):
+            if record["op"] == "put":
+                unfinished[record["reflection"]["id"]] = StoredReflection(**record["reflection"])
+            else:
+                unfinished.pop(record["id"], None)
+        replayed = 0
+        for reflection_id, reflection in unfinished.items():
+            if reflection_id in self.manager.rows:
+                continue  # 저장은 끝났지만 완료 표시를 쓰기 전에 종료되었다
+            with self._lock:
+                self.pending[reflection_id] = reflection
+            self._queue.put(reflection)
+            replayed += 1
+        if not replayed:
+            self._truncate_journal()
+        return replayed
+
+    def enqueue(self, reflection: "StoredReflection") -> str:
+        with self._lock:
+            self._write_journal({"op": "put", "reflection": reflection.model_dump()}, sync=True)
+            self.pending[reflection.id] = reflection
+        # 큐가 가득 차면 작업 스레드가 따라잡을 때까지 기다린다 (잠금 밖에서 기다린다)
+        self._queue.put(reflection)
+        return reflection.id
+
+    def get(self, reflection_id: str) -> Optional["StoredReflection"]:
+        """대기 중인 리플렉션, 또는 병합된 리플렉션의 원래 ID를 찾는다."""
+        with self._lock:
+            reflection = self.pending.get(reflection_id)
+            alias = self.aliases.get(reflection_id)
+        if reflection is not None:
+            return reflection
+        return self.manager.get_reflection(alias) if alias is not None else None
+
+    def flush(self) -> None:
+        """큐에 들어간 리플렉션이 모두 저장(또는 재시도 포기)될 때까지 기다린다."""
+        self._queue.join()
+
+    def close(self) -> None:
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    # 종료 신호는 이번 배치를 처리한 뒤에 받도록 되돌려 놓는다
+                    self._queue.task_done()
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            try:
+                self._store(batch)
+            except Exception as e:
+                # 작업 스레드가 죽으면 이후 enqueue·flush가 영원히 기다리므로 배치만 포기한다
+                print(f"Error storing pending reflections: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _store(self, batch: list["StoredReflection"]) -> None:
+        for attempt in range(self.retries):
+            try:
+                embeddings = self.manager.embeddings.embed_documents(
+                    [reflection.reflection for reflection in batch]
+                )
+                break
+            except Exception as e:
+                print(f"Error embedding pending reflections (attempt {attempt + 1}): {e}")
+                time.sleep(min(2**attempt * 0.1, 5.0))
+        else:
+            # 대기 목록과 저널에 남겨 두므로 조회는 계속되고, 다음 로드 때 다시 저장을 시도한다
+            return
+        for reflection, embedding in zip(batch, embeddings):
+            try:
+                stored_id = self.manager._insert(reflection, embedding, reflection.pattern)
+            except Exception as e:
+                # 임베딩 실패와 같이 대기 목록과 저널에 남겨 두고 나머지 리플렉션을 계속 저장한다
+                print(f"Error storing pending reflection {reflection.id}: {e}")
+                continue
+            merged = stored_id != reflection.id
+            with self._lock:
+                if merged:
+                    self.aliases[reflection.id] = stored_id
+                self.pending.pop(reflection.id, None)
+                # 병합된 리플렉션은 ID로 저장 여부를 알 수 없어 완료 표시를 잃으면 다시 병합(hits 중복)되므로
+                # 완료 표시를 바로 디스크에 내린다
+                self._write_journal({"op": "done", "id": reflection.id}, sync=merged, force=merged)
+        with self._lock:
+            if not self.pending:
+                self._truncate_journal()
+
+    def _write_journal(self, record: dict, sync: bool, force: bool = False) -> None:
+        # 호출 측이 self._lock을 잡고 있다
+        if self._journal is None:
+            ReflectionStore._truncate_partial_tail(self.journal_path)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._journal.flush()
+        # 병합되지 않은 리플렉션의 완료 표시는 잃어도 다음 로드 때 이미 저장된 ID로 건너뛰므로
+        # fsync하지 않는다. force이면 interval 정책이어도 바로 fsync한다
+        if not sync or self.manager.store.fsync == "never":
+            return
+        now = time.monotonic()
+        if (
+            force
+            or self.manager.store.fsync == "always"
+            or now - self._last_fsync >= self.manager.store.fsync_interval
+        ):
+            os.fsync(self._journal.fileno())
+            self._last_fsync = now
+
+    def _truncate_journal(self) -> None:
+        if self._journal is not None:
+            self._journal.truncate(0)
+        elif os.path.exists(self.journal_path):
+            os.truncate(self.journal_path, 0)
@@ -1,7 +1,10 @@
+# 공통 모듈: 모든 LLM 호출이 함께 쓰는 응답 캐시
+from common.llm_cache import install_llm_cache
 # 공통 모듈에서 ReflectionManager와 TaskReflector 클래스 임포트
 # ReflectionManager: 리플렉션 데이터를 저장하고 관리하는 클래스
 # TaskReflector: 태스크 수행 후 리플렉션(성찰)을 수행하는 클래스
-from common.reflection_manager import ReflectionManager, TaskReflector
+from common.reflection_manager import TaskReflector
+from common.reflection_server import connect_reflection_manager
 # Anthropic의 Claude 모델을 사용하기 위한 LangChain 래퍼 클래스 임포트
 from langchain_anthropic import ChatAnthropic
 # OpenAI의 ChatGPT 모델을 사용하기 위한 LangChain 래퍼 클래스 임포트
@@ -27,6 +30,8 @@ def main():
 
     # Settings 인스턴스 생성: 환경변수나 설정 파일에서 설정값을 로드
     settings = Settings()
+    # LLM 응답 디스크 캐시 설치: 같은 모델·파라미터·프롬프트의 호출은 저장된 응답을 재사용
+    install_llm_cache()
 
     # 로깅 설정: INFO 레벨 이상의 로그를 콘솔에 출력
     logging.basicConfig(
@@ -42,6 +47,13 @@ def main():
     )
     # --task 인자 추가: 실행할 태스크를 문자열로 입력받음 (필수)
     parser.add_argument("--task", type=str, required=True, help="실행할 태스크")
+    # --goal-setting-mode 인자 추가: 목표 설정 방식 (지정하지 않으면 settings.goal_setting_mode)
+    parser.add_argument(
+        "--goal-setting-mode",
+        choices=["staged", "fused"],
+        default=None,
+        help="목표 설정 방식 (staged: LLM 호출 3회, fused: 한 번의 호출)",
+    )
     # 커맨드 라인 인자를 파싱하여 args 객체에 저장
     args = parser.parse_args()
 
@@ -66,13 +78,16 @@ def main():
 
     # ReflectionManager 초기화: 리플렉션 데이터를 파일에 저장하고 관리
     # file_path: 리플렉션 데이터를 저장할 JSON 파일 경로
-    reflection_manager = ReflectionManager(file_path="tmp/cross_reflection_db.json")
+    # 같은 DB의 리플렉션 서버가 실행 중이면 서버에 연결해 다른 에이전트 프로세스와 저장소를 공유
+    reflection_manager = connect_reflection_manager(file_path="tmp/cross_reflection_db.json")
 
     # Anthropic LLM을 사용하는 TaskReflector 초기화
     # TaskReflector: 태스크 수행 결과를 분석하고 개선점을 도출하는 역할
     # Anthropic 모델을 사용함으로써 OpenAI 모델과 다른 관점에서 성찰 가능
     anthropic_task_reflector = TaskReflector(
-        llm=anthropic_llm, reflection_manager=reflection_manager
+        llm=anthropic_llm,
+        reflection_manager=reflection_manager,
+        pattern="cross_reflection",
     )
 
     # ReflectiveAgent 초기화: 자기 성찰 기능을 가진 에이전트 생성
@@ -83,11 +98,18 @@ def main():
         llm=openai_llm,
         reflection_manager=reflection_manager,
         task_reflector=anthropic_task_reflector,
+        goal_setting_mode=args.goal_setting_mode,
     )
 
     # 태스크를 실행하고 결과 획득
     # run 메서드: 태스크 수행 → 리플렉션 → 결과 반환의 전체 프로세스 실행
-    result = agent.run(args.task)
+    try:
+        result = agent.run(args.task)
+    finally:
+        # 백그라운드에서 작성 중인 교훈을 저장한 뒤 매니저를 닫는다
+        # (write-behind 큐를 비우고, 승격된 인덱스면 다음 실행을 위한 체크포인트를 쓴다)
+        anthropic_task_reflector.flush()
+        reflection_manager.close()
 
     # 결과 출력: 최종 실행 결과를 콘솔에 출력
     logger.info("\n" + "=" * 80)
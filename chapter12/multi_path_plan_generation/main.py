@@ -5,11 +5,16 @@ from datetime import datetime
 # logging 모듈: 실행 흐름 추적을 위한 로깅
 import logging
 # typing 모듈: 타입 힌트를 위한 Annotated(메타데이터 포함 타입), Any(모든 타입) 임포트
-from typing import Annotated, Any
+from typing import Annotated, Any, Optional
 
 # 로거 설정: 실행 흐름을 추적하기 위한 로깅 시스템 구성
 logger = logging.getLogger(__name__)  # 현재 모듈의 로거 인스턴스 생성
 
+# 공통 모듈: LLM 응답 캐시 (component_llm은 컴포넌트별 캐시 우회 설정을 적용)
+from common.llm_cache import component_llm, install_llm_cache
+# 공통 모듈: 목표 설정 단계 (PassiveGoalCreator → PromptOptimizer → ResponseOptimizer)와 그 의미 기반 캐시
+from common.goal_cache import SemanticGoalCache, open_goal_cache
+from common.goal_setting import GoalDefinition, GoalSetter, GoalSettingMode
 # LangChain 커뮤니티 도구: Tavily 검색 엔진을 사용한 웹 검색 도구
 from langchain_community.tools.tavily_search import TavilySearchResults
 # LangChain 출력 파서: LLM 출력을 문자열로 변환하는 파서
@@ -25,14 +30,8 @@ from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
 # LangGraph 미리 빌드된 에이전트: ReAct 패턴 에이전트 생성 함수
 from langgraph.prebuilt import create_react_agent
-# passive_goal_creator 모듈: Goal 모델과 PassiveGoalCreator 클래스 임포트
-from passive_goal_creator.main import Goal, PassiveGoalCreator
-# prompt_optimizer 모듈: OptimizedGoal 모델과 PromptOptimizer 클래스 임포트
-from prompt_optimizer.main import OptimizedGoal, PromptOptimizer
 # Pydantic: 데이터 검증 및 구조화를 위한 BaseModel과 Field 임포트
 from pydantic import BaseModel, Field
-# response_optimizer 모듈: ResponseOptimizer 클래스 임포트
-from response_optimizer.main import ResponseOptimizer
 
 
 # TaskOption 클래스: 각 태스크에 대한 구체적인 실행 옵션을 나타내는 모델
@@ -106,7 +105,7 @@ class QueryDecomposer:
     # 생성자: LLM을 받아 초기화
     def __init__(self, llm: ChatOpenAI):
         # LLM 인스턴스 저장
-        self.llm = llm
+        self.llm = component_llm(llm, "QueryDecomposer")
         # 현재 날짜를 YYYY-MM-DD 형식으로 저장 (프롬프트에 컨텍스트로 제공)
         self.current_date = datetime.now().strftime("%Y-%m-%d")
 
@@ -142,7 +141,7 @@ class OptionPresenter:
     def __init__(self, llm: ChatOpenAI):
         # configurable_fields: LLM의 특정 파라미터를 런타임에 변경 가능하도록 설정
         # max_tokens를 동적으로 설정하여 옵션 선택 시 1토큰만 사용하도록 제한 가능
-        self.llm = llm.configurable_fields(
+        self.llm = component_llm(llm, "OptionPresenter").configurable_fields(
             max_tokens=ConfigurableField(id="max_tokens")  # max_tokens를 설정 가능한 필드로 등록
         )
 
@@ -211,7 +210,7 @@ class OptionPresenter:
 class TaskExecutor:
     # 생성자: LLM과 도구를 초기화
     def __init__(self, llm: ChatOpenAI):
-        self.llm = llm  # 추론과 행동 결정을 위한 LLM
+        self.llm = component_llm(llm, "TaskExecutor")  # 추론과 행동 결정을 위한 LLM
         # TavilySearchResults: 웹 검색 도구 (최대 3개의 검색 결과 반환)
         self.tools = [TavilySearchResults(max_results=3)]
 
@@ -265,7 +264,7 @@ class TaskExecutor:
 class ResultAggregator:
     # 생성자: LLM을 받아 초기화
     def __init__(self, llm: ChatOpenAI):
-        self.llm = llm  # 결과 통합 및 응답 생성을 위한 LLM
+        self.llm = component_llm(llm, "ResultAggregator")  # 결과 통합 및 응답 생성을 위한 LLM
 
     # run 메서드: 모든 태스크의 결과를 집계하여 최종 응답 생성
     # 매개변수:
@@ -350,13 +349,14 @@ class MultiPathPlanGeneration:
     def __init__(
         self,
         llm: ChatOpenAI,
+        goal_cache: Optional[SemanticGoalCache] = None,  # 목표 설정 결과의 의미 기반 캐시 (None이면 쓰지 않음)
+        goal_setting_mode: Optional[GoalSettingMode] = None,  # staged | fused (None이면 settings.goal_setting_mode)
     ):
         self.llm = llm  # 모든 컴포넌트에서 사용할 LLM 인스턴스
 
         # 각 단계를 처리하는 컴포넌트 초기화
-        self.passive_goal_creator = PassiveGoalCreator(llm=self.llm)  # 1단계: 기본 목표 생성
-        self.prompt_optimizer = PromptOptimizer(llm=self.llm)  # 1단계: SMART 원칙으로 목표 최적화
-        self.response_optimizer = ResponseOptimizer(llm=self.llm)  # 1단계: 응답 형식 정의
+        # 1단계: 기본 목표 생성 → SMART 원칙으로 목표 최적화 → 응답 형식 정의
+        self.goal_setter = GoalSetter(llm=self.llm, cache=goal_cache, mode=goal_setting_mode)
         self.query_decomposer = QueryDecomposer(llm=self.llm)  # 2단계: 목표를 태스크+옵션으로 분해
         self.option_presenter = OptionPresenter(llm=self.llm)  # 3단계: 옵션 제시 및 선택
         self.task_executor = TaskExecutor(llm=self.llm)  # 4단계: 선택된 옵션으로 태스크 실행
@@ -408,22 +408,18 @@ class MultiPathPlanGeneration:
     def _goal_setting(self, state: MultiPathPlanGenerationState) -> dict[str, Any]:
         logger.info("[MultiPathPlanGeneration] 1단계: 목표 설정 시작")
 
-        # 1-1. 기본 목표 생성: 사용자 쿼리를 실행 가능한 목표로 변환
-        goal: Goal = self.passive_goal_creator.run(query=state.query)
-        logger.info(f"[MultiPathPlanGeneration] 목표 생성 완료: {goal.text}")
-
-        # 1-2. 목표 최적화: SMART 원칙 (Specific, Measurable, Achievable, Relevant, Time-bound) 적용
-        optimized_goal: OptimizedGoal = self.prompt_optimizer.run(query=goal.text)
-        logger.info(f"[MultiPathPlanGeneration] 목표 최적화 완료: {optimized_goal.text}")
-
-        # 1-3. 응답 형식 최적화: 최종 응답의 구조, 톤, 평가 기준 정의
-        optimized_response: str = self.response_optimizer.run(query=optimized_goal.text)
+        # 기본 목표 생성 → 목표 최적화 (SMART 원칙: Specific, Measurable, Achievable, Relevant, Time-bound)
+        # → 응답 형식 최적화 (최종 응답의 구조, 톤, 평가 기준 정의)
+        # 의미가 비슷한 과거 쿼리가 캐시에 있으면 LLM을 호출하지 않고 그 결과를 쓴다
+        definition: GoalDefinition = self.goal_setter.run(query=state.query)
+        logger.info(f"[MultiPathPlanGeneration] 목표 생성 완료: {definition.goal.text}")
+        logger.info(f"[MultiPathPlanGeneration] 목표 최적화 완료: {definition.optimized_goal.text}")
         logger.info(f"[MultiPathPlanGeneration] 응답 형식 최적화 완료")
 
         # State 업데이트: 최적화된 목표와 응답 형식을 State에 저장
         return {
-            "optimized_goal": optimized_goal.text,  # SMART 원칙이 적용된 목표
-            "optimized_response": optimized_response,  # 응답 형식 및 평가 기준
+            "optimized_goal": definition.optimized_goal.text,  # SMART 원칙이 적용된 목표
+            "optimized_response": definition.response_definition,  # 응답 형식 및 평가 기준
         }
 
     # _decompose_query 메서드: 2단계 - 쿼리 분해 노드
@@ -554,6 +550,8 @@ def main():
     # - openai_smart_model: 사용할 모델 이름 (예: "gpt-4")
     # - temperature: LLM의 창의성 조절 (0 = 일관성, 1 = 창의성)
     settings = Settings()
+    # LLM 응답 디스크 캐시 설치: 같은 모델·파라미터·프롬프트의 호출은 저장된 응답을 재사용
+    install_llm_cache()
 
     # ArgumentParser 생성: 명령줄 인자 처리
     parser = argparse.ArgumentParser(
@@ -562,6 +560,12 @@ def main():
     # --task 인자 추가: 실행할 태스크 (필수)
     # 사용 예: python -m multi_path_plan_generation.main --task "AI agent 만들기 실습"
     parser.add_argument("--task", type=str, required=True, help="실행할 태스크")
+    parser.add_argument(
+        "--goal-setting-mode",
+        choices=["staged", "fused"],
+        default=None,  # 지정하지 않으면 settings.goal_setting_mode
+        help="목표 설정 방식 (staged: LLM 호출 3회, fused: 한 번의 호출)",
+    )
     args = parser.parse_args()  # 명령줄 인자 파싱
 
     # 프로그램 시작 로그 (로깅 설정이 없으면 콘솔에 출력됨)
@@ -577,7 +581,11 @@ def main():
 
     # MultiPathPlanGeneration 인스턴스 생성
     # - 생성자에서 모든 컴포넌트 초기화 및 워크플로우 그래프 구성
-    agent = MultiPathPlanGeneration(llm=llm)
+    # - goal_cache: 이전에 실행한 것과 의미가 비슷한 태스크면 목표 설정의 LLM 호출 3회를 건너뜀
+    # - goal_setting_mode: fused면 목표 설정을 LLM 호출 3회 대신 한 번의 구조화 출력 호출로 수행
+    agent = MultiPathPlanGeneration(
+        llm=llm, goal_cache=open_goal_cache(), goal_setting_mode=args.goal_setting_mode
+    )
 
     # 워크플로우 실행: 사용자 쿼리를 처리하여 최종 응답 생성
     # 내부적으로 5단계 워크플로우가 자동으로 실행됨:
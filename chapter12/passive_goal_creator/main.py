@@ -1,3 +1,5 @@
+# 공통 모듈: LLM 응답 캐시 (component_llm은 컴포넌트별 캐시 우회 설정을 적용)
+from common.llm_cache import component_llm, install_llm_cache
 # LangChain의 프롬프트 템플릿을 생성하기 위한 클래스 임포트
 from langchain_core.prompts import ChatPromptTemplate
 # OpenAI의 ChatGPT 모델을 사용하기 위한 LangChain 래퍼 클래스 임포트
@@ -29,7 +31,7 @@ class PassiveGoalCreator:
         llm: ChatOpenAI,  # OpenAI 챗 모델 인스턴스를 인자로 받음
     ):
         # 전달받은 LLM 인스턴스를 인스턴스 변수로 저장하여 클래스 내에서 사용
-        self.llm = llm
+        self.llm = component_llm(llm, "PassiveGoalCreator")
 
     # run 메서드: 사용자 쿼리를 받아 목표를 생성하고 반환하는 핵심 메서드
     def run(self, query: str) -> Goal:
@@ -68,6 +70,8 @@ def main():
 
     # Settings 인스턴스 생성: 환경변수나 설정 파일에서 설정값을 로드
     settings = Settings()
+    # LLM 응답 디스크 캐시 설치: 같은 모델·파라미터·프롬프트의 호출은 저장된 응답을 재사용
+    install_llm_cache()
 
     # ArgumentParser 생성: 커맨드 라인 인자를 처리하기 위한 파서 객체
     parser = argparse.ArgumentParser(
@@ -1,3 +1,5 @@
+# 공통 모듈: LLM 응답 캐시 (component_llm은 컴포넌트별 캐시 우회 설정을 적용)
+from common.llm_cache import component_llm, install_llm_cache
 # LangChain의 프롬프트 템플릿을 생성하기 위한 클래스 임포트
 from langchain_core.prompts import ChatPromptTemplate
 # OpenAI의 ChatGPT 모델을 사용하기 위한 LangChain 래퍼 클래스 임포트
@@ -33,7 +35,7 @@ class PromptOptimizer:
     # 생성자: PromptOptimizer 인스턴스를 초기화
     def __init__(self, llm: ChatOpenAI):
         # 전달받은 LLM 인스턴스를 인스턴스 변수로 저장
-        self.llm = llm
+        self.llm = component_llm(llm, "PromptOptimizer")
 
     # run 메서드: 입력된 목표를 최적화하여 OptimizedGoal 객체로 반환
     def run(self, query: str) -> OptimizedGoal:
@@ -87,6 +89,8 @@ def main():
 
     # Settings 인스턴스 생성: 환경변수나 설정 파일에서 설정값을 로드
     settings = Settings()
+    # LLM 응답 디스크 캐시 설치: 같은 모델·파라미터·프롬프트의 호출은 저장된 응답을 재사용
+    install_llm_cache()
 
     # ArgumentParser 생성: 커맨드 라인 인자를 처리하기 위한 파서 객체
     parser = argparse.ArgumentParser(
@@ -1,3 +1,5 @@
+# 공통 모듈: LLM 응답 캐시 (component_llm은 컴포넌트별 캐시 우회 설정을 적용)
+from common.llm_cache import component_llm, install_llm_cache
 # LangChain 출력 파서: LLM 출력을 문자열로 변환하는 파서
 from langchain_core.output_parsers import StrOutputParser
 # LangChain 프롬프트 템플릿: 대화형 프롬프트를 생성하기 위한 템플릿 클래스
@@ -16,7 +18,7 @@ class ResponseOptimizer:
     # 생성자: LLM 인스턴스를 받아 초기화
     def __init__(self, llm: ChatOpenAI):
         # LLM 인스턴스를 저장하여 응답 최적화에 사용
-        self.llm = llm
+        self.llm = component_llm(llm, "ResponseOptimizer")
 
     # run 메서드: 목표를 받아 최적화된 응답 사양을 문자열로 반환
     def run(self, query: str) -> str:
@@ -87,6 +89,8 @@ def main():
 
     # Settings 인스턴스 생성: 환경변수나 설정 파일에서 설정값을 로드
     settings = Settings()
+    # LLM 응답 디스크 캐시 설치: 같은 모델·파라미터·프롬프트의 호출은 저장된 응답을 재사용
+    install_llm_cache()
 
     # ArgumentParser 생성: 커맨드 라인 인자를 처리하기 위한 파서 객체
     parser = argparse.ArgumentParser(
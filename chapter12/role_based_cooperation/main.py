@@ -5,6 +5,8 @@ from typing import Annotated, Any
 # logging 모듈: 프로그램 실행 흐름을 추적하기 위한 로깅 기능
 import logging
 
+# 공통 모듈: LLM 응답 캐시 (component_llm은 컴포넌트별 캐시 우회 설정을 적용)
+from common.llm_cache import component_llm, install_llm_cache
 # LangChain 커뮤니티 도구: Tavily 검색 엔진을 사용한 웹 검색 도구
 from langchain_community.tools.tavily_search import TavilySearchResults
 # LangChain 메시지 타입: HumanMessage(사용자 메시지), SystemMessage(시스템 메시지)
@@ -87,7 +89,7 @@ class Planner:
 
 class RoleAssigner:
     def __init__(self, llm: ChatOpenAI):
-        self.llm = llm.with_structured_output(TasksWithRoles)
+        self.llm = component_llm(llm, "RoleAssigner").with_structured_output(TasksWithRoles)
 
     def run(self, tasks: list[Task]) -> list[Task]:
         logger.info("👥 [역할 배정] 각 태스크에 적합한 역할 배정 중...")
@@ -126,7 +128,7 @@ class RoleAssigner:
 
 class Executor:
     def __init__(self, llm: ChatOpenAI):
-        self.llm = llm
+        self.llm = component_llm(llm, "Executor")
         self.tools = [TavilySearchResults(max_results=3)]
         self.base_agent = create_react_agent(self.llm, self.tools)
 
@@ -159,7 +161,7 @@ class Executor:
 
 class Reporter:
     def __init__(self, llm: ChatOpenAI):
-        self.llm = llm
+        self.llm = component_llm(llm, "Reporter")
 
     def run(self, query: str, results: list[str]) -> str:
         logger.info("📊 [보고서 생성] 모든 결과를 종합하여 최종 보고서 작성 중...")
@@ -302,6 +304,8 @@ def main():
 
     # Settings 인스턴스 생성
     settings = Settings()
+    # LLM 응답 디스크 캐시 설치: 같은 모델·파라미터·프롬프트의 호출은 저장된 응답을 재사용
+    install_llm_cache()
 
     # 로깅 설정: INFO 레벨 이상의 로그를 콘솔에 출력
     logging.basicConfig(
@@ -47,9 +47,33 @@ DIRS=$(find "$BASE_DIR" -type f -name "main.py" -exec dirname {} \; | sort -u)
 # Convert directories to module names
 MODULES=$(echo "$DIRS" | sed "s|$BASE_DIR/||g" | tr '/' '.')
 
+# Start one shared reflection server per reflection DB so that parallel agents
+# share a single index and a single writer instead of each loading the whole DB
+# Run the virtualenv's python directly so that $! is the server itself, not a poetry wrapper
+SERVER_PYTHON=$(poetry run which python)
+SERVER_PIDS=()
+for db in tmp/self_reflection_db.json tmp/cross_reflection_db.json; do
+    socket_file="${db%.*}.sock"
+    rm -f "$socket_file"
+    "$SERVER_PYTHON" -m common.reflection_server --db "$db" \
+        > "$LOGS_DIR/reflection_server_$(basename "${db%.*}").log" 2>&1 &
+    SERVER_PIDS+=($!)
+    # Wait for the socket (agents fall back to an in-process manager if it never appears)
+    for _ in $(seq 1 100); do
+        [ -S "$socket_file" ] && break
+        sleep 0.1
+    done
+done
+trap 'kill -TERM "${SERVER_PIDS[@]}" 2>/dev/null' EXIT
+
 # Run all main.py files in parallel
 echo "$MODULES" | parallel --jobs 0 --line-buffer run_main
 
+# Stop the reflection servers (flushes their logs and removes the sockets)
+kill -TERM "${SERVER_PIDS[@]}" 2>/dev/null
+wait "${SERVER_PIDS[@]}" 2>/dev/null
+trap - EXIT
+
 # Generate final report
 {
     echo "Execution Report (${TIMESTAMP})"
@@ -3,13 +3,18 @@ import operator
 # datetime 모듈: 현재 날짜/시간 정보를 가져오기 위해 사용
 from datetime import datetime
 # typing 모듈: 타입 힌트를 위한 Annotated(메타데이터 포함 타입), Any(모든 타입) 임포트
-from typing import Annotated, Any
+from typing import Annotated, Any, Optional
 # logging 모듈: 프로그램 실행 흐름을 추적하기 위한 로깅 기능
 import logging
 
+# 공통 모듈: 모든 LLM 호출이 함께 쓰는 응답 캐시
+from common.llm_cache import component_llm, install_llm_cache
+# 공통 모듈: 목표 설정 단계 (fused 모드에서 목표·최적화 목표·응답 정의를 한 번의 호출로 생성)
+from common.goal_setting import GoalDefinition, GoalSetter, GoalSettingMode
 # common 모듈에서 Reflection 관련 클래스들 임포트
 # Reflection: 성찰 데이터 모델, ReflectionManager: 성찰 데이터 관리, TaskReflector: 성찰 수행
 from common.reflection_manager import Reflection, ReflectionManager, TaskReflector
+from common.reflection_server import connect_reflection_manager
 # LangChain 커뮤니티 도구: Tavily 검색 엔진을 사용한 웹 검색 도구
 from langchain_community.tools.tavily_search import TavilySearchResults
 # LangChain 출력 파서: LLM 출력을 문자열로 변환하는 파서
@@ -135,7 +140,7 @@ class ReflectiveResponseOptimizer:
 
 class QueryDecomposer:
     def __init__(self, llm: ChatOpenAI, reflection_manager: ReflectionManager):
-        self.llm = llm.with_structured_output(DecomposedTasks)
+        self.llm = component_llm(llm, "QueryDecomposer").with_structured_output(DecomposedTasks)
         self.current_date = datetime.now().strftime("%Y-%m-%d")
         self.reflection_manager = reflection_manager
 
@@ -167,7 +172,7 @@ class QueryDecomposer:
 
 class TaskExecutor:
     def __init__(self, llm: ChatOpenAI, reflection_manager: ReflectionManager):
-        self.llm = llm
+        self.llm = component_llm(llm, "TaskExecutor")
         self.reflection_manager = reflection_manager
         self.current_date = datetime.now().strftime("%Y-%m-%d")
         self.tools = [TavilySearchResults(max_results=3)]
@@ -203,7 +208,7 @@ class TaskExecutor:
 
 class ResultAggregator:
     def __init__(self, llm: ChatOpenAI, reflection_manager: ReflectionManager):
-        self.llm = llm
+        self.llm = component_llm(llm, "ResultAggregator")
         self.reflection_manager = reflection_manager
         self.current_date = datetime.now().strftime("%Y-%m-%d")
 
@@ -218,7 +223,9 @@ class ResultAggregator:
         logger.info(f"  수집된 결과 개수: {len(results)}개")
         logger.info(f"  참조할 회고 개수: {len(reflection_ids)}개")
         relevant_reflections = [
-            self.reflection_manager.get_reflection(rid) for rid in reflection_ids
+            reflection
+            for reflection in (self.reflection_manager.get_reflection(rid) for rid in reflection_ids)
+            if reflection is not None
         ]
         prompt = ChatPromptTemplate.from_template(
             "주어진 목표:\n{query}\n\n"
@@ -249,9 +256,12 @@ class ReflectiveAgent:
         reflection_manager: ReflectionManager,
         task_reflector: TaskReflector,
         max_retries: int = 2,
+        goal_setting_mode: Optional[GoalSettingMode] = None,
     ):
         self.reflection_manager = reflection_manager
         self.task_reflector = task_reflector
+        # fused 모드에서만 쓰인다. staged 모드는 아래의 Reflective* 컴포넌트로 LLM을 3번 호출한다
+        self.goal_setter = GoalSetter(llm=llm, mode=goal_setting_mode)
         self.reflective_goal_creator = ReflectiveGoalCreator(
             llm=llm, reflection_manager=self.reflection_manager
         )
@@ -299,10 +309,22 @@ class ReflectiveAgent:
         logger.info("=" * 80)
         logger.info("🎯 [1단계: 목표 설정] 시작")
         logger.info("=" * 80)
-        optimized_goal: str = self.reflective_goal_creator.run(query=state.query)
-        optimized_response: str = self.reflective_response_optimizer.run(
-            query=optimized_goal
-        )
+        if self.goal_setter.mode == "fused":
+            # 관련 과거 회고를 한 번만 조회해 목표·응답 정의를 한 번의 호출로 만든다
+            relevant_reflections = self.reflection_manager.get_relevant_reflections(state.query)
+            logger.info(f"  관련 과거 회고 {len(relevant_reflections)}개 발견")
+            query = (
+                f"{state.query}\n\n목표 설정과 응답 최적화 시 다음의 과거 회고를 고려할 것:\n"
+                f"{format_reflections(relevant_reflections)}"
+            )
+            definition: GoalDefinition = self.goal_setter.run(query=query)
+            optimized_goal = definition.optimized_goal.text
+            optimized_response = definition.response_definition
+        else:
+            optimized_goal = self.reflective_goal_creator.run(query=state.query)
+            optimized_response = self.reflective_response_optimizer.run(
+                query=optimized_goal
+            )
         logger.info("✅ [1단계: 목표 설정] 완료\n")
         return {
             "optimized_goal": optimized_goal,
@@ -314,6 +336,9 @@ class ReflectiveAgent:
         logger.info("📋 [2단계: 목표 분해] 시작")
         logger.info("=" * 80)
         tasks: DecomposedTasks = self.query_decomposer.run(query=state.optimized_goal)
+        # 모든 태스크의 쿼리 임베딩을 한 번의 호출로 미리 계산해 둔다. 검색은 TaskExecutor가 태스크를
+        # 실행할 때 하므로, 앞선 태스크에서 저장된 회고도 이후 태스크의 조회 결과에 포함된다
+        self.reflection_manager.embed_queries(tasks.values)
         logger.info("✅ [2단계: 목표 분해] 완료\n")
         return {"tasks": tasks.values}
 
@@ -339,7 +364,10 @@ class ReflectiveAgent:
         else:
             logger.info(f"  ✅ 성찰 통과")
 
-        logger.info(f"  성찰 내용: {reflection.reflection[:100]}...\n")
+        if reflection.reflection:
+            logger.info(f"  성찰 내용: {reflection.reflection[:100]}...\n")
+        else:
+            logger.info(f"  판정 근거: {', '.join(reflection.judgment.reasons)} (교훈은 백그라운드에서 작성)\n")
 
         return {
             "reflection_ids": [reflection.id],
@@ -349,13 +377,9 @@ class ReflectiveAgent:
         }
 
     def _should_retry_or_continue(self, state: ReflectiveAgentState) -> str:
-        latest_reflection_id = state.reflection_ids[-1]
-        latest_reflection = self.reflection_manager.get_reflection(latest_reflection_id)
-        if (
-            latest_reflection
-            and latest_reflection.judgment.needs_retry
-            and state.retry_count < self.max_retries
-        ):
+        # _reflect_on_task가 재시도 필요 판정일 때만 retry_count를 늘리므로 0보다 크면 최근 판정이 재시도다.
+        # 리플렉션을 다시 조회하지 않으므로 교훈이 아직 저장 중이어도(write-behind·cascade) 판단할 수 있다
+        if 0 < state.retry_count < self.max_retries:
             logger.info(f"↩️  재시도 결정: 현재 재시도 횟수 {state.retry_count}/{self.max_retries}")
             return "retry"
         elif state.current_task_index < len(state.tasks) - 1:
@@ -373,10 +397,12 @@ class ReflectiveAgent:
         logger.info("=" * 80)
         logger.info("📊 [4단계: 결과 집계] 시작")
         logger.info("=" * 80)
+        # 백그라운드에서 작성 중인 교훈이 있으면 저장을 기다리고 저장소의 ID로 바꾼다
+        reflection_ids = [self.task_reflector.resolve(rid) for rid in state.reflection_ids]
         final_output = self.result_aggregator.run(
             query=state.optimized_goal,
             results=state.results,
-            reflection_ids=state.reflection_ids,
+            reflection_ids=reflection_ids,
             response_definition=state.optimized_response,
         )
         logger.info("✅ [4단계: 결과 집계] 완료\n")
@@ -406,6 +432,8 @@ def main():
 
     # Settings 인스턴스 생성
     settings = Settings()
+    # LLM 응답 디스크 캐시 설치: 같은 모델·파라미터·프롬프트의 호출은 저장된 응답을 재사용
+    install_llm_cache()
 
     # 로깅 설정: INFO 레벨 이상의 로그를 콘솔에 출력
     logging.basicConfig(
@@ -421,6 +449,13 @@ def main():
     )
     # --task 인자 추가
     parser.add_argument("--task", type=str, required=True, help="실행할 태스크")
+    # --goal-setting-mode 인자 추가: 지정하지 않으면 settings.goal_setting_mode
+    parser.add_argument(
+        "--goal-setting-mode",
+        choices=["staged", "fused"],
+        default=None,
+        help="목표 설정 방식 (staged: LLM 호출 3회, fused: 한 번의 호출)",
+    )
     # 커맨드 라인 인자 파싱
     args = parser.parse_args()
 
@@ -430,16 +465,28 @@ def main():
     )
     # ReflectionManager 초기화: 리플렉션 데이터를 파일에 저장하고 관리
     # file_path: Self-reflection 데이터를 저장할 JSON 파일 경로
-    reflection_manager = ReflectionManager(file_path="tmp/self_reflection_db.json")
+    # 같은 DB의 리플렉션 서버가 실행 중이면 서버에 연결해 다른 에이전트 프로세스와 저장소를 공유
+    reflection_manager = connect_reflection_manager(file_path="tmp/self_reflection_db.json")
     # TaskReflector 초기화: 태스크 수행 후 리플렉션을 수행하는 역할
     # 같은 LLM을 사용하여 자기 성찰 (Self-reflection)
-    task_reflector = TaskReflector(llm=llm, reflection_manager=reflection_manager)
+    task_reflector = TaskReflector(
+        llm=llm, reflection_manager=reflection_manager, pattern="self_reflection"
+    )
     # ReflectiveAgent 초기화: 자기 성찰 기능을 가진 에이전트 생성
     agent = ReflectiveAgent(
-        llm=llm, reflection_manager=reflection_manager, task_reflector=task_reflector
+        llm=llm,
+        reflection_manager=reflection_manager,
+        task_reflector=task_reflector,
+        goal_setting_mode=args.goal_setting_mode,
     )
     # 태스크 실행: 수행 → 성찰 → 필요시 재시도의 반복적 프로세스
-    result = agent.run(args.task)
+    try:
+        result = agent.run(args.task)
+    finally:
+        # 백그라운드에서 작성 중인 교훈을 저장한 뒤 매니저를 닫는다
+        # (write-behind 큐를 비우고, 승격된 인덱스면 다음 실행을 위한 체크포인트를 쓴다)
+        task_reflector.flush()
+        reflection_manager.close()
     # 최종 결과 출력
     print(result)
 
@@ -1,4 +1,5 @@
 import os
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -21,8 +22,100 @@ class Settings(BaseSettings):
     openai_smart_model: str = "gpt-4o"
     openai_embedding_model: str = "text-embedding-3-small"
     anthropic_smart_model: str = "claude-sonnet-4-20250514"
+    # 리플렉션 재시도 판정(cascade)의 1차 판정에 쓰는 빠르고 저렴한 모델
+    openai_fast_model: str = "gpt-4o-mini"
     temperature: float = 0.0
     default_reflection_db_path: str = "tmp/reflection_db.json"
+    # 리플렉션 로그의 fsync 정책: always(매 저장) | interval(주기적) | never(OS에 위임)
+    reflection_log_fsync: Literal["always", "interval", "never"] = "always"
+    reflection_log_fsync_interval: float = 1.0
+    # 로그 레코드가 이 수를 넘으면 스냅샷으로 compaction (0이면 자동 compaction 안 함)
+    reflection_log_compact_threshold: int = 1000
+    # 리플렉션 검색 인덱스: flat | hnsw | ivf_flat | ivf_pq
+    # 저장 수가 promotion_threshold 미만이면 항상 정확한 flat 인덱스를 쓰고, 넘으면 지정한 인덱스로 승격한다
+    reflection_index_backend: Literal["flat", "hnsw", "ivf_flat", "ivf_pq"] = "hnsw"
+    reflection_index_promotion_threshold: int = 10_000
+    reflection_index_hnsw_m: int = 32
+    reflection_index_hnsw_ef_search: int = 64
+    reflection_index_ivf_nlist: int = 0  # 0이면 승격 시점의 크기로부터 자동 결정
+    reflection_index_ivf_nprobe: int = 16
+    reflection_index_pq_m: int = 64
+    # 승격된 인덱스의 벡터 압축: none | fp16 | int8(스칼라 양자화) | pq (pq_m개 서브 벡터)
+    reflection_embedding_compression: Literal["none", "fp16", "int8", "pq"] = "none"
+    # 압축 인덱스에서 k * rerank_factor개의 후보를 원본 벡터로 다시 정렬 (0이면 하지 않음)
+    reflection_rerank_factor: int = 4
+    # 스냅샷 임베딩 파일의 자료형 (float16이면 디스크 사용량 절반, re-rank도 float16 원본으로 수행)
+    reflection_snapshot_dtype: Literal["float32", "float16"] = "float32"
+    # 승격된 검색 인덱스를 close() 시 파일로 저장해, 다음 로드 때 재구축·재학습 없이 이후 행만 추가
+    reflection_index_checkpoint_on_close: bool = True
+    # 인덱스 체크포인트를 mmap으로 열기 (처음 변경될 때 메모리로 다시 읽는다)
+    reflection_index_checkpoint_mmap: bool = False
+    # 임베딩 제공자: openai(settings.openai_embedding_model) | local(네트워크 없이 CPU에서 계산하는 문자 n-gram 해싱)
+    embedding_provider: Literal["openai", "local"] = "openai"
+    local_embedding_dim: int = 768
+    local_embedding_ngram_min: int = 2
+    local_embedding_ngram_max: int = 4
+    # 큰 배치를 나눠 계산할 프로세스 수 (1이면 현재 프로세스에서만, 0이면 CPU 수)
+    local_embedding_workers: int = 1
+    # 임베딩 디스크 캐시 (빈 문자열이면 캐시하지 않음)
+    embedding_cache_path: str = "tmp/embedding_cache.sqlite3"
+    embedding_cache_max_entries: int = 100_000
+    embedding_cache_max_bytes: int = 0  # 0이면 바이트 한도 없음
+    # LLM 응답 디스크 캐시 (기본값은 빈 문자열로 캐시하지 않음. 예: tmp/llm_cache.sqlite3)
+    # 키는 모델·파라미터·구조화 출력 스키마·프롬프트
+    llm_cache_path: str = ""
+    llm_cache_ttl: float = 7 * 24 * 3600  # 초. 0이면 만료 없음
+    llm_cache_max_entries: int = 10_000
+    llm_cache_max_bytes: int = 0  # 0이면 바이트 한도 없음
+    # 같은 요청을 다른 프로세스가 처리 중이면 그 응답을 기다리는 최대 시간(초). 0이면 기다리지 않음
+    llm_cache_inflight_timeout: float = 120.0
+    # 응답 캐시를 쓰지 않을 컴포넌트의 클래스 이름. 재시도에서 새 응답이 필요한 컴포넌트를 기본으로 우회한다
+    # (모두 캐시하려면 '[]')
+    llm_cache_bypass: list[str] = ["TaskExecutor", "Executor", "TaskReflector", "CascadeJudge"]
+    # 목표 설정 단계(PassiveGoalCreator → PromptOptimizer → ResponseOptimizer)의 의미 기반 캐시
+    # (기본값은 빈 문자열로 쓰지 않음. 예: tmp/goal_cache.sqlite3)
+    # 같은 LLM 모델·goal_setting_mode로 만든 결과 중 쿼리 임베딩의 코사인 유사도가 min_similarity 이상인
+    # 과거 쿼리의 목표·응답 정의를 LLM 호출 없이 재사용한다
+    goal_cache_path: str = ""
+    goal_cache_min_similarity: float = 0.95
+    goal_cache_ttl: float = 7 * 24 * 3600  # 초. 0이면 만료 없음
+    goal_cache_max_entries: int = 10_000
+    # 목표 설정 방식: staged(목표 → SMART 최적화 → 응답 정의, LLM 호출 3회) | fused(세 결과를 한 번의 구조화 출력 호출로)
+    # 에이전트 생성자의 goal_setting_mode나 각 main의 --goal-setting-mode로 에이전트마다 바꿀 수 있다
+    goal_setting_mode: Literal["staged", "fused"] = "staged"
+    # 가장 가까운 기존 리플렉션과의 L2² 거리가 이 값 이하이면 새로 추가하지 않고 병합 (기본값 0은 병합 안 함)
+    # 정규화된 임베딩에서 0.1은 코사인 유사도 0.95에 해당한다
+    reflection_merge_distance: float = 0.0
+    # 리플렉션 수가 capacity를 넘으면 eviction_policy 순으로 제거 (기본값 0은 제한 없음. 예: 10000)
+    # lru: 최근 검색·병합되지 않은 것 | age: 오래 전에 만들어진 것 | confidence: 판정 자신감이 낮은 것
+    reflection_capacity: int = 0
+    reflection_eviction_policy: Literal["lru", "age", "confidence"] = "lru"
+    # 검색 결과에 포함할 최대 L2² 거리. 더 먼 리플렉션은 k개를 채우기 위해 넣지 않는다 (0이면 제한 없음)
+    reflection_search_max_distance: float = 0.0
+    # 리플렉션 검색 방식: vector(임베딩) | lexical(task·reflection의 BM25, 임베딩 호출 없음) | hybrid(두 순위를 RRF로 합침)
+    reflection_search_mode: Literal["vector", "lexical", "hybrid"] = "vector"
+    # hybrid에서 벡터·BM25 검색이 각각 가져올 후보 수 (k의 배수)와 reciprocal rank fusion의 k
+    reflection_hybrid_candidates: int = 4
+    reflection_rrf_k: int = 60
+    # 네임스페이스(에이전트 패턴 등)별 샤드 저장소의 루트 디렉터리. 지정하면 connect_reflection_manager가
+    # ShardedReflectionManager를 반환해 패턴마다 샤드를 두고 전체 샤드를 함께 검색한다 (빈 문자열이면 쓰지 않음)
+    reflection_shard_root: str = ""
+    # 샤드를 동시에 검색할 스레드 수 (0이면 CPU 수)
+    reflection_shard_search_workers: int = 0
+    # TaskReflector가 리플렉션을 저장 큐에 넣고 바로 반환한다 (임베딩·로그 쓰기는 백그라운드 스레드에서 수행)
+    reflection_write_behind: bool = False
+    # 저장 큐의 최대 길이(가득 차면 저장 호출이 기다림)와 작업 스레드가 한 번에 임베딩할 리플렉션 수
+    reflection_write_behind_queue_size: int = 256
+    reflection_write_behind_batch_size: int = 32
+    # TaskReflector의 재시도 판정: smart(항상 고성능 모델로 리플렉션 생성) | cascade(휴리스틱 → 빠른 모델 → 고성능 모델)
+    reflection_judge: Literal["smart", "cascade"] = "smart"
+    # cascade에서 휴리스틱·빠른 모델의 판정을 그대로 쓰는 최소 confidence와, 빠른 모델에 보낼 결과의 최대 글자 수
+    reflection_judge_confidence: float = 0.8
+    reflection_judge_max_result_chars: int = 4000
+    # DB 옆에 리플렉션 서버 소켓({db}.sock)이 있으면 프로세스 내 매니저 대신 서버에 연결
+    reflection_server_enabled: bool = True
+    # 읽기 복제본(ReflectionReplica)이 새로 공개된 스냅샷을 확인하는 주기(초). 0이면 refresh()를 직접 호출
+    reflection_replica_poll_interval: float = 1.0
 
     def __init__(self, **values):
         super().__init__(**values)
@@ -3,10 +3,15 @@ import operator
 # datetime 모듈: 현재 날짜/시간 정보를 가져오기 위해 사용
 from datetime import datetime
 # typing 모듈: 타입 힌트를 위한 Annotated(메타데이터 포함 타입), Any(모든 타입) 임포트
-from typing import Annotated, Any
+from typing import Annotated, Any, Optional
 # logging 모듈: 프로그램 실행 흐름을 추적하기 위한 로깅 기능
 import logging
 
+# 공통 모듈: LLM 응답 캐시 (component_llm은 컴포넌트별 캐시 우회 설정을 적용)
+from common.llm_cache import component_llm, install_llm_cache
+# 공통 모듈: 목표 설정 단계 (PassiveGoalCreator → PromptOptimizer → ResponseOptimizer)와 그 의미 기반 캐시
+from common.goal_cache import SemanticGoalCache, open_goal_cache
+from common.goal_setting import GoalDefinition, GoalSetter, GoalSettingMode
 # LangChain 커뮤니티 도구: Tavily 검색 엔진을 사용한 웹 검색 도구
 from langchain_community.tools.tavily_search import TavilySearchResults
 # LangChain 출력 파서: LLM 출력을 문자열로 변환하는 파서
@@ -20,14 +25,8 @@ from langchain_openai import ChatOpenAI
 from langgraph.graph import END, StateGraph
 # LangGraph 미리 빌드된 에이전트: ReAct 패턴 에이전트 생성 함수
 from langgraph.prebuilt import create_react_agent
-# passive_goal_creator 모듈: Goal 모델과 PassiveGoalCreator 클래스 임포트
-from passive_goal_creator.main import Goal, PassiveGoalCreator
-# prompt_optimizer 모듈: OptimizedGoal 모델과 PromptOptimizer 클래스 임포트
-from prompt_optimizer.main import OptimizedGoal, PromptOptimizer
 # Pydantic: 데이터 검증 및 구조화를 위한 BaseModel과 Field 임포트
 from pydantic import BaseModel, Field
-# response_optimizer 모듈: ResponseOptimizer 클래스 임포트
-from response_optimizer.main import ResponseOptimizer
 
 # 로거 설정: 이 모듈의 로거 인스턴스 생성
 logger = logging.getLogger(__name__)
@@ -83,7 +82,7 @@ class QueryDecomposer:
     # 생성자: LLM을 받아 초기화
     def __init__(self, llm: ChatOpenAI):
         # LLM 인스턴스 저장
-        self.llm = llm
+        self.llm = component_llm(llm, "QueryDecomposer")
         # 현재 날짜를 YYYY-MM-DD 형식으로 저장 (프롬프트에 컨텍스트로 제공)
         self.current_date = datetime.now().strftime("%Y-%m-%d")
 
@@ -121,7 +120,7 @@ class TaskExecutor:
     # 생성자: LLM과 검색 도구를 초기화
     def __init__(self, llm: ChatOpenAI):
         # LLM 인스턴스 저장
-        self.llm = llm
+        self.llm = component_llm(llm, "TaskExecutor")
         # Tavily 검색 도구 설정: 최대 3개의 검색 결과를 가져옴
         self.tools = [TavilySearchResults(max_results=3)]
 
@@ -166,7 +165,7 @@ class ResultAggregator:
     # 생성자: LLM을 받아 초기화
     def __init__(self, llm: ChatOpenAI):
         # LLM 인스턴스 저장
-        self.llm = llm
+        self.llm = component_llm(llm, "ResultAggregator")
 
     # run 메서드: 목표, 응답 정의, 결과 리스트를 받아 최종 응답 생성
     def run(self, query: str, response_definition: str, results: list[str]) -> str:
@@ -211,13 +210,16 @@ class ResultAggregator:
 # 워크플로우: 목표 설정 → 목표 분해 → 태스크 실행 (순차 반복) → 결과 집계
 class SinglePathPlanGeneration:
     # 생성자: 필요한 모든 컴포넌트를 초기화하고 그래프를 생성
-    def __init__(self, llm: ChatOpenAI):
-        # 1단계를 위한 컴포넌트: 기본 목표 생성
-        self.passive_goal_creator = PassiveGoalCreator(llm=llm)
-        # 1단계를 위한 컴포넌트: 목표 최적화 (SMART 원칙)
-        self.prompt_optimizer = PromptOptimizer(llm=llm)
-        # 1단계를 위한 컴포넌트: 응답 형식 정의
-        self.response_optimizer = ResponseOptimizer(llm=llm)
+    # goal_cache: 의미가 비슷한 과거 쿼리의 목표 설정 결과를 재사용하는 캐시 (None이면 항상 LLM 호출)
+    # goal_setting_mode: staged(LLM 호출 3회) | fused(한 번의 호출), None이면 settings.goal_setting_mode
+    def __init__(
+        self,
+        llm: ChatOpenAI,
+        goal_cache: Optional[SemanticGoalCache] = None,
+        goal_setting_mode: Optional[GoalSettingMode] = None,
+    ):
+        # 1단계를 위한 컴포넌트: 기본 목표 생성 → 목표 최적화 (SMART 원칙) → 응답 형식 정의
+        self.goal_setter = GoalSetter(llm=llm, cache=goal_cache, mode=goal_setting_mode)
         # 2단계를 위한 컴포넌트: 목표를 태스크로 분해
         self.query_decomposer = QueryDecomposer(llm=llm)
         # 3단계를 위한 컴포넌트: 개별 태스크 실행
@@ -267,28 +269,21 @@ class SinglePathPlanGeneration:
         log_and_print("🎯 [단계 1] 목표 설정 시작")
         log_and_print(f"  사용자 입력: {state.query}")
 
-        # 1-1. 기본 목표 생성
-        log_and_print("  → 기본 목표 생성 중...")
-        goal: Goal = self.passive_goal_creator.run(query=state.query)
-        log_and_print(f"  ✓ 기본 목표: {goal.text[:100]}...")
-
-        # 1-2. 목표 최적화 (SMART 원칙)
-        log_and_print("  → 목표 최적화 중 (SMART 원칙)...")
-        optimized_goal: OptimizedGoal = self.prompt_optimizer.run(query=goal.text)
-        log_and_print(f"  ✓ 최적화된 목표: {optimized_goal.description[:100]}...")
-        log_and_print(f"  ✓ 측정 기준: {optimized_goal.metrics[:100]}...")
-
-        # 1-3. 응답 형식 최적화
-        log_and_print("  → 응답 형식 정의 중...")
-        optimized_response: str = self.response_optimizer.run(query=optimized_goal.text)
+        # 기본 목표 생성 → 목표 최적화 (SMART 원칙) → 응답 형식 정의
+        # 의미가 비슷한 과거 쿼리가 캐시에 있으면 LLM을 호출하지 않고 그 결과를 쓴다
+        log_and_print("  → 목표 생성·최적화, 응답 형식 정의 중...")
+        definition: GoalDefinition = self.goal_setter.run(query=state.query)
+        log_and_print(f"  ✓ 기본 목표: {definition.goal.text[:100]}...")
+        log_and_print(f"  ✓ 최적화된 목표: {definition.optimized_goal.description[:100]}...")
+        log_and_print(f"  ✓ 측정 기준: {definition.optimized_goal.metrics[:100]}...")
         log_and_print(f"  ✓ 응답 형식 정의 완료")
 
         log_and_print("✅ [단계 1] 목표 설정 완료")
         log_and_print("")
 
         return {
-            "optimized_goal": optimized_goal.text,
-            "optimized_response": optimized_response,
+            "optimized_goal": definition.optimized_goal.text,
+            "optimized_response": definition.response_definition,
         }
 
     def _decompose_query(self, state: SinglePathPlanGenerationState) -> dict[str, Any]:
@@ -359,6 +354,8 @@ def main():
 
     # Settings 인스턴스 생성
     settings = Settings()
+    # LLM 응답 디스크 캐시 설치: 같은 모델·파라미터·프롬프트의 호출은 저장된 응답을 재사용
+    install_llm_cache()
 
     # 로깅 설정: INFO 레벨 이상의 로그를 콘솔에 출력
     logging.basicConfig(
@@ -374,6 +371,13 @@ def main():
     )
     # --task 인자 추가
     parser.add_argument("--task", type=str, required=True, help="실행할 태스크")
+    # --goal-setting-mode 인자 추가: 지정하지 않으면 settings.goal_setting_mode
+    parser.add_argument(
+        "--goal-setting-mode",
+        choices=["staged", "fused"],
+        default=None,
+        help="목표 설정 방식 (staged: LLM 호출 3회, fused: 한 번의 호출)",
+    )
     # 커맨드 라인 인자 파싱
     args = parser.parse_args()
 
@@ -382,7 +386,10 @@ def main():
         model=settings.openai_smart_model, temperature=settings.temperature
     )
     # SinglePathPlanGeneration 에이전트 생성
-    agent = SinglePathPlanGeneration(llm=llm)
+    # 목표 설정 캐시: 이전에 실행한 것과 의미가 비슷한 태스크면 목표 설정의 LLM 호출 3회를 건너뜀
+    agent = SinglePathPlanGeneration(
+        llm=llm, goal_cache=open_goal_cache(), goal_setting_mode=args.goal_setting_mode
+    )
     # 태스크 실행: 단일 경로로 순차적 실행
     result = agent.run(args.task)
 
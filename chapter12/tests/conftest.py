@@ -0,0 +1,11 @@
+import os
+
+# settings.Settings()는 모듈을 임포트할 때 환경 변수를 읽으므로, 테스트 대상 모듈보다 먼저 설정한다.
+# API 키는 형식만 맞추고, 네트워크를 쓰는 임베딩·캐시·서버 연결은 끈다
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+os.environ["EMBEDDING_PROVIDER"] = "local"
+os.environ["EMBEDDING_CACHE_PATH"] = ""
+os.environ["LLM_CACHE_PATH"] = ""
+os.environ["GOAL_CACHE_PATH"] = ""
+os.environ["REFLECTION_SERVER_ENABLED"] = "false"
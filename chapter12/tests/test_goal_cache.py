@@ -0,0 +1,42 @@
+from common.goal_cache import SemanticGoalCache
+from common.goal_setting import GoalSetter
+from common.local_embeddings import HashedNGramEmbeddings
+from langchain_openai import ChatOpenAI
+
+
+def open_cache(path) -> SemanticGoalCache:
+    return SemanticGoalCache(
+        str(path),
+        embeddings=HashedNGramEmbeddings(dim=256, ngram_range=(2, 4)),
+        model="local-256-2-4",
+        min_similarity=0.5,
+    )
+
+
+def test_entries_are_reused_only_by_the_same_producer(tmp_path):
+    path = tmp_path / "goal_cache.sqlite3"
+    cache = open_cache(path)
+    cache.add("카레라이스 만드는 법", "staged 결과", "gpt-4o:staged")
+    cache.add("카레라이스 만드는 법", "fused 결과", "gpt-4o:fused")
+
+    assert cache.lookup("카레라이스 만드는 법", "gpt-4o:staged")[0] == "staged 결과"
+    assert cache.lookup("카레라이스 만드는 방법 알려줘", "gpt-4o:fused")[0] == "fused 결과"
+    assert cache.lookup("카레라이스 만드는 법", "gpt-4o-mini:staged") is None
+    assert cache.lookup("카레라이스 만드는 방법 알려줘", "gpt-4o-mini:staged") is None
+    cache.close()
+
+    # 다른 프로세스가 파일을 다시 열어도 producer별로 나뉜다
+    cache = open_cache(path)
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup("카레라이스 만드는 방법 알려줘", "gpt-4o:staged")[0] == "staged 결과"
+    assert cache.lookup("카레라이스 만드는 방법 알려줘", "gpt-4o-mini:fused") is None
+    cache.close()
+
+
+def test_goal_setter_keys_cache_by_llm_model_and_mode():
+    producers = {
+        GoalSetter(llm=ChatOpenAI(model=model), mode=mode).cache_producer
+        for model in ("gpt-4o", "gpt-4o-mini")
+        for mode in ("staged", "fused")
+    }
+    assert producers == {"gpt-4o:staged", "gpt-4o:fused", "gpt-4o-mini:staged", "gpt-4o-mini:fused"}
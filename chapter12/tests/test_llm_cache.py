@@ -0,0 +1,100 @@
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from typing import Any
+
+import pytest
+from common import llm_cache
+from common.llm_cache import SQLiteLLMCache, component_llm
+from langchain_core.globals import set_llm_cache
+from langchain_core.language_models import FakeListChatModel
+from langchain_core.language_models.chat_models import BaseChatModel
+
+
+def test_retry_in_same_process_does_not_wait_for_its_own_lease(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "llm_cache.sqlite3"), inflight_timeout=120.0)
+    # 첫 호출이 임대를 잡은 뒤 LLM 호출이 실패해 update()가 불리지 않은 상황
+    assert cache.lookup("prompt", "llm") is None
+    start = time.perf_counter()
+    assert cache.lookup("prompt", "llm") is None
+    assert time.perf_counter() - start < 1.0
+    cache.close()
+
+
+def test_lease_of_exited_process_is_taken_over(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite3")
+    cache = SQLiteLLMCache(path, inflight_timeout=120.0)
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from common.llm_cache import SQLiteLLMCache;"
+            " SQLiteLLMCache(sys.argv[1]).lookup('prompt', 'llm')",
+            path,
+        ],
+        env={**os.environ, "PYTHONPATH": os.getcwd()},
+        check=True,
+    )
+    start = time.perf_counter()
+    assert cache.lookup("prompt", "llm") is None
+    assert time.perf_counter() - start < 1.0
+    cache.close()
+
+
+def test_lease_of_live_process_is_waited_for(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "llm_cache.sqlite3"), inflight_timeout=0.3)
+    cache._conn.execute(
+        "INSERT INTO inflight (key, started, owner) VALUES (?, ?, ?)",
+        (cache._key("prompt", "llm"), time.time(), os.getppid()),
+    )
+    cache._conn.commit()
+    start = time.perf_counter()
+    assert cache.lookup("prompt", "llm") is None
+    assert time.perf_counter() - start >= 0.3
+    cache.close()
+
+
+def test_cache_is_opt_in_and_retrying_components_bypass_it():
+    assert type(llm_cache.settings).model_fields["llm_cache_path"].default == ""
+    llm = FakeListChatModel(responses=["ok"])
+    for component in ("TaskExecutor", "Executor", "TaskReflector", "CascadeJudge"):
+        assert component_llm(llm, component).cache is False
+    assert component_llm(llm, "QueryDecomposer").cache is None
+
+
+class FailingChatModel(BaseChatModel):
+    @property
+    def _llm_type(self) -> str:
+        return "failing-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        raise RuntimeError("LLM 호출 실패")
+
+
+@pytest.fixture
+def installed_cache(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "llm_cache.sqlite3"), inflight_timeout=120.0)
+    set_llm_cache(cache)
+    yield cache
+    set_llm_cache(None)
+    cache.close()
+
+
+def test_failed_call_releases_its_lease(installed_cache):
+    llm = component_llm(FailingChatModel(), "QueryDecomposer")
+    with pytest.raises(RuntimeError):
+        llm.invoke("prompt")
+    with pytest.raises(RuntimeError):
+        asyncio.run(llm.ainvoke("async prompt"))
+    # 다른 프로세스가 inflight_timeout까지 기다리지 않도록 임대가 바로 지워진다
+    assert installed_cache._conn.execute("SELECT COUNT(*) FROM inflight").fetchone()[0] == 0
+
+
+def test_successful_call_is_cached_without_lease(installed_cache):
+    llm = component_llm(FakeListChatModel(responses=["ok"]), "QueryDecomposer")
+    assert llm.invoke("prompt").content == "ok"
+    assert llm.invoke("prompt").content == "ok"
+    assert installed_cache.stats()["hits"] == 1
+    assert installed_cache._conn.execute("SELECT COUNT(*) FROM inflight").fetchone()[0] == 0
@@ -0,0 +1,53 @@
+import threading
+
+from common import reflection_manager
+from common.reflection_columns import ReflectionColumns
+from common.reflection_manager import Reflection, ReflectionJudgment, ReflectionManager
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def make_reflection(i: int) -> Reflection:
+    return Reflection(
+        id="",
+        task=f"태스크 {i}",
+        reflection=f"교훈 {i}",
+        judgment=ReflectionJudgment(needs_retry=i % 2 == 0, confidence=0.5, reasons=[f"이유 {i}"]),
+    )
+
+
+def test_background_compaction_builds_records_off_the_save_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(reflection_manager.settings, "reflection_merge_distance", 0.0)
+    monkeypatch.setattr(reflection_manager.settings, "reflection_capacity", 0)
+    # compact 호출 중에 저장 경로(호출한 스레드)에서 만든 레코드의 행 번호
+    compacting, built_on_save_path = threading.Event(), []
+    record = ReflectionColumns.record
+
+    def tracking_record(self, row, reflection_id):
+        if compacting.is_set() and threading.current_thread() is threading.main_thread():
+            built_on_save_path.append(row)
+        return record(self, row, reflection_id)
+
+    monkeypatch.setattr(ReflectionColumns, "record", tracking_record)
+    path = str(tmp_path / "reflection_db.json")
+    embeddings = DeterministicFakeEmbedding(size=32)
+    manager = ReflectionManager(file_path=path, embeddings=embeddings)
+    ids = [manager.save_reflection(make_reflection(i)) for i in range(20)]
+    manager.delete_reflection(ids[3])
+
+    compacting.set()
+    manager.compact(wait=False)
+    compacting.clear()
+    # compaction이 시작된 뒤의 변경은 로그에 남고 스냅샷 사본에는 들어가지 않는다
+    manager.update_reflection(
+        manager.get_reflection(ids[5]).model_copy(update={"reflection": "바뀐 교훈"})
+    )
+    manager.store._compaction_thread.join()
+    assert not built_on_save_path
+    manager.close()
+
+    reopened = ReflectionManager(file_path=path, embeddings=embeddings)
+    assert len(reopened.reflections) == 19
+    assert ids[3] not in reopened.reflections
+    assert reopened.get_reflection(ids[5]).reflection == "바뀐 교훈"
+    assert reopened.get_reflection(ids[6]).judgment.reasons == ["이유 6"]
+    reopened.close()
@@ -0,0 +1,131 @@
+import glob
+import time
+
+import numpy as np
+import pytest
+from common import reflection_manager
+from common.reflection_manager import Reflection, ReflectionJudgment, ReflectionManager
+from common.reflection_store import ReflectionStore
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def make_reflection(i: int) -> Reflection:
+    return Reflection(
+        id="",
+        task=f"태스크 {i}",
+        reflection=f"교훈 {i}",
+        judgment=ReflectionJudgment(needs_retry=False, confidence=0.9, reasons=[]),
+    )
+
+
+@pytest.mark.parametrize("backend", ["hnsw", "ivf_flat"])
+def test_checkpoint_survives_two_restarts_with_deletions(tmp_path, monkeypatch, backend):
+    settings = reflection_manager.settings
+    monkeypatch.setattr(settings, "reflection_index_backend", backend)
+    monkeypatch.setattr(settings, "reflection_index_promotion_threshold", 20)
+    monkeypatch.setattr(settings, "reflection_merge_distance", 0.0)
+    monkeypatch.setattr(settings, "reflection_capacity", 0)
+    monkeypatch.setattr(settings, "reflection_index_checkpoint_on_close", True)
+    embeddings = DeterministicFakeEmbedding(size=32)
+    path = str(tmp_path / "reflection_db.json")
+
+    def open_manager() -> ReflectionManager:
+        return ReflectionManager(file_path=path, embeddings=embeddings)
+
+    deleted_vectors = []
+
+    def delete(manager: ReflectionManager, reflection_ids: list[str]) -> None:
+        for reflection_id in reflection_ids:
+            deleted_vectors.append(manager.embedding_matrix.row(manager.rows[reflection_id]).copy())
+            assert manager.delete_reflection(reflection_id)
+
+    manager = open_manager()
+    ids = [manager.save_reflection(make_reflection(i)) for i in range(60)]
+    assert manager.index.promoted
+    delete(manager, ids[:10])
+    # compaction은 삭제된 행을 음수 ID로 바꾼 체크포인트를 남긴다 (로그가 임계값을 넘을 때와 같음)
+    manager.compact()
+    manager.close()
+
+    # 첫 재시작: 체크포인트를 연 뒤 추가·삭제하고 다시 체크포인트를 남긴다
+    manager = open_manager()
+    ids += [manager.save_reflection(make_reflection(i)) for i in range(60, 70)]
+    delete(manager, ids[10:15] + ids[60:65])
+    manager.close()
+
+    # 두 번째 재시작: 삭제 표시된 벡터가 살아 있는 행으로 되살아나지 않아야 한다
+    manager = open_manager()
+    live = len(manager.reflections)
+    assert live == 50
+    assert manager.index.ntotal == live
+    stored_ids = manager.index.ids()
+    assert len(stored_ids) == len(np.unique(stored_ids)) == live
+    assert (stored_ids >= 0).all()
+    D, _ = manager.index.search(np.vstack(deleted_vectors), 1)
+    # 삭제된 벡터와 똑같은 벡터는 더 이상 검색되지 않는다
+    assert (D[:, 0] > 1e-4).all()
+    manager.close()
+
+
+@pytest.fixture
+def slow_snapshots(monkeypatch):
+    # 백그라운드 compaction이 스냅샷을 쓰는 동안 다른 호출이 끼어들도록 쓰기 시작을 늦춘다
+    write_snapshot = ReflectionStore._write_snapshot
+
+    def slow_write_snapshot(self, *args, **kwargs):
+        time.sleep(0.3)
+        return write_snapshot(self, *args, **kwargs)
+
+    monkeypatch.setattr(ReflectionStore, "_write_snapshot", slow_write_snapshot)
+
+
+@pytest.fixture
+def promoted_settings(monkeypatch):
+    settings = reflection_manager.settings
+    monkeypatch.setattr(settings, "reflection_index_backend", "hnsw")
+    monkeypatch.setattr(settings, "reflection_index_promotion_threshold", 20)
+    monkeypatch.setattr(settings, "reflection_index_checkpoint_on_close", True)
+    return settings
+
+
+def test_close_during_background_compaction_publishes_latest_checkpoint(
+    tmp_path, promoted_settings, slow_snapshots
+):
+    embeddings = DeterministicFakeEmbedding(size=32)
+    path = str(tmp_path / "reflection_db.json")
+    manager = ReflectionManager(file_path=path, embeddings=embeddings)
+    for i in range(40):
+        manager.save_reflection(make_reflection(i))
+    manager.compact(wait=False)
+    for i in range(40, 50):
+        manager.save_reflection(make_reflection(i))
+    manager.close()
+
+    assert manager.store.read_index_checkpoint(manager.store.generation)["sequence"] == 50
+    assert not glob.glob(f"{tmp_path}/*.tmp")
+    manager = ReflectionManager(file_path=path, embeddings=embeddings)
+    assert manager.index.ntotal == len(manager.reflections) == 50
+    manager.close()
+
+
+def test_checkpoint_during_background_compaction_is_not_overwritten(
+    tmp_path, monkeypatch, promoted_settings, slow_snapshots
+):
+    embeddings = DeterministicFakeEmbedding(size=32)
+    path = str(tmp_path / "reflection_db.json")
+    manager = ReflectionManager(file_path=path, embeddings=embeddings)
+    for i in range(40):
+        manager.save_reflection(make_reflection(i))
+    manager.compact(wait=False)
+    for i in range(40, 50):
+        manager.save_reflection(make_reflection(i))
+    # compaction 스레드가 40행까지의 체크포인트를 쓰기 전에 50행까지의 체크포인트를 쓴다
+    assert manager.checkpoint_index()
+    manager.store.wait_for_compaction()
+    assert manager.store.read_index_checkpoint(manager.store.generation)["sequence"] == 50
+    monkeypatch.setattr(promoted_settings, "reflection_index_checkpoint_on_close", False)
+    manager.close()
+
+    manager = ReflectionManager(file_path=path, embeddings=embeddings)
+    assert manager.index.ntotal == len(manager.reflections) == 50
+    manager.close()
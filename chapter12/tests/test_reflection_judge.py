@@ -0,0 +1,71 @@
+import logging
+
+from common.reflection_judge import CascadeJudge, heuristic_judgment
+from common.reflection_manager import ReflectionJudgment
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.runnables import RunnableLambda
+from settings import Settings
+
+TASK = "카레라이스 재료와 조리 순서 조사"
+THRESHOLD = Settings.model_fields["reflection_judge_confidence"].default
+
+
+def test_correct_answer_mentioning_refusal_phrase_escalates():
+    result = (
+        "카레라이스 재료는 감자, 당근, 양파, 카레 가루이며 조리 순서는 재료 손질, 볶기, 끓이기 순이다. "
+        "원산지별 향신료 배합 비율은 공개 자료가 없어 확인할 수 없습니다. "
+    ) * 3
+    judgment = heuristic_judgment(TASK, result)
+    assert judgment.confidence < THRESHOLD
+    judge = CascadeJudge()
+    assert judge.judge(TASK, result) is None
+    assert judge.stats["escalated"] == 1
+
+
+def test_short_answer_with_caveat_after_first_sentence_escalates():
+    result = "카레라이스 재료는 감자, 당근, 양파, 카레 가루입니다. 지역별 변형은 확인할 수 없습니다."
+    assert heuristic_judgment(TASK, result).confidence < THRESHOLD
+
+
+def test_whole_answer_refusal_and_tool_error_are_confident_retries():
+    for result in (
+        "죄송하지만 요청하신 정보를 찾을 수 없습니다. 다른 검색어로 다시 시도해 주세요.",
+        "Error: TavilySearchResults rate limit exceeded. Please retry after a few seconds.",
+    ):
+        judgment = heuristic_judgment(TASK, result)
+        assert judgment.needs_retry
+        assert judgment.confidence >= THRESHOLD
+
+
+class FastJudgeModel(GenericFakeChatModel):
+    """구조화 출력으로 고정 판정을 돌려주거나, error가 있으면 예외를 내는 가짜 빠른 모델."""
+
+    error: bool = False
+
+    def with_structured_output(self, schema, **kwargs):
+        def respond(prompt):
+            if self.error:
+                raise RuntimeError("fast model unavailable")
+            return ReflectionJudgment(needs_retry=False, confidence=0.9, reasons=["빠른 모델 판정"])
+
+        return RunnableLambda(respond)
+
+
+def test_long_on_topic_answer_is_judged_by_fast_model():
+    result = f"카레라이스 재료와 조리 순서: 감자, 당근, 양파를 볶고 끓인다. {'재료 손질과 불 조절. ' * 150}"
+    judgment = heuristic_judgment(TASK, result)
+    assert not judgment.needs_retry
+    assert judgment.confidence < THRESHOLD
+
+    judge = CascadeJudge(FastJudgeModel(messages=iter([])))
+    assert judge.judge(TASK, result).reasons == ["빠른 모델 판정"]
+    assert judge.stats == {"heuristic": 0, "fast": 1, "escalated": 0}
+
+
+def test_fast_model_error_is_logged_and_escalates(caplog):
+    result = f"카레라이스 재료와 조리 순서: 감자, 당근, 양파를 볶고 끓인다. {'재료 손질과 불 조절. ' * 150}"
+    judge = CascadeJudge(FastJudgeModel(messages=iter([]), error=True))
+    with caplog.at_level(logging.WARNING, logger="common.reflection_judge"):
+        assert judge.judge(TASK, result) is None
+    assert "fast model unavailable" in caplog.text
+    assert judge.stats["escalated"] == 1
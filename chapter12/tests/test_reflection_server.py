@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+import pytest
+from common.reflection_manager import Reflection, ReflectionJudgment, ReflectionManager
+from common.reflection_server import RemoteReflectionManager, ReflectionServer
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+@pytest.fixture
+def server(tmp_path):
+    manager = ReflectionManager(
+        file_path=str(tmp_path / "reflection_db.json"),
+        embeddings=DeterministicFakeEmbedding(size=32),
+    )
+    server = ReflectionServer(str(tmp_path / "reflection_db.sock"), manager)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.fixture
+def remote(server):
+    client = RemoteReflectionManager(server.socket_path)
+    yield client
+    client.close()
+
+
+def test_async_methods_round_trip_through_server(remote):
+    reflection = Reflection(
+        id="",
+        task="카레라이스 만드는 법",
+        reflection="재료 손질 순서를 먼저 정리한다",
+        judgment=ReflectionJudgment(needs_retry=False, confidence=0.9, reasons=[]),
+    )
+
+    async def scenario():
+        reflection_id = await remote.asave_reflection(reflection, "self_reflection")
+        found = await remote.aget_relevant_reflections(reflection.reflection, k=1)
+        batch = await remote.aget_relevant_reflections_batch([reflection.reflection, "다른 질문"], k=1)
+        return reflection_id, found, batch
+
+    reflection_id, found, batch = asyncio.run(scenario())
+    assert reflection.id == reflection_id
+    assert [r.id for r in found] == [reflection_id]
+    assert len(batch) == 2 and batch[0][0].id == reflection_id
+    assert remote.count() == 1
+
+
+
+def test_embed_queries_warms_server_query_cache(server, remote):
+    remote.embed_queries(["태스크 A", "태스크 B"])
+    assert "태스크 A" in server.manager.query_embeddings
+    assert "태스크 B" in server.manager.query_embeddings
@@ -0,0 +1,75 @@
+import pytest
+from common import reflection_manager
+from common.reflection_manager import Reflection, ReflectionJudgment
+from common.reflection_shards import ShardedReflectionManager
+from langchain_core.embeddings import Embeddings
+
+QUERY = "카레 향신료 배합"
+
+
+class MarkerEmbeddings(Embeddings):
+    """'가까운'이 들어간 텍스트와 쿼리를 같은 방향에, 나머지를 먼 방향에 두는 임베딩."""
+
+    def __init__(self):
+        self.calls: list[list[str]] = []
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        self.calls.append([text])
+        return self._vector(text)
+
+    def _vector(self, text: str) -> list[float]:
+        return [1.0, 0.0] if "가까운" in text or text == QUERY else [0.0, 1.0]
+
+
+def make_reflection(task: str, text: str) -> Reflection:
+    return Reflection(
+        id="",
+        task=task,
+        reflection=text,
+        judgment=ReflectionJudgment(needs_retry=False, confidence=0.9, reasons=[]),
+    )
+
+
+@pytest.fixture
+def sharded(tmp_path, monkeypatch):
+    monkeypatch.setattr(reflection_manager.settings, "reflection_merge_distance", 0.0)
+    monkeypatch.setattr(reflection_manager.settings, "reflection_capacity", 0)
+    manager = ShardedReflectionManager(
+        root=str(tmp_path / "shards"), embeddings=MarkerEmbeddings(), search_workers=1
+    )
+    yield manager
+    manager.close()
+
+
+def test_hybrid_search_fuses_rankings_across_shards(sharded):
+    # 벡터로는 멀지만 두 순위 모두에 나오는 리플렉션과, 벡터로만 가까운 다른 샤드의 리플렉션
+    matching_id = sharded.save_reflection(
+        make_reflection("카레 조사", "카레 향신료 배합 비율을 먼저 확인한다"), namespace="a"
+    )
+    close_id = sharded.save_reflection(
+        make_reflection("가까운 태스크", "가까운 벡터의 무관한 교훈"), namespace="b"
+    )
+
+    assert [r.id for r in sharded.get_relevant_reflections(QUERY, k=1, mode="vector")] == [close_id]
+    assert [r.id for r in sharded.get_relevant_reflections(QUERY, k=1, mode="hybrid")] == [
+        matching_id
+    ]
+    assert [r.id for r in sharded.get_relevant_reflections(QUERY, k=2, mode="hybrid")] == [
+        matching_id,
+        close_id,
+    ]
+
+
+def test_embed_queries_warms_cache_without_searching(sharded):
+    sharded.save_reflection(make_reflection("카레 조사", "카레 향신료 배합 비율을 먼저 확인한다"))
+    sharded.embeddings.calls.clear()
+    sharded.embed_queries([QUERY, "다른 태스크"])
+    assert sharded.embeddings.calls == [[QUERY, "다른 태스크"]]
+
+    # 미리 계산한 쿼리는 검색할 때 다시 임베딩하지 않는다
+    assert len(sharded.get_relevant_reflections(QUERY, k=1, mode="vector")) == 1
+    assert sharded.embeddings.calls == [[QUERY, "다른 태스크"]]
@@ -0,0 +1,121 @@
+from typing import Any
+
+import pytest
+from common import llm_cache, reflection_manager
+from common.llm_cache import SQLiteLLMCache
+from common.reflection_manager import ReflectionJudgment, ReflectionManager, TaskReflector
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.globals import set_llm_cache
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+
+def fake_reflection(i: int) -> dict:
+    return {
+        "id": "",
+        "task": f"태스크 {i}",
+        "reflection": f"교훈 {i}",
+        "judgment": {"needs_retry": False, "confidence": 0.9, "reasons": []},
+    }
+
+
+class ReflectionCountFakeChatModel(BaseChatModel):
+    """호출마다 counts의 다음 수만큼 리플렉션을 담은 ReflectionBatch 도구 호출을 반환하는 가짜 모델.
+
+    Reflection 하나를 요청받으면 리플렉션 하나를 반환한다.
+    """
+
+    counts: list[int] = [1]
+    calls: list[int] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "reflection-count-fake"
+
+    def bind_tools(self, tools, *, tool_choice=None, **kwargs):
+        return self.bind(
+            tools=[convert_to_openai_tool(tool) for tool in tools],
+            tool_choice=tool_choice,
+            **kwargs,
+        )
+
+    def with_structured_output(self, schema, *, include_raw: bool = False, **kwargs):
+        return super().with_structured_output(schema, include_raw=include_raw)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        name = kwargs["tools"][0]["function"]["name"]
+        if name == "Reflection":
+            self.calls.append(1)
+            args = fake_reflection(0)
+        else:
+            count = self.counts[min(len(self.calls), len(self.counts) - 1)]
+            self.calls.append(count)
+            args = {"reflections": [fake_reflection(i) for i in range(count)]}
+        message = AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": "call_0"}])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(reflection_manager.settings, "reflection_merge_distance", 0.0)
+    monkeypatch.setattr(reflection_manager.settings, "reflection_capacity", 0)
+    manager = ReflectionManager(
+        file_path=str(tmp_path / "reflection_db.json"),
+        embeddings=DeterministicFakeEmbedding(size=32),
+    )
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def cached(tmp_path, monkeypatch):
+    # 재시도 컴포넌트까지 모두 캐시하도록 설정해도 배치 호출은 캐시를 거치지 않아야 한다
+    monkeypatch.setattr(llm_cache.settings, "llm_cache_bypass", [])
+    cache = SQLiteLLMCache(str(tmp_path / "llm_cache.sqlite3"))
+    set_llm_cache(cache)
+    yield cache
+    set_llm_cache(None)
+    cache.close()
+
+
+def test_run_batch_retries_mismatched_count_with_fresh_call(manager, cached):
+    llm = ReflectionCountFakeChatModel(counts=[2, 2, 3])
+    reflector = TaskReflector(llm=llm, reflection_manager=manager)
+    tasks = ["태스크 A", "태스크 B", "태스크 C"]
+    reflections = reflector.run_batch(tasks, ["결과 A", "결과 B", "결과 C"])
+
+    assert llm.calls == [2, 2, 3]
+    assert [r.task for r in reflections] == tasks
+    assert all(r.id in manager.reflections for r in reflections)
+    assert cached.stats()["entries"] == 0
+
+
+def test_run_batch_gives_up_after_retries(manager, cached):
+    llm = ReflectionCountFakeChatModel(counts=[1])
+    reflector = TaskReflector(llm=llm, reflection_manager=manager)
+    with pytest.raises(ValueError):
+        reflector.run_batch(["태스크 A", "태스크 B"], ["결과 A", "결과 B"])
+    assert len(llm.calls) == 5
+    assert not manager.reflections
+
+
+class FixedJudge:
+    def judge(self, task: str, result: str) -> ReflectionJudgment:
+        return ReflectionJudgment(needs_retry=False, confidence=0.95, reasons=["고정 판정"])
+
+
+def test_resolved_deferred_lessons_are_dropped(manager):
+    reflector = TaskReflector(
+        llm=ReflectionCountFakeChatModel(), reflection_manager=manager, judge=FixedJudge()
+    )
+    temporary_ids = [reflector.run(f"태스크 {i}", f"결과 {i}").id for i in range(3)]
+    assert len(reflector._lessons) == 3
+
+    stored_id = reflector.resolve(temporary_ids[0])
+    assert stored_id in manager.reflections
+    assert temporary_ids[0] not in reflector._lessons
+    reflector.flush()
+    assert not reflector._lessons
+    assert len(manager.reflections) == 3
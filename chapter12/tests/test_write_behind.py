@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+from common import reflection_manager, reflection_write_behind
+from common.reflection_manager import Reflection, ReflectionJudgment, ReflectionManager
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+
+def make_reflection(text: str) -> Reflection:
+    return Reflection(
+        id="",
+        task=f"태스크 {text}",
+        reflection=text,
+        judgment=ReflectionJudgment(needs_retry=False, confidence=0.9, reasons=[]),
+    )
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(reflection_manager.settings, "reflection_merge_distance", 0.0)
+    monkeypatch.setattr(reflection_manager.settings, "reflection_capacity", 0)
+    manager = ReflectionManager(
+        file_path=str(tmp_path / "reflection_db.json"),
+        embeddings=DeterministicFakeEmbedding(size=32),
+    )
+    yield manager
+    manager.close()
+
+
+def flush_within(manager: ReflectionManager, timeout: float = 5.0) -> None:
+    thread = threading.Thread(target=manager.flush, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "write-behind flush가 끝나지 않았습니다"
+
+
+def test_insert_failure_keeps_reflection_pending_and_worker_alive(manager, monkeypatch):
+    insert = manager._insert
+
+    def failing_insert(reflection, embedding, pattern=""):
+        if reflection.reflection == "실패할 교훈":
+            raise OSError("디스크 오류")
+        return insert(reflection, embedding, pattern)
+
+    monkeypatch.setattr(manager, "_insert", failing_insert)
+    failed_id = manager.enqueue_reflection(make_reflection("실패할 교훈"))
+    saved_id = manager.enqueue_reflection(make_reflection("저장될 교훈"))
+    flush_within(manager)
+
+    assert saved_id in manager.rows
+    assert failed_id not in manager.rows
+    assert failed_id in manager.write_behind.pending
+    with open(manager.write_behind.journal_path, encoding="utf-8") as file:
+        assert failed_id in file.read()
+
+    # 작업 스레드는 살아 있어 이후의 리플렉션도 저장한다
+    later_id = manager.enqueue_reflection(make_reflection("나중 교훈"))
+    flush_within(manager)
+    assert later_id in manager.rows
+
+
+def test_merged_done_record_is_fsynced(manager, monkeypatch):
+    manager.merge_distance = 0.1
+    manager.store.fsync = "interval"
+    manager.store.fsync_interval = 3600.0
+    first_id = manager.enqueue_reflection(make_reflection("같은 교훈"))
+    flush_within(manager)
+
+    synced = []
+    fsync = reflection_write_behind.os.fsync
+    monkeypatch.setattr(
+        reflection_write_behind.os, "fsync", lambda fd: (synced.append(fd), fsync(fd))
+    )
+    merged_id = manager.enqueue_reflection(make_reflection("같은 교훈"))
+    flush_within(manager)
+
+    assert manager.write_behind.aliases[merged_id] == first_id
+    assert manager.get_reflection(first_id).hits == 2
+    assert synced